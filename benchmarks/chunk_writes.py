@@ -0,0 +1,180 @@
+"""Benchmark of the `DescriptionChunk` write paths.
+
+Compares the legacy per-game write, exactly as
+`Neo4jClient.set_game_description_embeddings` wrote the chunks of each game
+before the bulk write path, in two transactions: one removing the existing chunks, and one `MERGE`ing each
+chunk on all of its properties (including the embedding as a regular list
+property) before setting the same vector again with
+`db.create.setNodeVectorProperty`. The bulk path is
+`Neo4jClient.set_description_chunk_embeddings`. Synthetic games
+(with negative appids, to avoid touching any real data) and random embeddings
+are written with each path, reporting the write time and the bytes per chunk
+added to the store on disk, measured on the mounted Neo4j data directory.
+
+Usage:
+    python benchmarks/chunk_writes.py -g 1000 -c 5 -b 100
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from vapor.core.clients import Neo4jClient
+from vapor.core.models.embeddings import VaporEmbeddings
+from vapor.core.utils import utils
+
+# NOTE: The Cypher of the legacy write path, kept verbatim for comparison
+LEGACY_REMOVE_CYPHER = """
+    MATCH (g:Game {appId: $appid})-[:HAS_DESCRIPTION_CHUNK]->(n:DescriptionChunk)
+    DETACH DELETE n
+"""
+LEGACY_CYPHER = """
+    MATCH (g:Game {appId: $appid})
+    UNWIND $chunks as chunk
+    MERGE (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk {
+        chunkId: chunk.chunkid,
+        source: chunk.source,
+        startIndex: chunk.start_index,
+        totalLength: chunk.total_length,
+        embedding: chunk.embedding
+    })
+    WITH c
+    CALL db.create.setNodeVectorProperty(c, "embedding", c.embedding)
+"""
+
+
+def store_size(store_path: Path) -> int:
+    """Total size in bytes of the store files of the database"""
+    return sum(f.stat().st_size for f in store_path.rglob("*") if f.is_file())
+
+
+def make_chunks(
+    appids: list[int], n_chunks: int, dimension: int, seed: int
+) -> dict[int, list[dict]]:
+    rng = np.random.default_rng(seed)
+    chunks = {}
+    for appid in appids:
+        vectors = rng.standard_normal((n_chunks, dimension), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        chunks[appid] = [
+            {
+                "chunkid": f"{appid}-chunk{i}",
+                "source": appid,
+                "start_index": i * 500,
+                "total_length": 500,
+                "embedding": vector,
+            }
+            for i, vector in enumerate(vectors.tolist())
+        ]
+    return chunks
+
+
+def cleanup(neo4j_client: Neo4jClient, appids: list[int]) -> None:
+    cypher = """
+        UNWIND $appids as appid
+        MATCH (g:Game {appId: appid})
+        OPTIONAL MATCH (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+        DETACH DELETE g, c
+    """
+    neo4j_client._write(cypher, appids=appids)
+    neo4j_client._write("CALL db.checkpoint()")
+
+
+def legacy_write(
+    neo4j_client: Neo4jClient, chunks: dict[int, list[dict]], batch_size: int
+) -> None:
+    for appid, game_chunks in chunks.items():
+        neo4j_client._write(LEGACY_REMOVE_CYPHER, appid=appid)
+        validated_nodes = neo4j_client._validate_node_fields(
+            nodes=game_chunks,
+            defaults={
+                "chunkid": None,
+                "source": appid,
+                "start_index": None,
+                "total_length": None,
+                "embedding": None,
+            },
+        )
+        neo4j_client._write(LEGACY_CYPHER, appid=appid, chunks=validated_nodes)
+
+
+def bulk_write(
+    neo4j_client: Neo4jClient, chunks: dict[int, list[dict]], batch_size: int
+) -> None:
+    appids = list(chunks)
+    for i in range(0, len(appids), batch_size):
+        batch = appids[i : i + batch_size]
+        neo4j_client.set_description_chunk_embeddings(
+            [chunk for appid in batch for chunk in chunks[appid]], appids=batch
+        )
+
+
+def main(
+    n_games: int, n_chunks: int, batch_size: int, store_path: Path, seed: int
+) -> None:
+    console = Console()
+    neo4j_client = Neo4jClient.from_env()
+    dimension = VaporEmbeddings.from_env().embedding_size
+    appids = [-(i + 1) for i in range(n_games)]
+    chunks = make_chunks(appids, n_chunks, dimension, seed)
+    total_chunks = n_games * n_chunks
+    if not store_path.exists():
+        console.print(
+            f"[yellow]Store not found @ {store_path}, skipping sizes[/yellow]"
+        )
+
+    table = Table(
+        title=f"{total_chunks} chunks ({n_games} games, {dimension}-d embeddings)"
+    )
+    for column in ["write path", "write time s", "chunks/s", "bytes/chunk"]:
+        table.add_column(column, justify="right")
+
+    for name, write in [("legacy", legacy_write), ("bulk", bulk_write)]:
+        cleanup(neo4j_client, appids)
+        neo4j_client._write(
+            "UNWIND $appids as appid MERGE (g:Game {appId: appid})", appids=appids
+        )
+        neo4j_client._write("CALL db.checkpoint()")
+        size_before = store_size(store_path) if store_path.exists() else 0
+        start = time.perf_counter()
+        write(neo4j_client, chunks, batch_size)
+        duration = time.perf_counter() - start
+        neo4j_client._write("CALL db.checkpoint()")
+        size_after = store_size(store_path) if store_path.exists() else 0
+        bytes_per_chunk = (
+            f"{(size_after - size_before) / total_chunks:.0f}"
+            if store_path.exists()
+            else "n/a"
+        )
+        table.add_row(
+            name, f"{duration:.2f}", f"{total_chunks / duration:.0f}", bytes_per_chunk
+        )
+
+    cleanup(neo4j_client, appids)
+    console.print(table)
+
+
+if __name__ == "__main__":
+    data_path = utils.get_env_var("VAPOR_DATA_PATH", "./data")
+    database = utils.get_env_var("NEO4J_DATABASE", "neo4j")
+    parser = argparse.ArgumentParser(
+        description="Benchmark the legacy and bulk DescriptionChunk write paths"
+    )
+    parser.add_argument("-g", "--n-games", type=int, default=1000)
+    parser.add_argument("-c", "--n-chunks", type=int, default=5, help="Per game.")
+    parser.add_argument(
+        "-b", "--batch-size", type=int, default=100, help="Games per bulk write."
+    )
+    parser.add_argument(
+        "--store-path",
+        type=Path,
+        default=Path(data_path, "neo4j", "data", "databases", database),
+        help="The Neo4j store directory of the database mounted on the host.",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    main(args.n_games, args.n_chunks, args.batch_size, args.store_path, args.seed)
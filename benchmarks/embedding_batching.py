@@ -0,0 +1,94 @@
+"""Benchmark of micro-batched query embeddings under concurrent load.
+
+Simulates `-c` concurrent clients, each sending `-r` query embedding requests
+back to back with `VaporEmbeddings.aembed_query`, against the configured
+Ollama embedding model. Each setting of `query_batch_size` is compared by
+the p50/p95 latency per request and the overall throughput. The query cache
+is disabled and every text is unique, such that each request reaches Ollama.
+
+Usage:
+    python benchmarks/embedding_batching.py -c 16 -r 10 -b 1 8 16
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from vapor.core.models.embeddings import VaporEmbeddings
+
+
+async def client(
+    embedder: VaporEmbeddings, client_id: int, n_requests: int, run_id: int
+) -> list[float]:
+    """Send `n_requests` unique queries, returning latencies in milliseconds"""
+    latencies = []
+    for i in range(n_requests):
+        text = f"Run {run_id} client {client_id} query {i}: a cozy farming game"
+        start = time.perf_counter()
+        await embedder.aembed_query(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run(
+    batch_size: int, wait_ms: float, n_clients: int, n_requests: int, run_id: int
+) -> tuple[np.ndarray, float]:
+    embedder = VaporEmbeddings.from_env(
+        query_cache_max_bytes=0,
+        query_batch_size=batch_size,
+        query_batch_wait=wait_ms / 1000,
+    )
+    # Warm up the model
+    await embedder.aembed_documents(["warmup"])
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[client(embedder, i, n_requests, run_id) for i in range(n_clients)]
+    )
+    duration = time.perf_counter() - start
+    return np.concatenate(results), duration
+
+
+def main(
+    batch_sizes: list[int], wait_ms: float, n_clients: int, n_requests: int
+) -> None:
+    console = Console()
+    total = n_clients * n_requests
+    table = Table(title=f"{total} queries from {n_clients} concurrent clients")
+    for column in ["batch size", "p50 ms", "p95 ms", "queries/s"]:
+        table.add_column(column, justify="right")
+    for run_id, batch_size in enumerate(batch_sizes):
+        latencies, duration = asyncio.run(
+            run(batch_size, wait_ms, n_clients, n_requests, run_id)
+        )
+        table.add_row(
+            str(batch_size),
+            f"{np.percentile(latencies, 50):.1f}",
+            f"{np.percentile(latencies, 95):.1f}",
+            f"{total / duration:.1f}",
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark micro-batched query embeddings under concurrent load"
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 8, 16],
+        help="The query batch sizes to compare, 1 disables batching.",
+    )
+    parser.add_argument(
+        "-w", "--wait-ms", type=float, default=5.0, help="Max batch wait time."
+    )
+    parser.add_argument("-c", "--n-clients", type=int, default=16)
+    parser.add_argument("-r", "--n-requests", type=int, default=10, help="Per client.")
+    args = parser.parse_args()
+    main(args.batch_sizes, args.wait_ms, args.n_clients, args.n_requests)
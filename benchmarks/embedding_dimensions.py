@@ -0,0 +1,220 @@
+"""Benchmark of recall vs. memory vs. latency for reduced dimension embeddings.
+
+Loads the (full dimension) `DescriptionChunk` embeddings from Neo4j, then
+truncates and renormalizes them to each of the Matryoshka sizes supported
+by the configured `OLLAMA_EMBEDDING_MODEL`. Recall@k is measured against
+exact search with the full dimension embeddings, for both exact `float32`
+search and the scalar (`int8`) quantized vectors. Optionally, each setting
+is also written to a temporary quantized Neo4j vector index to measure the
+end-to-end query latency and recall of the index itself.
+
+Usage:
+    python benchmarks/embedding_dimensions.py -k 10 -q 100 [--neo4j]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from vapor.core.clients import Neo4jClient
+from vapor.core.models.embeddings import (
+    EMBEDDING_PARAMS,
+    VaporEmbeddings,
+    truncate_embeddings,
+)
+
+BENCHMARK_LABEL = "DimensionBenchmark"
+
+
+def exact_top_k(
+    vectors: np.ndarray, queries: np.ndarray, query_ids: np.ndarray, k: int
+):
+    """Exact cosine top-k (vectors are normalized) excluding the query itself"""
+    scores = queries @ vectors.T
+    scores[np.arange(len(query_ids)), query_ids] = -np.inf
+    top_k = np.argpartition(-scores, k, axis=1)[:, :k]
+    return top_k
+
+
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, float]:
+    """Symmetric scalar quantization of `vectors` to `int8`"""
+    scale = float(np.abs(vectors).max()) / 127.0
+    return np.round(vectors / scale).astype(np.int8), scale
+
+
+def recall(expected: np.ndarray, actual: np.ndarray | list[list[int]]) -> float:
+    hits = [len(set(e) & set(a)) for e, a in zip(expected, actual)]
+    return float(np.sum(hits) / expected.size)
+
+
+def time_queries(search, queries: np.ndarray) -> np.ndarray:
+    """Time each query individually, returning latencies in milliseconds"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def neo4j_index_benchmark(
+    neo4j_client: Neo4jClient,
+    chunkids: list[str],
+    vectors: np.ndarray,
+    query_ids: np.ndarray,
+    expected: np.ndarray,
+    k: int,
+) -> tuple[float, np.ndarray]:
+    """Write `vectors` to a temporary quantized vector index and measure
+    its recall and query latencies, cleaning everything up afterwards.
+    """
+    dimension = vectors.shape[1]
+    index_name = f"dimension_benchmark_{dimension}"
+    cypher = f"""
+        UNWIND $rows as row
+        MERGE (n:{BENCHMARK_LABEL} {{chunkId: row.chunkid}})
+        WITH n, row
+        CALL db.create.setNodeVectorProperty(n, "embedding", row.embedding)
+    """
+    batch_size = 1000
+    for i in range(0, len(chunkids), batch_size):
+        rows = [
+            {"chunkid": chunkid, "embedding": vector}
+            for chunkid, vector in zip(
+                chunkids[i : i + batch_size], vectors[i : i + batch_size].tolist()
+            )
+        ]
+        neo4j_client._write(cypher, rows=rows)
+    neo4j_client._set_vector_index(
+        index_name=index_name,
+        node=BENCHMARK_LABEL,
+        embedding_dimension=dimension,
+        quantization_enabled=True,
+    )
+    search_cypher = f"""
+        CALL db.index.vector.queryNodes("{index_name}", $k, $embedding)
+        YIELD node, score
+        RETURN node.chunkId as chunkid
+    """
+    chunk_index = {chunkid: i for i, chunkid in enumerate(chunkids)}
+    actual, latencies = [], []
+    try:
+        for query_id in query_ids:
+            start = time.perf_counter()
+            result = neo4j_client._read(
+                search_cypher, k=k + 1, embedding=vectors[query_id].tolist()
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            ids = [chunk_index[c] for c in result["chunkid"] if c in chunk_index]
+            actual.append([i for i in ids if i != query_id][:k])
+    finally:
+        neo4j_client._write(f"DROP INDEX {index_name} IF EXISTS")
+        neo4j_client._write(f"MATCH (n:{BENCHMARK_LABEL}) DETACH DELETE n")
+    return recall(expected, actual), np.array(latencies)
+
+
+def main(k: int, n_queries: int, limit: int | None, neo4j: bool, seed: int) -> None:
+    console = Console()
+    embedder = VaporEmbeddings.from_env()
+    neo4j_client = Neo4jClient.from_env()
+
+    chunks_df = neo4j_client.get_description_chunk_embeddings(limit)
+    if chunks_df.empty:
+        console.print("No embedded description chunks found, run populate first!")
+        return
+    full = np.array(chunks_df["embedding"].tolist(), dtype=np.float32)
+    full = truncate_embeddings(full, full.shape[1])
+    sizes = [
+        size
+        for size in EMBEDDING_PARAMS[embedder.model].get(
+            "truncation_sizes", [full.shape[1]]
+        )
+        if size <= full.shape[1]
+    ]
+    if full.shape[1] < embedder.native_embedding_size:
+        console.print(
+            f"[yellow]Stored embeddings are {full.shape[1]}-d, re-embed with the"
+            + " full dimension for an accurate baseline[/yellow]"
+        )
+
+    rng = np.random.default_rng(seed)
+    query_ids = rng.choice(
+        len(full), size=min(n_queries, len(full) - k - 1), replace=False
+    )
+    expected = exact_top_k(full, full[query_ids], query_ids, k)
+    chunkids = chunks_df["chunkid"].tolist()
+
+    table = Table(title=f"Recall@{k} vs. memory vs. latency ({len(full)} chunks)")
+    for column in [
+        "dim",
+        "float32 MB",
+        "int8 MB",
+        "recall float32",
+        "recall int8",
+        "numpy p50 ms",
+    ]:
+        table.add_column(column, justify="right")
+    if neo4j:
+        for column in ["neo4j recall", "neo4j p50 ms", "neo4j p95 ms"]:
+            table.add_column(column, justify="right")
+
+    for size in sizes:
+        vectors = truncate_embeddings(full, size)
+        queries = vectors[query_ids]
+        exact_recall = recall(expected, exact_top_k(vectors, queries, query_ids, k))
+        quantized, scale = quantize(vectors)
+        dequantized = quantized.astype(np.float32) * scale
+        quantized_recall = recall(
+            expected, exact_top_k(dequantized, queries, query_ids, k)
+        )
+        latencies = time_queries(
+            lambda q: np.argpartition(-(vectors @ q), k)[:k], queries
+        )
+        row = [
+            str(size),
+            f"{vectors.nbytes / 1e6:.1f}",
+            f"{quantized.nbytes / 1e6:.1f}",
+            f"{exact_recall:.3f}",
+            f"{quantized_recall:.3f}",
+            f"{np.percentile(latencies, 50):.3f}",
+        ]
+        if neo4j:
+            index_recall, index_latencies = neo4j_index_benchmark(
+                neo4j_client, chunkids, vectors, query_ids, expected, k
+            )
+            row += [
+                f"{index_recall:.3f}",
+                f"{np.percentile(index_latencies, 50):.2f}",
+                f"{np.percentile(index_latencies, 95):.2f}",
+            ]
+        table.add_row(*row)
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark recall vs. memory vs. latency of embedding dimensions"
+    )
+    parser.add_argument("-k", type=int, default=10, help="Neighbors per query.")
+    parser.add_argument(
+        "-q", "--n-queries", type=int, default=100, help="Number of queries."
+    )
+    parser.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        default=None,
+        help="Limit the amount of chunks loaded from Neo4j. Defaults to all.",
+    )
+    parser.add_argument(
+        "--neo4j",
+        action="store_true",
+        help="Also benchmark a temporary quantized Neo4j vector index per setting.",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    main(args.k, args.n_queries, args.limit, args.neo4j, args.seed)
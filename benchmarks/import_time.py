@@ -0,0 +1,75 @@
+"""Benchmark of the import time of Vapor's entry points and packages.
+
+Each module is imported `-r` times in a fresh interpreter with
+`python -X importtime`, reporting the fastest cumulative import time (the
+least disturbed by other processes) along with the slowest dependencies it
+imports, i.e. the candidates for lazy imports. Unlike the other benchmarks,
+no services need to be running.
+
+Usage:
+    python benchmarks/import_time.py -r 5 -t 5
+"""
+
+import argparse
+
+from rich.console import Console
+from rich.table import Table
+
+from vapor.core.utils import utils
+
+ENTRY_POINTS = [
+    "vapor",
+    "vapor.populate",
+    "vapor.chat",
+    "vapor.app.main",
+    "vapor.core.clients",
+    "vapor.core.clients.neo4jclient",
+    "vapor.core.clients.steamclient",
+    "vapor.core.models.embeddings",
+]
+
+
+def main(modules: list[str], n_repeats: int, n_top: int) -> None:
+    console = Console()
+    table = Table(title=f"Fastest import time of {n_repeats} fresh interpreters")
+    for column in ["module", "import ms", "modules", "slowest dependencies (ms)"]:
+        table.add_column(column, justify="left" if column != "import ms" else "right")
+    # Modules imported on interpreter startup, e.g. "site", are not dependencies
+    startup = utils.import_times("sys").keys()
+    for module in modules:
+        runs = [utils.import_times(module) for _ in range(n_repeats)]
+        times = min(runs, key=lambda times: times[module])
+        # Top-level packages other than the module's own, e.g. "neo4j"
+        package = module.split(".")[0]
+        dependencies = {
+            name: seconds
+            for name, seconds in times.items()
+            if "." not in name and name != package and name not in startup
+        }
+        slowest = sorted(dependencies.items(), key=lambda item: -item[1])[:n_top]
+        table.add_row(
+            module,
+            f"{times[module] * 1000:.0f}",
+            str(len(times.keys() - startup)),
+            ", ".join(f"{name} ({seconds * 1000:.0f})" for name, seconds in slowest),
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the import time of Vapor's entry points"
+    )
+    parser.add_argument(
+        "-m",
+        "--modules",
+        nargs="+",
+        default=ENTRY_POINTS,
+        help="The modules to import, defaults to Vapor's entry points.",
+    )
+    parser.add_argument("-r", "--n-repeats", type=int, default=5)
+    parser.add_argument(
+        "-t", "--n-top", type=int, default=5, help="Slowest dependencies to list."
+    )
+    args = parser.parse_args()
+    main(args.modules, args.n_repeats, args.n_top)
@@ -0,0 +1,74 @@
+"""Benchmark of the per-call overhead of MCP sessions in the chat client.
+
+Calls the `about_the_game` tool of the running app `-r` times back to back,
+as the chat agent does, once with a new MCP session per call (the default of
+`MultiServerMCPClient`) and once over a `PersistentMCPSession`. The same game
+is asked for each time, such that after the first call the result is served
+from the tool result cache and the latency is mostly the session overhead.
+
+Usage:
+    python benchmarks/mcp_session.py -r 50 -g "Portal 2"
+"""
+
+from contextlib import nullcontext
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from vapor.core.utils.mcp_session import PersistentMCPSession
+
+
+async def run(
+    url: str, game_name: str, n_requests: int, persistent: bool
+) -> tuple[np.ndarray, int]:
+    """Call the tool `n_requests` times, returning latencies in milliseconds
+    and the number of sessions opened by the persistent session, if any
+    """
+    connection = {"transport": "http", "url": url}
+    session = PersistentMCPSession("vapor-mcp", connection)
+    client = MultiServerMCPClient(
+        {"vapor-mcp": connection}, tool_interceptors=[session] if persistent else []
+    )
+    tools = {tool.name: tool for tool in await client.get_tools()}
+    about_the_game = tools["about_the_game"]
+    latencies = []
+    async with session if persistent else nullcontext():
+        # Warm up the tool result cache
+        await about_the_game.ainvoke({"name": game_name})
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            await about_the_game.ainvoke({"name": game_name})
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), session.n_sessions
+
+
+def main(url: str, game_name: str, n_requests: int) -> None:
+    console = Console()
+    table = Table(title=f"{n_requests} calls of about_the_game('{game_name}')")
+    for column in ["mode", "p50 ms", "p95 ms", "sessions opened"]:
+        table.add_column(column, justify="right")
+    for persistent in [False, True]:
+        latencies, n_sessions = asyncio.run(run(url, game_name, n_requests, persistent))
+        table.add_row(
+            "persistent" if persistent else "per call",
+            f"{np.percentile(latencies, 50):.1f}",
+            f"{np.percentile(latencies, 95):.1f}",
+            str(n_sessions if persistent else n_requests + 1),
+        )
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the per-call overhead of MCP sessions"
+    )
+    parser.add_argument("-u", "--url", type=str, default="http://localhost:8000/mcp")
+    parser.add_argument("-g", "--game-name", type=str, default="Portal 2")
+    parser.add_argument("-r", "--n-requests", type=int, default=50)
+    args = parser.parse_args()
+    main(args.url, args.game_name, args.n_requests)
@@ -9,7 +9,6 @@ from vapor.core.clients import Neo4jClient, SteamClient
 
 from helpers import globals
 
-
 random.seed(globals.SEED)
 
 
@@ -109,11 +108,19 @@ def mock_embedder(mocker):
     def mock_embed_docs(texts: list[str], *args, **kwargs) -> list[list[float]]:
         return [[0.5] * embedding_size] * len(texts)
 
+    async def mock_aembed_docs(texts: list[str], *args, **kwargs) -> list[list[float]]:
+        return mock_embed_docs(texts)
+
     mocker.patch.object(
         embeddings.VaporEmbeddings,
         "embed_documents",
         side_effect=mock_embed_docs,
     )
+    mocker.patch.object(
+        embeddings.VaporEmbeddings,
+        "aembed_documents",
+        side_effect=mock_aembed_docs,
+    )
 
     return embeddings.VaporEmbeddings(model=model)
 
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from vapor.core.utils.batching import MicroBatcher
+
+
+async def test_micro_batcher():
+    """Tests batching concurrent submissions and fanning out the results"""
+    batches: list[list[str]] = []
+
+    async def process_batch(items: list[str]) -> list[str]:
+        batches.append(items)
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=3, max_wait=0.01)
+    items = ["a", "b", "a", "c", "d"]
+    results = await asyncio.gather(*[batcher.submit(item) for item in items])
+    assert results == ["A", "B", "A", "C", "D"]
+    # Full batch of distinct items is processed immediately, duplicates once
+    assert batches == [["a", "b", "c"], ["d"]]
+    assert batcher.n_batches == 2
+    assert batcher.n_items == 4
+
+    # A single submission is processed after the max wait
+    assert await batcher.submit("e") == "E"
+    assert batches[-1] == ["e"]
+
+    with pytest.raises(ValueError):
+        MicroBatcher(process_batch, max_batch_size=0)
+
+
+async def test_micro_batcher_errors():
+    """Tests propagating batch failures to every waiting caller"""
+
+    async def process_batch(items: list[str]) -> list[str]:
+        if "fail" in items:
+            raise RuntimeError("Failed")
+        # Wrong number of results
+        return items[:-1]
+
+    batcher = MicroBatcher(process_batch, max_batch_size=10)
+    results = await asyncio.gather(
+        batcher.submit("fail"), batcher.submit("ok"), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    results = await asyncio.gather(
+        batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+async def test_micro_batcher_cancelled():
+    """Tests failing every waiting caller if a batch is cancelled"""
+
+    async def process_batch(items: list[str]) -> list[str]:
+        await asyncio.sleep(10.0)
+        return items
+
+    batcher = MicroBatcher(process_batch, max_batch_size=2)
+    calls = asyncio.gather(
+        batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+    )
+    await asyncio.sleep(0.01)
+    # E.g. at shutdown
+    for task in list(batcher._tasks):
+        task.cancel()
+    results = await asyncio.wait_for(calls, timeout=1.0)
+    assert all(isinstance(r, RuntimeError) for r in results)
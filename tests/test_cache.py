@@ -0,0 +1,81 @@
+import time
+
+from vapor.core.utils.cache import LRUCache, VersionedLRUCache, sizeof
+
+
+def test_sizeof():
+    """Tests the approximate size of nested values"""
+    assert sizeof([1.0] * 10) > sizeof([1.0])
+    assert sizeof({"a": [1.0] * 10}) > sizeof([1.0] * 10)
+
+
+def test_lru_cache_eviction():
+    """Tests evicting the least recently used entries by entries and bytes"""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Use "a", such that "b" is the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get("b", "missing") == "missing"
+    assert cache.stats == {
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "entries": 2,
+        "bytes": sizeof(1) + sizeof(3),
+    }
+
+    vector = [0.5] * 100
+    cache = LRUCache(max_bytes=2 * sizeof(vector))
+    for key in range(3):
+        cache.set(key, vector)
+    assert len(cache) == 2
+    assert 0 not in cache
+    assert cache.nbytes <= cache.max_bytes
+    # Values larger than the cache are never cached
+    cache.set("large", [0.5] * 1000)
+    assert "large" not in cache
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_lru_cache_ttl(mocker):
+    """Tests expiring entries after their time to live"""
+    cache = LRUCache(ttl=10.0)
+    now = time.monotonic()
+    mocker.patch("time.monotonic", return_value=now)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    mocker.patch("time.monotonic", return_value=now + 10.0)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats["misses"] == 1
+
+
+def test_versioned_lru_cache(mocker):
+    """Tests clearing the cache when the data version changes"""
+    version = {"value": 1}
+    get_version = mocker.Mock(side_effect=lambda: version["value"])
+    cache = VersionedLRUCache(get_version, version_check_interval=10.0)
+    now = time.monotonic()
+    mocker.patch("time.monotonic", return_value=now)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    # Version is only checked once within the interval
+    version["value"] = 2
+    assert cache.get("a") == 1
+    assert get_version.call_count == 1
+    mocker.patch("time.monotonic", return_value=now + 10.0)
+    assert cache.get("a") is None
+    assert cache.version == 2
+    assert get_version.call_count == 2
+    # Unchanged version keeps the entries
+    cache.set("a", 1)
+    assert not cache.validate(force=True)
+    assert cache.get("a") == 1
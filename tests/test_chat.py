@@ -1,10 +1,18 @@
-from langchain.messages import AIMessage
+from uuid import uuid4
+import json
+
+from rich.table import Table
+from langchain.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
 from langgraph.graph.state import CompiledStateGraph
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
 from vapor.core.clients import Neo4jClient
 from vapor.core.models.llm import VaporLLM
 from vapor.core.models.embeddings import VaporEmbeddings
+from vapor.core.utils import tracing
+from vapor.core.utils.conversations import ConversationStore
+from vapor.core.utils.mcp_session import PersistentMCPSession
 
 from vapor import chat
 
@@ -40,18 +48,31 @@ async def test_handle_chat(mocker, mock_embedder: VaporEmbeddings):
     mocker.patch.object(
         MockCompiledStateGraph,
         "astream",
-        return_value=async_iterator_wrapper([{"messages": [AIMessage("Test Out")]}]),
+        return_value=async_iterator_wrapper(
+            [
+                (
+                    "messages",
+                    (AIMessageChunk("Test", id="0"), {"langgraph_node": "model"}),
+                ),
+                (
+                    "messages",
+                    (AIMessageChunk(" Out", id="0"), {"langgraph_node": "model"}),
+                ),
+                ("values", {"messages": [AIMessage("Test Out")]}),
+            ]
+        ),
     )
     # Run the method
     await chat.handle_chat(agent)
 
 
-async def test_chat(mocker):
+async def test_chat(mocker, tmp_path):
     """Tests the chat entry point with Vapor agent
     NOTE: This tests only the setup and quickly exiting the chat.
     The `handle_chat` method controls the handling of user messages and
     is tested separately to avoid getting stuck in an infinite loop.
     """
+    mocker.patch.dict("os.environ", {"VAPOR_DATA_PATH": str(tmp_path)})
     mocker.patch.object(Neo4jClient, "from_env")
     mocker.patch.object(VaporEmbeddings, "from_env")
     mocker.patch.object(VaporLLM, "from_env")
@@ -60,6 +81,138 @@ async def test_chat(mocker):
         "get_tools",
         return_value=async_iterator_wrapper(["fake tool"]),
     )
+    connect = mocker.patch.object(PersistentMCPSession, "connect")
+    close = mocker.patch.object(PersistentMCPSession, "close")
     mocker.patch("vapor.chat.create_agent", return_value=MockCompiledStateGraph)
     mocker.patch("vapor.chat.handle_chat", side_effect=KeyboardInterrupt)
     await chat.chat()
+    assert (tmp_path / "chat" / "conversations.db").exists()
+    # One MCP session is held open for the whole chat
+    connect.assert_called_once()
+    close.assert_called_once()
+
+
+async def test_handle_chat_history(mocker):
+    """Tests continuing a conversation from the stored history"""
+    mocker.patch("vapor.chat.create_agent", return_value=MockCompiledStateGraph)
+    agent: MockCompiledStateGraph = chat.create_agent(model="foo")
+    store = ConversationStore(":memory:")
+    answers = iter(["First Out", "Second Out"])
+
+    async def astream(state: dict, **kwargs):
+        yield ("values", {"messages": [*state["messages"], AIMessage(next(answers))]})
+
+    astream_spy = mocker.patch.object(
+        MockCompiledStateGraph, "astream", side_effect=astream
+    )
+    mocker.patch("rich.console.Console.input", side_effect=["First In", "Second In"])
+    await chat.handle_chat(agent, store, "test")
+    await chat.handle_chat(agent, store, "test")
+    # The second question is asked along with the first turn
+    messages = astream_spy.call_args.args[0]["messages"]
+    assert [m.content for m in messages] == ["First In", "First Out", "Second In"]
+    assert [m.content for m in store.load("test")] == [
+        "First In",
+        "First Out",
+        "Second In",
+        "Second Out",
+    ]
+    assert store.load("other") == []
+
+
+async def test_handle_chat_streaming(mocker, tmp_path):
+    """Tests rendering the answer token by token and the running tools"""
+    mocker.patch("vapor.chat.create_agent", return_value=MockCompiledStateGraph)
+    agent: MockCompiledStateGraph = chat.create_agent(model="foo")
+    model, tools = {"langgraph_node": "model"}, {"langgraph_node": "tools"}
+    tool_call = {"name": "about_the_game", "args": "{}", "id": "c", "index": 0}
+    events = [
+        ("messages", (AIMessageChunk("", id="0", tool_call_chunks=[tool_call]), model)),
+        ("messages", (ToolMessage("A game", tool_call_id="c"), tools)),
+        (
+            "messages",
+            (AIMessageChunk("Summary", id="s"), {"langgraph_node": "summary"}),
+        ),
+        ("messages", (AIMessageChunk("**Portal**", id="1"), model)),
+        ("messages", (AIMessageChunk(" is fun", id="1"), model)),
+    ]
+    mocker.patch.object(
+        MockCompiledStateGraph,
+        "astream",
+        return_value=async_iterator_wrapper(events),
+    )
+    add_chunk = mocker.spy(chat.ChatView, "add_chunk")
+    finish_tool = mocker.spy(chat.ChatView, "finish_tool")
+    mocker.patch("rich.console.Console.input", return_value="Tell me about Portal")
+    print_spy = mocker.spy(chat.Console, "print")
+    trace_path = tmp_path / "traces.jsonl"
+    await chat.handle_chat(agent, debug=True, trace_path=trace_path)
+    view = add_chunk.call_args.args[0]
+    # Tokens of other model calls, e.g. summaries, are not rendered
+    assert view.answers == {"1": "**Portal** is fun"}
+    assert view.running_tools == {}
+    assert add_chunk.call_count == 3
+    finish_tool.assert_called_once()
+    # The time to first token and trace are printed in debug mode
+    printed = [call.args[1] for call in print_spy.call_args_list]
+    assert "Time to first token" in printed[-2]
+    assert isinstance(printed[-1], Table)
+    # The trace of the turn is written to the trace file
+    (turn,) = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert turn["name"] == "chat.turn"
+    assert turn["attributes"]["time_to_first_token"] >= 0
+
+
+def test_chat_view():
+    """Tests the rendered state of a streamed chat turn"""
+    view = chat.ChatView()
+    tool_call = {"name": "about_the_game", "args": "", "id": "c", "index": 0}
+    view.add_chunk(AIMessageChunk("", id="0", tool_call_chunks=[tool_call]))
+    # Later chunks of the same tool call have no ID or name
+    view.add_chunk(
+        AIMessageChunk("", id="0", tool_call_chunks=[{**tool_call, "id": None}])
+    )
+    assert view.running_tools == {"c": "about_the_game"}
+    assert len(view.__rich__().renderables) == 1
+    view.finish_tool(ToolMessage("A game", tool_call_id="c"))
+    view.add_chunk(AIMessageChunk("Hello", id="1"))
+    view.add_chunk(AIMessageChunk(" world", id="1"))
+    assert view.answers == {"1": "Hello world"}
+    assert view.running_tools == {}
+    assert len(view.__rich__().renderables) == 1
+
+
+def test_tracing_callback_handler():
+    """Tests tracing the LLM calls of a chat turn with their token counts"""
+    answered, failed = uuid4(), uuid4()
+    metadata = {"ls_model_name": "llama", "langgraph_node": "model"}
+    with tracing.trace("chat.turn") as trace:
+        handler = chat.TracingCallbackHandler(trace, tracing.current_span())
+        handler.on_chat_model_start({}, [], run_id=answered, metadata=metadata)
+        message = AIMessage(
+            "Hello",
+            usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+        )
+        handler.on_llm_end(
+            LLMResult(generations=[[ChatGeneration(message=message)]]),
+            run_id=answered,
+        )
+        with tracing.span("tool.about_the_game"):
+            pass
+        handler.on_chat_model_start({}, [], run_id=failed, metadata=metadata)
+        handler.on_llm_error(ValueError("Timed out"), run_id=failed)
+    llm, tool, failed_llm, turn = trace.spans
+    assert llm.name == "llm"
+    assert llm.parent_id == turn.span_id
+    assert llm.attributes == {
+        "model": "llama",
+        "node": "model",
+        "input_tokens": 10,
+        "output_tokens": 2,
+    }
+    assert "Timed out" in failed_llm.attributes["error"]
+
+    # Spans are nested under their parents in the waterfall, as they started
+    table = chat.waterfall(trace)
+    names = list(table.columns[0].cells)
+    assert names == ["chat.turn", "  llm", "  tool.about_the_game", "  llm"]
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from langchain.messages import AIMessage, HumanMessage, ToolMessage
+
+from vapor.core.utils.conversations import ConversationStore
+
+
+def test_conversation_store(tmp_path: Path):
+    """Tests storing and continuing conversations across restarts"""
+    path = tmp_path / "chat" / "conversations.db"
+    store = ConversationStore(path)
+    messages = [
+        HumanMessage("Tell me about Portal", id="0"),
+        AIMessage(
+            "",
+            id="1",
+            tool_calls=[
+                {"name": "about_the_game", "args": {"name": "Portal"}, "id": "c"}
+            ],
+        ),
+        ToolMessage('{"appid": 400}', tool_call_id="c", id="2"),
+        AIMessage("Portal is a puzzle game", id="3"),
+    ]
+    store.save("test", messages)
+    store.save("other", messages[:1])
+    assert store.threads() == ["other", "test"]
+    store.close()
+
+    # Messages, including tool calls and results, survive a restart
+    store = ConversationStore(path)
+    assert store.load("test") == messages
+    assert store.load("new") == []
+    store.clear("other")
+    assert store.threads() == ["test"]
+
+
+def test_conversation_store_trimming():
+    """Tests trimming the loaded history to the most recent tokens"""
+    turns = [
+        [HumanMessage(f"Question {i} " * 10), AIMessage("Answer " * 10)]
+        for i in range(10)
+    ]
+    messages = [message for turn in turns for message in turn]
+    store = ConversationStore(":memory:", max_tokens=100)
+    store.save("test", messages)
+    history = store.load("test")
+    # Only whole recent turns are kept, starting with a question
+    assert 0 < len(history) < len(messages)
+    assert history == messages[-len(history) :]
+    assert isinstance(history[0], HumanMessage)
+    # Without a budget, everything is loaded
+    store.max_tokens = None
+    assert store.load("test") == messages
@@ -1,13 +1,74 @@
+import os
+from pathlib import Path
+
 import pytest
+from fastapi import FastAPI
 
 from vapor.core.clients import Neo4jClient
 from vapor.core.models.embeddings import VaporEmbeddings
-from vapor.app.factory import create_app
+from vapor.app import factory
+from vapor.app.factory import create_app, get_workers, prepare, warmup
 
 
 @pytest.mark.neo4j
-def test_create_app(mocker, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings):
+async def test_create_app(
+    mocker, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
     """Tests the `create_app` start up process for Vapor application layer"""
-    mocker.patch.object(Neo4jClient, "from_env", return_value=neo4j_client)
-    mocker.patch.object(VaporEmbeddings, "pull", return_value=None)
-    create_app()
+    from_env = mocker.patch.object(Neo4jClient, "from_env", return_value=neo4j_client)
+    mocker.patch.object(neo4j_client, "close", return_value=None)
+    pull = mocker.patch.object(VaporEmbeddings, "pull", return_value=None)
+    mocker.patch.dict(os.environ, {"VAPOR_APP_WORKERS": "2"})
+    # Clients are only created once a worker starts
+    app = create_app(prepared=True)
+    from_env.assert_not_called()
+    async with app.router.lifespan_context(app):
+        from_env.assert_called_once_with(n_processes=2)
+        assert app.state.ready is False
+        assert app.state.neo4j_client is neo4j_client
+        assert app.state.games.neo4j_client is neo4j_client
+        mcp_app = next(route.app for route in app.routes if route.path == "/mcp")
+        tools = await mcp_app.state.fastmcp_server.get_tools()
+        assert "find_similar_games" in tools
+    neo4j_client.close.assert_called_once()
+    # Prepared deployments do not pull the model per worker
+    pull.assert_not_called()
+    app = create_app(prepared=False)
+    async with app.router.lifespan_context(app):
+        pull.assert_called_once()
+
+
+def test_get_workers(mocker):
+    """Tests the number of app workers, one per core by default"""
+    mocker.patch.dict(os.environ, {"VAPOR_APP_WORKERS": "3"})
+    assert get_workers() == 3
+    mocker.patch.dict(os.environ, {"VAPOR_APP_WORKERS": "0"})
+    mocker.patch.object(factory.os, "sched_getaffinity", return_value={0, 1})
+    assert get_workers() == 2
+
+
+def test_prepare(mocker, tmp_path: Path):
+    """Tests preparing a deployment once before its workers start"""
+    pull = mocker.patch.object(VaporEmbeddings, "pull", return_value=None)
+    multiproc_dir = tmp_path / "metrics"
+    multiproc_dir.mkdir()
+    (multiproc_dir / "counter_1234.db").touch()
+    mocker.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)})
+    prepare()
+    pull.assert_called_once()
+    assert list(multiproc_dir.iterdir()) == []
+
+
+async def test_warmup(mocker, mock_embedder: VaporEmbeddings):
+    """Tests warming up the dependencies before marking the app ready"""
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    app = FastAPI()
+    await warmup(app, neo4j_client, mock_embedder, [None, None])
+    neo4j_client.warmup_vector_indexes.assert_called_once_with([0.5] * 10)
+    assert app.state.ready is True
+
+    # Failed warmups still mark the app ready
+    neo4j_client.warmup_vector_indexes.side_effect = RuntimeError("Cold")
+    app = FastAPI()
+    await warmup(app, neo4j_client, mock_embedder, [None, None])
+    assert app.state.ready is True
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from vapor.core.utils.limits import (
+    AdmissionController,
+    DeadlineExceeded,
+    Overloaded,
+    current_limits,
+    request_limits,
+    wait_for_deadline,
+)
+
+
+def test_request_limits():
+    """Tests setting and nesting the limits of a request"""
+    # Unbounded outside of any request
+    assert current_limits().deadline is None
+    assert current_limits().remaining() is None
+    assert current_limits().max_rows is None
+
+    with request_limits(timeout=10.0, max_rows=100) as limits:
+        assert current_limits() is limits
+        assert 0 < limits.remaining() <= 10.0
+        # Nested limits can only tighten the enclosing limits
+        with request_limits(timeout=20.0, max_rows=10) as nested:
+            assert nested.deadline == limits.deadline
+            assert nested.max_rows == 10
+        with request_limits(timeout=1.0) as nested:
+            assert nested.deadline < limits.deadline
+            assert nested.max_rows == 100
+        assert current_limits() is limits
+    assert current_limits().deadline is None
+
+    with request_limits(timeout=0.0):
+        with pytest.raises(DeadlineExceeded):
+            current_limits().remaining()
+
+
+async def test_wait_for_deadline():
+    """Tests awaiting within the deadline of a request"""
+
+    async def sleep(seconds: float) -> float:
+        await asyncio.sleep(seconds)
+        return seconds
+
+    # Unbounded outside of any request
+    assert await wait_for_deadline(sleep(0.01)) == 0.01
+    with request_limits(timeout=1.0):
+        assert await wait_for_deadline(sleep(0.01)) == 0.01
+    with request_limits(timeout=0.05):
+        with pytest.raises(DeadlineExceeded):
+            await wait_for_deadline(sleep(1.0))
+        # Past the deadline, fails without awaiting
+        with pytest.raises(DeadlineExceeded):
+            await wait_for_deadline(sleep(0.0))
+
+    # Limits propagate to concurrent tasks of the request
+    async def remaining() -> float | None:
+        return current_limits().remaining()
+
+    with request_limits(timeout=1.0):
+        results = await asyncio.gather(remaining(), asyncio.to_thread(lambda: 1))
+        assert 0 < results[0] <= 1.0
+
+
+async def test_admission_controller():
+    """Tests limiting concurrent requests with a bounded queue"""
+    with pytest.raises(ValueError):
+        AdmissionController("test_admission", max_concurrency=0)
+    controller = AdmissionController("test_admission", max_concurrency=2, max_queue=1)
+    release = asyncio.Event()
+    served = []
+
+    async def request(i: int) -> int:
+        async with controller.admit():
+            served.append(i)
+            await release.wait()
+        return i
+
+    # Two requests are served, one queued, and the rest rejected immediately
+    tasks = [asyncio.create_task(request(i)) for i in range(4)]
+    await asyncio.sleep(0.01)
+    assert served == [0, 1]
+    assert controller.n_active == 2
+    assert controller.n_waiting == 1
+    assert (
+        REGISTRY.get_sample_value("vapor_admission_waiting", {"name": "test_admission"})
+        == 1
+    )
+    with pytest.raises(Overloaded):
+        await tasks[3]
+    assert controller.n_rejected == 1
+
+    # Queued requests time out at their max wait or deadline
+    controller.max_queue = 3
+    with pytest.raises(DeadlineExceeded):
+        async with controller.admit(max_wait=0.01):
+            pass
+    with request_limits(timeout=0.01):
+        with pytest.raises(DeadlineExceeded):
+            async with controller.admit():
+                pass
+
+    # The queued request is served once another is done
+    release.set()
+    assert await asyncio.gather(*tasks[:3]) == [0, 1, 2]
+    assert served == [0, 1, 2]
+    assert controller.n_active == 0
+    assert controller.n_waiting == 0
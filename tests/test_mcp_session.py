@@ -0,0 +1,135 @@
+from contextlib import asynccontextmanager
+import asyncio
+
+import pytest
+from langchain_mcp_adapters.interceptors import MCPToolCallRequest
+from mcp.types import CallToolResult, TextContent
+
+from vapor.core.utils import tracing
+from vapor.core.utils.mcp_session import PersistentMCPSession, trace_tool_call
+
+
+class FakeSession(object):
+    """A fake MCP session, failing its tool calls once `broken`"""
+
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+        self.calls = []
+
+    async def initialize(self):
+        pass
+
+    async def call_tool(self, name: str, args: dict, meta: dict | None = None):
+        if self.broken:
+            raise ConnectionError("Server restarted")
+        self.calls.append((name, meta))
+        return f"{name} result"
+
+
+@pytest.fixture
+def sessions(mocker) -> list[FakeSession]:
+    """The fake sessions opened by `PersistentMCPSession`, in order"""
+    opened = []
+
+    @asynccontextmanager
+    async def create_session(connection):
+        session = FakeSession()
+        opened.append(session)
+        try:
+            yield session
+        finally:
+            session.closed = True
+
+    mocker.patch(
+        "vapor.core.utils.mcp_session.create_session", side_effect=create_session
+    )
+    return opened
+
+
+def tool_call(server_name: str = "vapor-mcp", **kwargs) -> MCPToolCallRequest:
+    return MCPToolCallRequest(
+        name="about_the_game",
+        args={"game_name": "Portal"},
+        server_name=server_name,
+        **kwargs,
+    )
+
+
+async def handler(request: MCPToolCallRequest) -> str:
+    """The default handler, calling the tool with a new session"""
+    return "per-call result"
+
+
+async def test_session_reuse(sessions: list[FakeSession]):
+    """Tests calling tools over a single session"""
+    async with PersistentMCPSession("vapor-mcp", {}) as session:
+        results = await asyncio.gather(
+            *[session(tool_call(), handler) for _ in range(5)]
+        )
+        assert results == ["about_the_game result"] * 5
+        assert session.n_sessions == 1
+        assert len(sessions) == 1
+        assert len(sessions[0].calls) == 5
+        assert not sessions[0].closed
+    assert sessions[0].closed
+
+    # Calls of other servers, or with custom headers, use their own session
+    session = PersistentMCPSession("vapor-mcp", {})
+    assert await session(tool_call("other"), handler) == "per-call result"
+    assert await session(tool_call(headers={"a": "b"}), handler) == "per-call result"
+    assert session.n_sessions == 0
+
+
+async def test_session_reconnect(mocker, sessions: list[FakeSession]):
+    """Tests reconnecting and retrying failed tool calls"""
+    async with PersistentMCPSession("vapor-mcp", {}, max_retries=1) as session:
+        await session(tool_call(), handler)
+        sessions[0].broken = True
+        assert await session(tool_call(), handler) == "about_the_game result"
+        assert session.n_sessions == 2
+        assert sessions[0].closed
+
+        # Fails once out of retries, e.g. the server is down
+        mocker.patch.object(
+            FakeSession, "call_tool", side_effect=ConnectionError("Server down")
+        )
+        with pytest.raises(ConnectionError):
+            await session(tool_call(), handler)
+        assert session.n_sessions == 3
+
+
+async def test_trace_tool_call(sessions: list[FakeSession]):
+    """Tests tracing tool calls, along with their spans on the server"""
+
+    async def server_handler(request: MCPToolCallRequest) -> CallToolResult:
+        traceparent = tracing.current_traceparent()
+        with tracing.trace(f"mcp.{request.name}", traceparent) as server_trace:
+            pass
+        return CallToolResult(
+            content=[TextContent(type="text", text="A game")],
+            _meta={tracing.SPANS: server_trace.to_dicts()},
+        )
+
+    # Untraced outside of a trace
+    result = await trace_tool_call(tool_call(), server_handler)
+    assert result.content[0].text == "A game"
+
+    with tracing.trace("chat.turn") as trace:
+        await trace_tool_call(tool_call(), server_handler)
+    tool, server, turn = trace.spans
+    assert tool.name == "tool.about_the_game"
+    assert tool.parent_id == turn.span_id
+    assert server.name == "mcp.about_the_game"
+    assert server.parent_id == tool.span_id
+
+    # The trace context is passed to the server in the request `_meta`
+    async with PersistentMCPSession("vapor-mcp", {}) as session:
+        await session(tool_call(), handler)
+        with tracing.trace("chat.turn"):
+            await trace_tool_call(tool_call(), lambda r: session(r, handler))
+            traceparent = tracing.current_traceparent()
+    (_, untraced), (_, traced) = sessions[0].calls
+    assert untraced is None
+    trace_id, _ = tracing.parse_traceparent(traced[tracing.TRACEPARENT])
+    assert trace_id == tracing.parse_traceparent(traceparent)[0]
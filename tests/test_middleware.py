@@ -0,0 +1,75 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastmcp import Client, FastMCP
+from httpx import AsyncClient, ASGITransport
+
+from vapor.app import routes
+from vapor.app.middleware import ConcurrencyLimitMiddleware, TracingMiddleware
+from vapor.core.utils import tracing
+from vapor.core.utils.limits import AdmissionController
+
+
+async def test_concurrency_limit_middleware():
+    """Tests rejecting requests beyond the capacity of the app"""
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.post("/work")
+    async def work() -> dict[str, str]:
+        await release.wait()
+        return {"status": "done"}
+
+    app.include_router(routes.status_router)
+    controller = AdmissionController("test_app", max_concurrency=1, max_queue=1)
+    app.add_middleware(ConcurrencyLimitMiddleware, controller=controller, max_wait=1.0)
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        served = asyncio.create_task(client.post("/work"))
+        queued = asyncio.create_task(client.post("/work"))
+        await asyncio.sleep(0.01)
+        # Beyond capacity -> rejected immediately
+        response = await client.post("/work")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        # Excluded paths and methods are always admitted
+        response = await client.get("/status/health")
+        assert response.status_code == 200
+        release.set()
+        for task in [served, queued]:
+            response = await task
+            assert response.status_code == 200
+            assert response.json() == {"status": "done"}
+
+
+async def test_tracing_middleware():
+    """Tests continuing the trace of an MCP tool call on the server"""
+    mcp = FastMCP("test")
+    mcp.add_middleware(TracingMiddleware())
+
+    @mcp.tool
+    async def echo(text: str) -> str:
+        with tracing.span("neo4j.echo", rows=1):
+            return text
+
+    async with Client(mcp) as client:
+        # Untraced calls return no spans
+        result = await client.call_tool("echo", {"text": "hi"})
+        assert result.data == "hi"
+        assert result.meta is None
+
+        with tracing.trace("chat.turn") as trace:
+            result = await client.call_tool(
+                "echo",
+                {"text": "hi"},
+                meta={tracing.TRACEPARENT: tracing.current_traceparent()},
+            )
+            turn = tracing.current_span()
+        spans = result.meta[tracing.SPANS]
+        assert [span["name"] for span in spans] == ["neo4j.echo", "mcp.echo"]
+        assert {span["trace_id"] for span in spans} == {trace.trace_id}
+        assert spans[1]["parent_id"] == turn.span_id
+        assert spans[0]["parent_id"] == spans[1]["span_id"]
+        assert spans[0]["attributes"] == {"rows": 1}
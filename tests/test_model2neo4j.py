@@ -1,7 +1,10 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 from vapor.core.models.embeddings import VaporEmbeddings
 from vapor.core.utils import model2neo4j
+from vapor.core.utils.vector_index import LocalVectorIndex
 from vapor.core.clients import Neo4jClient
 
 
@@ -27,9 +30,10 @@ def test_generate_chunks():
         assert chunk["total_length"] > 0
 
 
+@pytest.mark.parametrize("batch_size", [1, 2, 100])
 @pytest.mark.neo4j
 def test_embed_game_descriptions(
-    mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient
+    mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient, batch_size: int
 ):
     """Tests creating embeddings from game descriptions
     and writing to neo4j database
@@ -53,12 +57,13 @@ def test_embed_game_descriptions(
     model2neo4j.embed_game_descriptions(
         embedder=mock_embedder,
         neo4j_client=neo4j_client,
+        batch_size=batch_size,
     )
 
     # Check embeddings
     cypher = """
         MATCH (g:Game)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
-        RETURN 
+        RETURN
             g.appId as appid,
             c.chunkId as chunk_id,
             c.startIndex as start_index,
@@ -77,3 +82,175 @@ def test_embed_game_descriptions(
             assert row.source == appid
             assert row.total_length > 0
             assert len(row.embedding) == mock_embedder.embedding_size
+
+    # Check pooled game embeddings
+    result = neo4j_client._read(
+        "MATCH (g:Game) RETURN g.appId as appid, g.embedding as embedding"
+    )
+    assert len(result) == len(games)
+    for row in result.itertuples():
+        assert len(row.embedding) == mock_embedder.embedding_size
+        assert np.linalg.norm(row.embedding) == pytest.approx(1.0, abs=1e-4)
+
+
+def test_embed_game_descriptions_dimension_change(
+    mocker, mock_embedder: VaporEmbeddings
+):
+    """Tests dropping vector indexes of another embedding dimension before
+    writing the new embeddings, and recreating them afterwards
+    """
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    neo4j_client.get_game_descriptions.return_value = pd.DataFrame(
+        {"appid": [1000], "about_the_game": ["This is a game description"]}
+    )
+    model2neo4j.embed_game_descriptions(mock_embedder, neo4j_client)
+    calls = [call[0] for call in neo4j_client.method_calls]
+    assert calls.index("drop_changed_vector_indexes") < calls.index(
+        "set_description_chunk_embeddings"
+    )
+    assert calls[-3:-1] == [
+        "set_game_description_vector_index",
+        "set_game_vector_index",
+    ]
+    neo4j_client.drop_changed_vector_indexes.assert_called_once_with(
+        mock_embedder.embedding_size
+    )
+    # The keyword search is set up even if the descriptions predate it
+    neo4j_client.set_game_description_fulltext_index.assert_called_once_with()
+
+
+def test_embed_game_descriptions_graph_version(mocker, mock_embedder: VaporEmbeddings):
+    """Tests invalidating the cached results of the app once the new
+    embeddings are written
+    """
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    neo4j_client.get_game_descriptions.return_value = pd.DataFrame(
+        {"appid": [1000], "about_the_game": ["This is a game description"]}
+    )
+    model2neo4j.embed_game_descriptions(mock_embedder, neo4j_client)
+    calls = [call[0] for call in neo4j_client.method_calls]
+    neo4j_client.bump_graph_version.assert_called_once_with()
+    assert calls.index("bump_graph_version") > calls.index("set_game_embeddings")
+
+
+def test_pool_game_embeddings():
+    """Tests pooling the chunk embeddings of each game"""
+    chunks = [
+        {"source": 1000, "embedding": [1.0, 0.0]},
+        {"source": 1000, "embedding": [0.0, 1.0]},
+        {"source": 1001, "embedding": [0.0, 2.0]},
+    ]
+    games = {
+        g["appid"]: g["embedding"] for g in model2neo4j.pool_game_embeddings(chunks)
+    }
+    assert games[1000] == pytest.approx([np.sqrt(0.5), np.sqrt(0.5)])
+    assert games[1001] == pytest.approx([0.0, 1.0])
+    assert model2neo4j.pool_game_embeddings([]) == []
+
+
+@pytest.mark.neo4j
+def test_export_game_description_index(
+    tmp_path, mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient
+):
+    """Tests exporting the description chunk embeddings to a local vector index"""
+    # Nothing to export yet
+    model2neo4j.export_game_description_index(neo4j_client, tmp_path)
+    assert not LocalVectorIndex(tmp_path).available
+
+    # Embed a game description, then export it
+    appid = 1000
+    cypher = """
+        MERGE (g:Game {appId: $appid})
+        SET g.aboutTheGame = $desc
+    """
+    neo4j_client._write(cypher, appid=appid, desc="This is a game description")
+    model2neo4j.embed_game_descriptions(mock_embedder, neo4j_client)
+    model2neo4j.export_game_description_index(neo4j_client, tmp_path, batch_size=1)
+    vector_index = LocalVectorIndex(tmp_path)
+    assert vector_index.available
+    result = vector_index.search([0.5] * mock_embedder.embedding_size, k=1)
+    assert result.iloc[0]["appid"] == appid
+
+
+@pytest.mark.neo4j
+def test_export_game_index(
+    tmp_path, mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient
+):
+    """Tests exporting the game-level embeddings to a local vector index"""
+    appid = 1000
+    cypher = """
+        MERGE (g:Game {appId: $appid})
+        SET g.aboutTheGame = $desc
+    """
+    neo4j_client._write(cypher, appid=appid, desc="This is a game description")
+    model2neo4j.embed_game_descriptions(mock_embedder, neo4j_client)
+    model2neo4j.export_game_index(neo4j_client, tmp_path)
+    vector_index = LocalVectorIndex(tmp_path)
+    assert vector_index.available
+    result = vector_index.search([0.5] * mock_embedder.embedding_size, k=1)
+    assert result.iloc[0]["appid"] == appid
+
+
+def test_top_k_neighbors():
+    """Tests the blockwise exact top-k neighbors of normalized vectors"""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    k = 5
+    scores = vectors @ vectors.T
+    np.fill_diagonal(scores, -np.inf)
+    expected = np.argsort(-scores, axis=1)[:, :k]
+
+    blocks = list(model2neo4j.top_k_neighbors(vectors, k=k, block_size=16))
+    assert len(blocks) == 4
+    rows = np.concatenate([b[0] for b in blocks])
+    neighbors = np.concatenate([b[1] for b in blocks])
+    neighbor_scores = np.concatenate([b[2] for b in blocks])
+    assert (rows == np.arange(len(vectors))).all()
+    assert (neighbors == expected).all()
+    assert (np.diff(neighbor_scores, axis=1) <= 0).all()
+    # Never more neighbors than other vectors
+    blocks = list(model2neo4j.top_k_neighbors(vectors[:3], k=k))
+    assert blocks[0][1].shape == (3, 2)
+    assert not list(model2neo4j.top_k_neighbors(vectors[:1], k=k))
+
+
+@pytest.mark.neo4j
+def test_set_similar_games(neo4j_client: Neo4jClient):
+    """Tests precomputing `SIMILAR_TO` relationships between games"""
+    games = [
+        {"appid": 1000, "embedding": [1.0, 0.0, 0.0]},
+        {"appid": 1001, "embedding": [0.9, 0.1, 0.0]},
+        {"appid": 1002, "embedding": [0.0, 0.0, 1.0]},
+    ]
+    neo4j_client._write(
+        "UNWIND $games as game MERGE (g:Game {appId: game.appid})", games=games
+    )
+    neo4j_client.set_game_embeddings(games)
+    # Run twice, relationships should be replaced and not duplicated
+    for _ in range(2):
+        model2neo4j.set_similar_games(neo4j_client, k=1, block_size=2)
+    cypher = """
+        MATCH (g:Game)-[r:SIMILAR_TO]->(s:Game)
+        RETURN g.appId as appid, s.appId as similar_appid, r.score as score
+    """
+    result = neo4j_client._read(cypher)
+    assert len(result) == len(games)
+    similar = dict(zip(result["appid"], result["similar_appid"]))
+    assert similar[1000] == 1001
+    assert similar[1001] == 1000
+    assert ((result["score"] >= 0) & (result["score"] <= 1)).all()
+
+
+def test_set_similar_games_graph_version(mocker):
+    """Tests invalidating the cached results of the app once the
+    `SIMILAR_TO` relationships are written
+    """
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    neo4j_client.iter_game_embeddings.return_value = iter(
+        [pd.DataFrame({"appid": [1000, 1001], "embedding": [[1.0, 0.0], [0.0, 1.0]]})]
+    )
+    model2neo4j.set_similar_games(neo4j_client, k=1)
+    calls = [call[0] for call in neo4j_client.method_calls]
+    neo4j_client.bump_graph_version.assert_called_once_with()
+    assert calls[-2:] == ["set_similar_games", "bump_graph_version"]
@@ -1,7 +1,11 @@
 import os
+import asyncio
 
+import numpy as np
 import pytest
+from langchain_ollama import OllamaEmbeddings
 from ollama import ListResponse, ProgressResponse
+from prometheus_client import REGISTRY
 
 from vapor.core.models import embeddings, llm, prompts
 from vapor.core.utils import utils
@@ -15,7 +19,11 @@ def test_embeddings_from_env(mocker, in_docker):
     # Mock this to get behavior of connecting from host or docker
     mocker.patch.object(utils, "in_docker", return_value=in_docker)
     mocker.patch.dict(
-        os.environ, {"OLLAMA_EMBEDDING_MODEL": globals.OLLAMA_EMBEDDING_MODEL}
+        os.environ,
+        {
+            "OLLAMA_EMBEDDING_MODEL": globals.OLLAMA_EMBEDDING_MODEL,
+            "OLLAMA_EMBEDDING_DIMENSION": "0",
+        },
     )
     mocker.patch.dict(
         embeddings.EMBEDDING_PARAMS,
@@ -61,6 +69,137 @@ def test_embeddings_pull(
             assert spy.call_count == 0
 
 
+@pytest.mark.parametrize("output_dimension", [None, 10, 8, 4])
+def test_embeddings_output_dimension(mocker, output_dimension: int | None):
+    """Tests truncating and renormalizing embeddings to the `output_dimension`"""
+    model = globals.OLLAMA_EMBEDDING_MODEL
+    mocker.patch.dict(
+        embeddings.EMBEDDING_PARAMS,
+        {model: {"embedding_size": 10, "truncation_sizes": [10, 8, 4]}},
+    )
+    mocker.patch.object(
+        OllamaEmbeddings,
+        "embed_documents",
+        side_effect=lambda texts: [list(range(1, 11))] * len(texts),
+    )
+    embedder = embeddings.VaporEmbeddings(
+        model=model, output_dimension=output_dimension
+    )
+    expected_size = output_dimension or 10
+    assert embedder.embedding_size == expected_size
+    vectors = embedder.embed_documents(["foo", "bar"])
+    assert len(vectors) == 2
+    for vector in vectors:
+        assert len(vector) == expected_size
+        # Truncated vectors are renormalized to unit length
+        if output_dimension is not None and output_dimension < 10:
+            assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert len(embedder.embed_query("foo")) == expected_size
+
+    # Unsupported dimension should fail on initialization
+    with pytest.raises(ValueError):
+        embeddings.VaporEmbeddings(model=model, output_dimension=5)
+    # Models of unknown embedding size cannot be truncated
+    with pytest.raises(ValueError):
+        embeddings.VaporEmbeddings(model="custom-model", output_dimension=768)
+
+
+async def test_embeddings_query_cache(mocker):
+    """Tests caching query embeddings by model and normalized text"""
+    model = globals.OLLAMA_EMBEDDING_MODEL
+    mocker.patch.dict(embeddings.EMBEDDING_PARAMS, {model: {"embedding_size": 10}})
+    embed = mocker.patch.object(
+        OllamaEmbeddings,
+        "embed_documents",
+        side_effect=lambda texts: [[float(len(text))] * 10 for text in texts],
+    )
+    aembed = mocker.patch.object(
+        OllamaEmbeddings,
+        "aembed_documents",
+        side_effect=lambda texts: [[float(len(text))] * 10 for text in texts],
+    )
+    # Disabled by default
+    embedder = embeddings.VaporEmbeddings(model=model)
+    assert embedder.query_cache_stats is None
+    embedder.embed_query("foo")
+    embedder.embed_query("foo")
+    assert embed.call_count == 2
+
+    embed.reset_mock()
+    embedder = embeddings.VaporEmbeddings(model=model, query_cache_max_bytes=10**6)
+    vector = embedder.embed_query("a game")
+    # Same text up to whitespace is a hit
+    assert embedder.embed_query("  a   game\n") == vector
+    assert embed.call_count == 1
+    # Modifying a returned embedding does not modify the cache
+    vector[0] = -1.0
+    assert embedder.embed_query("a game")[0] == 6.0
+    assert embedder.query_cache_stats["hits"] == 2
+    assert embedder.query_cache_stats["misses"] == 1
+    # Async shares the same cache
+    assert await embedder.aembed_query("a game ") == [6.0] * 10
+    await embedder.aembed_query("another game")
+    assert aembed.call_count == 1
+    assert embedder.query_cache_stats["entries"] == 2
+    # Cached embeddings can be read without a request, and misses are not counted
+    assert embedder.cached_query(" a game") == [6.0] * 10
+    assert embedder.cached_query("yet another game") is None
+    assert embedder.query_cache_stats["misses"] == 2
+    assert embeddings.VaporEmbeddings(model=model).cached_query("a game") is None
+
+
+async def test_embeddings_query_batching(mocker):
+    """Tests micro-batching concurrent query embeddings"""
+    model = globals.OLLAMA_EMBEDDING_MODEL
+    mocker.patch.dict(embeddings.EMBEDDING_PARAMS, {model: {"embedding_size": 10}})
+    aembed = mocker.patch.object(
+        OllamaEmbeddings,
+        "aembed_documents",
+        side_effect=lambda texts: [[float(len(text))] * 10 for text in texts],
+    )
+    embedder = embeddings.VaporEmbeddings(
+        model=model, query_batch_size=4, query_batch_wait=0.01
+    )
+    texts = ["a", "bb", "ccc", "bb", "dddd", "eeeee"]
+    vectors = await asyncio.gather(*[embedder.aembed_query(t) for t in texts])
+    assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+    # Distinct texts in two requests
+    assert aembed.call_count == 2
+    assert [len(call.args[0]) for call in aembed.call_args_list] == [4, 1]
+    # Batch sizes are observed
+    assert (
+        REGISTRY.get_sample_value(
+            "vapor_embedding_batch_size_bucket", {"model": model, "le": "4.0"}
+        )
+        >= 2
+    )
+
+
+async def test_embeddings_query_coalescing(mocker):
+    """Tests sharing a single request among concurrent identical queries"""
+    model = globals.OLLAMA_EMBEDDING_MODEL
+    mocker.patch.dict(embeddings.EMBEDDING_PARAMS, {model: {"embedding_size": 10}})
+
+    async def aembed_documents(texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(0.01)
+        return [[float(len(text))] * 10 for text in texts]
+
+    aembed = mocker.patch.object(
+        OllamaEmbeddings, "aembed_documents", side_effect=aembed_documents
+    )
+    for query_cache_max_bytes in [0, 10**6]:
+        aembed.reset_mock()
+        embedder = embeddings.VaporEmbeddings(
+            model=model, query_cache_max_bytes=query_cache_max_bytes
+        )
+        texts = ["a game", "a  game", "another game"]
+        vectors = await asyncio.gather(*[embedder.aembed_query(t) for t in texts])
+        assert [v[0] for v in vectors] == [6.0, 6.0, 12.0]
+        # Each caller gets its own copy
+        assert vectors[0] is not vectors[1]
+        assert aembed.call_count == 2
+
+
 def test_llm_from_env(mocker):
     """Tests creation of `VaporLLM` object"""
     mocker.patch.dict(
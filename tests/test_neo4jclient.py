@@ -4,10 +4,13 @@ import pytest
 import pandas as pd
 from neo4j import Driver
 from neo4j.exceptions import ServiceUnavailable
+from prometheus_client import REGISTRY
 
-from vapor.core.clients import Neo4jClient
+from vapor.core.clients import Neo4jClient, SearchFilters
+from vapor.core.clients.neo4jclient import VectorIndexConfig, VECTOR_INDEX_PROFILES
 from vapor.core.models.embeddings import VaporEmbeddings
 from vapor.core.utils import utils
+from vapor.core.utils.limits import DeadlineExceeded, request_limits
 
 from helpers import globals
 
@@ -28,7 +31,65 @@ def test_neo4j_from_env(mocker, in_docker: bool):
             "NEO4J_DATABASE": globals.NEO4J_DATABASE,
         },
     )
-    client = Neo4jClient.from_env()
+    Neo4jClient.from_env()
+
+
+@pytest.mark.parametrize("profile", ["cpu", "nvidia-gpu", "unknown"])
+def test_vector_index_config_from_env(mocker, profile: str):
+    """Tests the `VectorIndexConfig` defaults per `RESOURCE_PROFILE`
+    and overriding them with environment variables
+    """
+    env = {
+        "RESOURCE_PROFILE": profile,
+        "NEO4J_VECTOR_HNSW_M": "",
+        "NEO4J_VECTOR_HNSW_EF_CONSTRUCTION": "",
+        "NEO4J_VECTOR_QUANTIZATION": "",
+        "NEO4J_VECTOR_OVERSAMPLING": "",
+    }
+    mocker.patch.dict(os.environ, env)
+    config = VectorIndexConfig.from_env()
+    defaults = VECTOR_INDEX_PROFILES.get(profile, VECTOR_INDEX_PROFILES["cpu"])
+    assert config.hnsw_m == defaults["hnsw_m"]
+    assert config.hnsw_ef_construction == defaults["hnsw_ef_construction"]
+    assert config.quantization_enabled == defaults["quantization_enabled"]
+    assert config.oversampling == defaults["oversampling"]
+
+    # Explicit values take precedence over the profile defaults
+    env.update(
+        {
+            "NEO4J_VECTOR_HNSW_M": "8",
+            "NEO4J_VECTOR_HNSW_EF_CONSTRUCTION": "50",
+            "NEO4J_VECTOR_QUANTIZATION": "false",
+            "NEO4J_VECTOR_OVERSAMPLING": "3",
+        }
+    )
+    mocker.patch.dict(os.environ, env)
+    config = VectorIndexConfig.from_env()
+    assert config.index_options == {
+        "hnsw_m": 8,
+        "hnsw_ef_construction": 50,
+        "quantization_enabled": False,
+    }
+    assert config.oversampling == 3.0
+
+
+def test_connection_pool_size(mocker):
+    """Tests sharing the connection pool size evenly by processes"""
+    mocker.patch.object(Driver, "verify_connectivity", return_value=None)
+    mocker.patch.dict(
+        os.environ,
+        {
+            "NEO4J_USER": globals.NEO4J_USER,
+            "NEO4J_PW": globals.NEO4J_PW,
+            "NEO4J_DATABASE": globals.NEO4J_DATABASE,
+            "NEO4J_MAX_CONNECTION_POOL_SIZE": "100",
+        },
+    )
+    for n_processes, pool_size in [(1, 100), (3, 33), (200, 1)]:
+        client = Neo4jClient.from_env(n_processes=n_processes)
+        pool_config = client.driver._pool.pool_config
+        assert pool_config.max_connection_pool_size == pool_size
+        client.close()
 
 
 def test_connection_failure(mocker):
@@ -46,7 +107,7 @@ def test_connection_failure(mocker):
     )
     # TODO: Could use pytest-time instant sleep
     with pytest.raises(ServiceUnavailable):
-        client = Neo4jClient(
+        Neo4jClient(
             uri="neo4j://test:1234",
             auth=("test", "test"),
             database="neo4j",
@@ -55,6 +116,31 @@ def test_connection_failure(mocker):
         )
 
 
+def test_connection_backoff(mocker):
+    """Tests retrying the connection with exponential backoff"""
+    verify = mocker.patch.object(
+        Driver,
+        "verify_connectivity",
+        side_effect=[ServiceUnavailable] * 5 + [None],
+    )
+    sleep = mocker.patch("vapor.core.clients.neo4jclient.sleep")
+    Neo4jClient(
+        uri="neo4j://test:1234",
+        auth=("test", "test"),
+        database="neo4j",
+        timeout=60,
+        sleep_duration=0.5,
+    )
+    assert verify.call_count == 6
+    assert [call.args[0] for call in sleep.call_args_list] == [
+        0.05,
+        0.1,
+        0.2,
+        0.4,
+        0.5,
+    ]
+
+
 @pytest.mark.neo4j
 def test_io(neo4j_client: Neo4jClient):
     """Tests the `_write` and `_read` method(s) for the `Neo4jClient`"""
@@ -368,7 +454,7 @@ def test_set_game_description_embeddings(neo4j_client: Neo4jClient):
     # Check embeddings ('text' key should not be present)
     cypher = """
         MATCH (g:Game)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
-        RETURN 
+        RETURN
             g.appId as appid,
             c.text as text,
             c.chunkId as chunkid,
@@ -391,14 +477,60 @@ def test_set_game_description_embeddings(neo4j_client: Neo4jClient):
 
 
 @pytest.mark.neo4j
-def test_set_vector_index(neo4j_client: Neo4jClient):
+def test_set_description_chunk_embeddings(neo4j_client: Neo4jClient):
+    """Tests the bulk write of `DescriptionChunk` nodes for many games"""
+    embedding = [0.5] * 20
+    appids = list(range(1000, 1003))
+    chunks = [
+        {
+            "chunkid": f"{appid}-chunk{i}",
+            "source": appid,
+            "start_index": len("text") * i,
+            "total_length": len("text"),
+            "embedding": embedding,
+        }
+        for appid in appids
+        for i in range(2)
+    ]
+    # Add games
+    cypher = """
+        UNWIND $appids as appid
+        MERGE (g:Game {appId: appid})
+    """
+    neo4j_client._write(cypher, appids=appids)
+
+    # Write all chunks at once, then rewrite with a single chunk per game
+    neo4j_client.set_description_chunk_embeddings(chunks)
+    rewritten_chunks = [chunk for chunk in chunks if chunk["chunkid"].endswith("0")]
+    neo4j_client.set_description_chunk_embeddings(rewritten_chunks)
+
+    cypher = """
+        MATCH (g:Game)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+        RETURN g.appId as appid, c.chunkId as chunkid, c.embedding as embedding
+    """
+    result = neo4j_client._read(cypher)
+    assert sorted(result["chunkid"]) == sorted(c["chunkid"] for c in rewritten_chunks)
+    for row in result.itertuples():
+        assert row.chunkid.startswith(str(row.appid))
+        assert len(row.embedding) == len(embedding)
+
+    # Chunks of games listed in `appids` are removed even without new chunks
+    neo4j_client.set_description_chunk_embeddings([], appids=appids)
+    assert neo4j_client._read(cypher).empty
+
+
+@pytest.mark.neo4j
+def test_set_vector_index(mocker, neo4j_client: Neo4jClient):
     """Tests setting a vector index on a node parameter with `Neo4jClient`"""
     neo4j_client._set_vector_index(
         index_name="test",
         node="Test",
         embedding_dimension=10,
+        quantization_enabled=False,
+        hnsw_m=8,
+        hnsw_ef_construction=50,
     )
-    cypher = """SHOW VECTOR INDEXES"""
+    cypher = """SHOW VECTOR INDEXES YIELD *"""
     result = neo4j_client._read(cypher)
     assert len(result) == 1
     row = result.iloc[0]
@@ -406,6 +538,84 @@ def test_set_vector_index(neo4j_client: Neo4jClient):
     assert row.state == "ONLINE"
     assert row.labelsOrTypes == ["Test"]
     assert row.properties == ["embedding"]
+    index_config = row.options["indexConfig"]
+    assert index_config["vector.dimensions"] == 10
+    assert index_config["vector.quantization.enabled"] is False
+    assert index_config["vector.hnsw.m"] == 8
+    assert index_config["vector.hnsw.ef_construction"] == 50
+
+    # Changed options recreate the index
+    neo4j_client._set_vector_index(
+        index_name="test", node="Test", embedding_dimension=10, hnsw_m=32
+    )
+    index_config = neo4j_client._get_vector_index_config("test")
+    assert index_config["vector.quantization.enabled"] is True
+    assert index_config["vector.hnsw.m"] == 32
+    assert index_config["vector.hnsw.ef_construction"] == 100
+
+    # Warming up queries the index
+    spy = mocker.spy(neo4j_client, "_read")
+    neo4j_client.warmup_vector_indexes([0.5] * 10)
+    assert spy.call_args.kwargs == {"index": "test", "embedding": [0.5] * 10}
+
+
+@pytest.mark.neo4j
+def test_set_vector_index_dimension_change(neo4j_client: Neo4jClient):
+    """Tests recreating a vector index of another embedding dimension"""
+
+    def dimensions() -> int | None:
+        config = neo4j_client._get_vector_index_config("game_index")
+        return None if config is None else config["vector.dimensions"]
+
+    neo4j_client.set_game_vector_index(embedding_dimension=10)
+    assert dimensions() == 10
+    # Unchanged indexes are kept
+    neo4j_client.drop_changed_vector_indexes(embedding_dimension=10)
+    assert dimensions() == 10
+    # Changed indexes are dropped before writing, and recreated once set
+    neo4j_client.drop_changed_vector_indexes(embedding_dimension=4)
+    assert dimensions() is None
+    neo4j_client.set_game_vector_index(embedding_dimension=10)
+    neo4j_client.set_game_vector_index(embedding_dimension=4)
+    assert dimensions() == 4
+
+
+def test_drop_changed_vector_index(mocker):
+    """Tests dropping a vector index whose config changed"""
+    mocker.patch.object(Driver, "verify_connectivity", return_value=None)
+    client = Neo4jClient(
+        uri="neo4j://test:1234", auth=("test", "test"), database="neo4j"
+    )
+    options = {"indexConfig": {"vector.dimensions": 768}}
+    mocker.patch.object(
+        Neo4jClient,
+        "_read",
+        side_effect=lambda cypher, index_name=None: (
+            pd.DataFrame({"options": [options]})
+            if index_name == "game_index"
+            else pd.DataFrame(columns=["options"])
+        ),
+    )
+    write = mocker.patch.object(Neo4jClient, "_write")
+    # Missing or unchanged indexes are kept
+    assert not client._drop_changed_vector_index("other", **{"vector.dimensions": 256})
+    assert not client._drop_changed_vector_index(
+        "game_index", **{"vector.dimensions": 768}
+    )
+    write.assert_not_called()
+    assert client._drop_changed_vector_index("game_index", **{"vector.dimensions": 256})
+    assert write.call_args.kwargs == {"index": "game_index"}
+
+    # The tuning options of an index are compared, if reported by the index
+    options["indexConfig"]["vector.hnsw.m"] = 16
+    write.reset_mock()
+    assert not client._drop_changed_vector_index(
+        "game_index",
+        **{"vector.dimensions": 768, "vector.hnsw.m": 16, "vector.hnsw.ef": 100},
+    )
+    client.set_game_vector_index(768, hnsw_m=32)
+    assert write.call_args_list[0].kwargs == {"index": "game_index"}
+    client.close()
 
 
 @pytest.mark.neo4j
@@ -424,6 +634,22 @@ def test_set_game_description_vector_index(neo4j_client: Neo4jClient):
     assert row.properties == ["embedding"]
 
 
+@pytest.mark.neo4j
+def test_set_game_vector_index(neo4j_client: Neo4jClient):
+    """Tests setting the game-level vector index
+    on all `Game` nodes with `embedding` attribute
+    """
+    neo4j_client.set_game_vector_index(embedding_dimension=10)
+    cypher = """SHOW VECTOR INDEXES"""
+    result = neo4j_client._read(cypher)
+    assert len(result) == 1
+    row = result.iloc[0]
+    assert row["name"] == "game_index"
+    assert row.state == "ONLINE"
+    assert row.labelsOrTypes == ["Game"]
+    assert row.properties == ["embedding"]
+
+
 def test_search_game_by_name(neo4j_client: Neo4jClient):
     """Tests searching `neo4j` by game names, which potentially
     are not an exact match to actual application names
@@ -490,14 +716,413 @@ def test_game_descriptions_semantic_search(
     )
 
     # Run semantic search with same embedding, should return same mock chunk
-    result = neo4j_client.game_descriptions_semantic_search(
-        embedding=embedding,
-        n_neighbors=1,
-        min_score=0.0,
+    for oversampling in [None, 2.0]:
+        result = neo4j_client.game_descriptions_semantic_search(
+            embedding=embedding,
+            n_neighbors=1,
+            min_score=0.0,
+            oversampling=oversampling,
+        )
+        assert len(result) == 1
+        row = result.iloc[0]
+        assert row["name"] == name
+        assert row["appid"] == appid
+        assert row["desc"] == about_the_game
+        assert row["score"] > 0
+
+
+@pytest.mark.neo4j
+def test_games_semantic_search(
+    mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient
+):
+    """Tests coarse-to-fine semantic search of games and their descriptions"""
+    neo4j_client.set_game_vector_index(embedding_dimension=mock_embedder.embedding_size)
+    appid = 1000
+    name = "Test"
+    about_the_game = "This is a test game with a long description"
+    neo4j_client._write(
+        "MERGE (g:Game {appId: $appid, name: $name, aboutTheGame: $about_the_game})",
+        appid=appid,
+        name=name,
+        about_the_game=about_the_game,
+    )
+    embedding = mock_embedder.embed_documents([about_the_game])[0]
+    chunks = [
+        {
+            "chunkid": f"{appid}-chunk{i}",
+            "source": appid,
+            "start_index": i * 5,
+            "total_length": 5,
+            "embedding": embedding,
+        }
+        for i in range(4)
+    ]
+    neo4j_client.set_description_chunk_embeddings(chunks, appids=[appid])
+    neo4j_client.set_game_embeddings([{"appid": appid, "embedding": embedding}])
+    result = neo4j_client.iter_game_embeddings(batch_size=10)
+    assert [len(df) for df in result] == [1]
+
+    for oversampling in [None, 2.0]:
+        result = neo4j_client.games_semantic_search(
+            embedding=embedding,
+            n_games=1,
+            n_chunks=2,
+            min_score=0.0,
+            oversampling=oversampling,
+        )
+        # Bounded to n_chunks per game
+        assert len(result) == 2
+        assert (result["appid"] == appid).all()
+        assert (result["name"] == name).all()
+        assert result.iloc[0]["game_score"] > 0
+        assert set(result["desc"]) <= {
+            about_the_game[i * 5 : i * 5 + 5] for i in range(4)
+        }
+
+    # Nothing above the min score
+    result = neo4j_client.games_semantic_search(
+        embedding=embedding, n_games=1, n_chunks=2, min_score=1.1
+    )
+    assert result.empty
+
+    # Batch of queries in a single query, in order of the query embeddings
+    result = neo4j_client.games_semantic_search_batch(
+        embeddings=[embedding, embedding], n_games=1, n_chunks=2, min_score=0.0
+    )
+    assert result["query_index"].tolist() == [0, 0, 1, 1]
+    assert (result["appid"] == appid).all()
+    result = neo4j_client.games_semantic_search_batch(
+        embeddings=[embedding], n_games=1, n_chunks=2, min_score=1.1
     )
-    assert not result.empty
+    assert result.empty
+
+
+@pytest.mark.neo4j
+def test_similar_games(neo4j_client: Neo4jClient):
+    """Tests setting and getting similar games by a fuzzy matched name"""
+    games = [
+        {"appid": 1000, "name": "Test Game"},
+        {"appid": 1001, "name": "Other"},
+        {"appid": 1002, "name": "Another"},
+    ]
+    cypher = """
+        UNWIND $games as game
+        MERGE (g:Game {appId: game.appid, name: game.name})
+    """
+    neo4j_client._write(cypher, games=games)
+    # No similar games yet -> matched game only
+    result = neo4j_client.get_similar_games("test game")
+    assert len(result) == 1
+    assert result.iloc[0]["matched_appid"] == 1000
+    assert result.iloc[0]["appid"] is None
+
+    similar_games = [
+        {"appid": 1000, "similar_appid": 1001, "score": 0.9},
+        {"appid": 1000, "similar_appid": 1002, "score": 0.95},
+    ]
+    neo4j_client.set_similar_games(similar_games, appids=[1000])
+    result = neo4j_client.get_similar_games("test game")
+    assert result["matched_name"].tolist() == ["Test Game"] * 2
+    assert result["appid"].tolist() == [1002, 1001]
+    assert result["score"].tolist() == [0.95, 0.9]
+    result = neo4j_client.get_similar_games("test game", n_games=1)
+    assert result["appid"].tolist() == [1002]
+
+    # Replaces the existing similar games
+    neo4j_client.set_similar_games(similar_games[:1], appids=[1000])
+    result = neo4j_client.get_similar_games("test game")
+    assert result["appid"].tolist() == [1001]
+    # No match
+    assert neo4j_client.get_similar_games("zzzzzzzzzzzz").empty
+
+
+@pytest.mark.neo4j
+def test_set_game_description_fulltext_index(neo4j_client: Neo4jClient):
+    """Tests setting the fulltext index on game names and descriptions,
+    which is removed when clearing the database
+    """
+    neo4j_client.set_game_description_fulltext_index()
+    result = neo4j_client._get_fulltext_indexes()
+    assert len(result) == 1
     row = result.iloc[0]
-    assert row["name"] == name
-    assert row["appid"] == appid
-    assert row["desc"] == about_the_game
-    assert row["score"] > 0
+    assert row["name"] == "game_description_fulltext_index"
+    assert row.state == "ONLINE"
+    assert row.labelsOrTypes == ["Game"]
+    assert row.properties == ["name", "aboutTheGame"]
+    neo4j_client.clear()
+    assert neo4j_client._get_fulltext_indexes().empty
+
+
+@pytest.mark.neo4j
+def test_hybrid_games_search(mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient):
+    """Tests hybrid keyword and semantic search of games"""
+    neo4j_client.set_game_vector_index(embedding_dimension=mock_embedder.embedding_size)
+    neo4j_client.set_game_description_fulltext_index()
+    games = [
+        {"appid": 1000, "name": "Test", "desc": "A roguelike deckbuilder"},
+        {"appid": 1001, "name": "Other", "desc": "A cozy farming game"},
+    ]
+    neo4j_client._write(
+        """
+        UNWIND $games as game
+        MERGE (g:Game {appId: game.appid, name: game.name, aboutTheGame: game.desc})
+        """,
+        games=games,
+    )
+    embeddings = mock_embedder.embed_documents([game["desc"] for game in games])
+    chunks = [
+        {
+            "chunkid": f"{game['appid']}-chunk0",
+            "source": game["appid"],
+            "start_index": 0,
+            "total_length": len(game["desc"]),
+            "embedding": embedding,
+        }
+        for game, embedding in zip(games, embeddings)
+    ]
+    neo4j_client.set_description_chunk_embeddings(
+        chunks, appids=[game["appid"] for game in games]
+    )
+    neo4j_client.set_game_embeddings(
+        [
+            {"appid": game["appid"], "embedding": embedding}
+            for game, embedding in zip(games, embeddings)
+        ]
+    )
+
+    # Query embedding of the second game, keywords of the first
+    for keywords in ["deckbuilder", "deckbuilder (roguelike)"]:
+        result = neo4j_client.hybrid_games_search(
+            embedding=embeddings[1],
+            keywords=keywords,
+            n_games=2,
+            n_chunks=1,
+            min_score=0.0,
+        )
+        assert set(result["appid"]) == {1000, 1001}
+        assert result["game_score"].is_monotonic_decreasing
+        # Fused score of a game ranked first in one ranking
+        assert result["game_score"].max() >= 1.0 / 61
+
+    # Keyword hits without embedded chunks do not take the place of other games
+    neo4j_client._write(
+        """
+        MERGE (g:Game {appId: 1002, name: "Deckbuilder", aboutTheGame: "A deckbuilder"})
+        """
+    )
+    result = neo4j_client.hybrid_games_search(
+        embedding=embeddings[1],
+        keywords="deckbuilder",
+        n_games=2,
+        n_chunks=1,
+        min_score=0.0,
+    )
+    assert set(result["appid"]) == {1000, 1001}
+
+    # Blank keywords fall back to the semantic search
+    result = neo4j_client.hybrid_games_search(
+        embedding=embeddings[1], keywords=" ", n_games=1, n_chunks=1, min_score=0.0
+    )
+    assert len(result) == 1
+    assert result.iloc[0]["score"] == pytest.approx(result.iloc[0]["game_score"])
+
+    # Keyword only search, without any embedding
+    result = neo4j_client.fulltext_games_search("cozy farming", n_games=2, n_chunks=1)
+    assert result["appid"].tolist() == [1001]
+    assert result.iloc[0]["desc"] == "A cozy farming game"
+    assert neo4j_client.fulltext_games_search(" ", n_games=2, n_chunks=1).empty
+
+
+def test_search_filters():
+    """Tests the `SearchFilters` properties and validation"""
+    assert not SearchFilters().active
+    assert not SearchFilters(genre_ids=[]).active
+    assert SearchFilters(exclude_owned=True).active
+    assert not SearchFilters(exclude_owned=True).prefilter
+    assert SearchFilters(friend_hops=2).prefilter
+    assert SearchFilters(genre_ids=[1]).prefilter
+    with pytest.raises(ValueError):
+        SearchFilters(friend_hops=0)
+    with pytest.raises(ValueError):
+        SearchFilters(exclude_owned=True, max_owned_candidates=-1)
+
+
+@pytest.mark.neo4j
+def test_filtered_semantic_search(
+    mock_embedder: VaporEmbeddings, neo4j_client: Neo4jClient
+):
+    """Tests semantic searches restricted with `SearchFilters`"""
+    neo4j_client.set_game_description_vector_index(
+        embedding_dimension=mock_embedder.embedding_size
+    )
+    neo4j_client.set_game_vector_index(embedding_dimension=mock_embedder.embedding_size)
+    # Primary user owns 1000, a friend owns 1001, a friend of a friend owns 1002,
+    # and nobody owns 1003
+    cypher = """
+        MERGE (p:User:Primary {steamId: "0"})
+        MERGE (f1:User {steamId: "1"})
+        MERGE (f2:User {steamId: "2"})
+        MERGE (p)-[:HAS_FRIEND]->(f1)
+        MERGE (f1)-[:HAS_FRIEND]->(f2)
+        WITH p, f1, f2
+        UNWIND range(1000, 1003) as appid
+        MERGE (g:Game {appId: appid, name: toString(appid)})
+        SET g.aboutTheGame = "A game description " + toString(appid)
+        WITH p, f1, f2
+        MATCH (g0:Game {appId: 1000}), (g1:Game {appId: 1001}), (g2:Game {appId: 1002})
+        MERGE (p)-[:OWNS_GAME]->(g0)
+        MERGE (f1)-[:OWNS_GAME]->(g1)
+        MERGE (f2)-[:OWNS_GAME]->(g2)
+    """
+    neo4j_client._write(cypher)
+    appids = list(range(1000, 1004))
+    embeddings = mock_embedder.embed_documents([str(appid) for appid in appids])
+    chunks = [
+        {
+            "chunkid": f"{appid}-chunk0",
+            "source": appid,
+            "start_index": 0,
+            "total_length": 6,
+            "embedding": embedding,
+        }
+        for appid, embedding in zip(appids, embeddings)
+    ]
+    neo4j_client.set_description_chunk_embeddings(chunks)
+    neo4j_client.set_game_embeddings(
+        [{"appid": c["source"], "embedding": c["embedding"]} for c in chunks]
+    )
+    genres = {1000: 1, 1001: 1, 1002: 2, 1003: 1}
+    for appid, genre_id in genres.items():
+        neo4j_client.add_game_genres(
+            appid, [{"id": genre_id, "description": f"Genre {genre_id}"}]
+        )
+    assert sorted(neo4j_client.get_genre_ids(["genre 1", "Genre 2"])) == [1, 2]
+
+    query = mock_embedder.embed_query("1003")
+    expected = [
+        (SearchFilters(friend_hops=1), {1001}),
+        (SearchFilters(friend_hops=2), {1001, 1002}),
+        (SearchFilters(genre_ids=[1]), {1000, 1001, 1003}),
+        (SearchFilters(genre_ids=[1], exclude_owned=True), {1001, 1003}),
+        (SearchFilters(friend_hops=2, genre_ids=[2]), {1002}),
+        (SearchFilters(exclude_owned=True), {1001, 1002, 1003}),
+    ]
+    for filters, expected_appids in expected:
+        result = neo4j_client.games_semantic_search(
+            embedding=query, n_games=10, n_chunks=1, min_score=0.0, filters=filters
+        )
+        assert set(result["appid"]) == expected_appids, filters
+        assert result["game_score"].is_monotonic_decreasing
+
+    # Top-k stays exact size with the filters applied
+    result = neo4j_client.games_semantic_search(
+        embedding=query,
+        n_games=2,
+        n_chunks=1,
+        min_score=0.0,
+        filters=SearchFilters(exclude_owned=True),
+    )
+    assert len(result) == 2
+
+
+@pytest.mark.neo4j
+def test_read_request_limits(neo4j_client: Neo4jClient):
+    """Tests the deadline and row cap of reads within request limits"""
+    cypher = "UNWIND range(1, 10) as i RETURN i"
+    assert len(neo4j_client._read(cypher)) == 10
+    # Metrics are labeled by the calling method
+    labels = {"method": "test_read_request_limits"}
+    assert REGISTRY.get_sample_value("vapor_neo4j_query_rows_sum", labels) == 10
+    with request_limits(timeout=10.0, max_rows=3):
+        result = neo4j_client._read(cypher)
+        assert result["i"].tolist() == [1, 2, 3]
+    # Deadline passed -> fails without querying
+    with request_limits(timeout=0.0):
+        with pytest.raises(DeadlineExceeded):
+            neo4j_client._read(cypher)
+    # Deadline passed during the query -> transaction times out
+    with request_limits(timeout=0.5):
+        with pytest.raises(DeadlineExceeded):
+            neo4j_client._read("CALL apoc.util.sleep(5000) RETURN 1 as i")
+
+
+@pytest.mark.neo4j
+def test_graph_version(neo4j_client: Neo4jClient):
+    """Tests bumping the version of the graph data"""
+    assert neo4j_client.get_graph_version() == 0
+    neo4j_client.bump_graph_version()
+    neo4j_client.bump_graph_version()
+    assert neo4j_client.get_graph_version() == 2
+    neo4j_client.clear()
+    assert neo4j_client.get_graph_version() == 0
+
+
+@pytest.mark.neo4j
+def test_get_game_description_by_name(neo4j_client: Neo4jClient):
+    """Tests getting the best matched game and its description in one query"""
+    search_name = "test game"
+    # No games present, should return empty
+    assert neo4j_client.get_game_description_by_name(search_name).empty
+
+    cypher = """
+        MERGE (g:Game {appId: $appid, name: $name})
+        SET g.aboutTheGame = $description
+    """
+    neo4j_client._write(cypher, appid=1000, name="Test Game II", description=None)
+    result = neo4j_client.get_game_description_by_name(search_name)
+    assert len(result) == 1
+    assert result.iloc[0]["name"] == "Test Game II"
+    assert result.iloc[0]["about_the_game"] is None
+
+    # A better match is ranked first, only the best match is returned
+    neo4j_client._write(cypher, appid=1001, name="Test Game", description="A game")
+    result = neo4j_client.get_game_description_by_name(search_name)
+    assert len(result) == 1
+    assert result.iloc[0]["appid"] == 1001
+    assert result.iloc[0]["name"] == "Test Game"
+    assert result.iloc[0]["about_the_game"] == "A game"
+    # No description chunks embedded
+    assert result.iloc[0]["chunks"] == []
+
+
+@pytest.mark.neo4j
+def test_get_game_descriptions_by_names(neo4j_client: Neo4jClient):
+    """Tests getting the best matched games of several names in one query"""
+    names = ["test game", "xyz", "other"]
+    assert neo4j_client.get_game_descriptions_by_names(names).empty
+
+    cypher = """
+        MERGE (g:Game {appId: $appid, name: $name})
+        SET g.aboutTheGame = $description
+    """
+    neo4j_client._write(cypher, appid=1000, name="Test Game II", description=None)
+    neo4j_client._write(cypher, appid=1001, name="Test Game", description="A game")
+    neo4j_client._write(cypher, appid=1002, name="Other", description="Another")
+    result = neo4j_client.get_game_descriptions_by_names(names)
+    # Only matched names have a row, with the best match of each
+    assert result["query_index"].tolist() == [0, 2]
+    assert result["appid"].tolist() == [1001, 1002]
+    assert result["about_the_game"].tolist() == ["A game", "Another"]
+    assert result["chunks"].tolist() == [[], []]
+
+
+def test_game_descriptions_cypher(mocker):
+    """Tests building the queries of the game description lookups, which are
+    otherwise only run against Neo4j
+    """
+    mocker.patch.object(Driver, "verify_connectivity", return_value=None)
+    client = Neo4jClient(
+        uri="neo4j://test:1234", auth=("test", "test"), database="neo4j"
+    )
+    read = mocker.patch.object(Neo4jClient, "_read", return_value=pd.DataFrame())
+    client.get_game_description_by_name("test game")
+    client.get_game_descriptions_by_names(["test game", "other"])
+    assert read.call_args_list[0].kwargs == {"name": "test game"}
+    assert read.call_args_list[1].kwargs == {"names": ["test game", "other"]}
+    for call in read.call_args_list:
+        cypher = call.args[0]
+        # Both queries rank the description chunks of the matched game
+        assert "COLLECT {" in cypher
+        assert "{0}" not in cypher and "{{" not in cypher
+    assert "CALL {" in read.call_args_list[1].args[0]
+    client.close()
@@ -174,6 +174,9 @@ def test_populate(
         )
         assert not _expected_steamids - result_steamids
 
+    # Populating games and descriptions each bumped the graph version
+    assert neo4j_client.get_graph_version() == 2
+
     # Verify the expected games relationships
     all_users = neo4j_client.get_all_users()
     owned_games_cypher = """
@@ -233,7 +236,7 @@ def test_populate(
     # Verify embeddings
     cypher = """
         MATCH (g:Game)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
-        RETURN 
+        RETURN
             g.appId as appid,
             c.chunkId as chunk_id,
             c.startIndex as start_index,
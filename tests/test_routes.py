@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from httpx import AsyncClient, ASGITransport
 
 from vapor.app import routes
+from vapor.core.utils import metrics
 
 
 ### Status routes ###
@@ -17,3 +18,66 @@ async def test_health_check():
 
     assert response.json() == {"status": "alive"}
     assert response.status_code == 200
+
+
+async def test_readiness_check():
+    """Tests the /status/ready endpoint"""
+    app = FastAPI()
+    app.include_router(routes.status_router)
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        response = await client.get("/status/ready")
+        assert response.json() == {"status": "starting"}
+        assert response.status_code == 503
+        app.state.ready = True
+        response = await client.get("/status/ready")
+        assert response.json() == {"status": "ready"}
+        assert response.status_code == 200
+
+
+### Metrics routes ###
+async def test_metrics():
+    """Tests the /metrics endpoint"""
+    metrics.TOOL_DURATION.labels("test_tool").observe(0.01)
+    metrics.register_cache(
+        "test_cache",
+        lambda: {"hits": 3, "misses": 1, "evictions": 0, "entries": 1, "bytes": 8},
+    )
+    metrics.register_cache("disabled_cache", lambda: None)
+    app = FastAPI()
+    app.include_router(routes.metrics_router)
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'vapor_tool_duration_seconds_count{tool="test_tool"}' in response.text
+    assert 'vapor_cache_hits_total{cache="test_cache"} 3.0' in response.text
+    assert "disabled_cache" not in response.text
+
+
+async def test_metrics_multiprocess(mocker, tmp_path):
+    """Tests the /metrics endpoint aggregating the metrics of all workers"""
+    metrics.TOOL_DURATION.labels("test_tool").observe(0.01)
+    metrics.register_cache(
+        "test_cache",
+        lambda: {"hits": 3, "misses": 1, "evictions": 0, "entries": 1, "bytes": 8},
+    )
+    mocker.patch.dict("os.environ", {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)})
+    app = FastAPI()
+    app.include_router(routes.metrics_router)
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    # Only the metrics written by workers to the directory, and the caches
+    assert "vapor_tool_duration_seconds" not in response.text
+    assert 'vapor_cache_hits_total{cache="test_cache"} 3.0' in response.text
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from vapor.core.utils.singleflight import SingleFlight
+
+
+async def test_singleflight():
+    """Tests coalescing identical concurrent calls"""
+    flight = SingleFlight("test_singleflight")
+    calls = []
+
+    async def call(key: str) -> list[str]:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return [key]
+
+    results = await asyncio.gather(
+        *[flight.do(key, lambda key=key: call(key)) for key in ["a", "b", "a", "a"]]
+    )
+    assert [result for result, _ in results] == [["a"], ["b"], ["a"], ["a"]]
+    assert [shared for _, shared in results] == [False, False, True, True]
+    # The shared result is the same object
+    assert results[0][0] is results[2][0]
+    assert calls == ["a", "b"]
+    assert flight.n_coalesced == 2
+    assert (
+        REGISTRY.get_sample_value(
+            "vapor_coalesced_calls_total", {"name": "test_singleflight"}
+        )
+        == 2
+    )
+    # Nothing in flight anymore, calls run again
+    assert len(flight) == 0
+    assert await flight.do("a", lambda: call("a")) == (["a"], False)
+    assert calls == ["a", "b", "a"]
+
+
+async def test_singleflight_errors_and_cancellation():
+    """Tests sharing errors and surviving cancelled callers"""
+    flight = SingleFlight("test_singleflight_errors")
+
+    async def fail() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError("Failed")
+
+    results = await asyncio.gather(
+        flight.do("a", fail), flight.do("a", fail), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def slow() -> str:
+        await asyncio.sleep(0.05)
+        return "done"
+
+    # Cancelling the first caller does not cancel the shared call
+    first = asyncio.create_task(flight.do("b", slow))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.do("b", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == ("done", True)
@@ -1,9 +1,17 @@
+import time
+import asyncio
+import threading
+
 import pytest
 import pandas as pd
 from fastmcp import FastMCP
+from prometheus_client import REGISTRY
 
 from vapor.core.clients import Neo4jClient
 from vapor.core.models.embeddings import VaporEmbeddings
+from vapor.core.utils.vector_index import LocalVectorIndex
+from vapor.core.utils.cache import VersionedLRUCache
+from vapor.core.utils.limits import DeadlineExceeded, current_limits
 from vapor.app import mcp
 
 
@@ -43,6 +51,140 @@ async def test_about_the_game(
     assert result == {"matched_game": actual_name, "about_the_game": description}
 
 
+@pytest.mark.neo4j
+async def test_about_the_game_cache(
+    mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
+    """Tests caching `about_the_game` results until the graph version changes"""
+    result_cache = VersionedLRUCache(
+        get_version=neo4j_client.get_graph_version,
+        version_check_interval=0.0,
+        max_entries=10,
+    )
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+        result_cache=result_cache,
+    )
+    cypher = """
+        MERGE (g:Game {appId: 1000, name: "Test Game"})
+        SET g.aboutTheGame = $description
+    """
+    neo4j_client._write(cypher, description="Old description")
+    expected = {"matched_game": "Test Game", "about_the_game": "Old description"}
+    assert await game_tools.about_the_game("test game") == expected
+
+    # Repeat lookups (up to case and whitespace) are served from the cache
+    spy = mocker.spy(neo4j_client, "get_game_description_by_name")
+    neo4j_client._write(cypher, description="New description")
+    result = await game_tools.about_the_game("  Test   GAME ")
+    assert result == expected
+    assert spy.call_count == 0
+    # Modifying a returned result does not modify the cache
+    result["about_the_game"] = "foo"
+    assert await game_tools.about_the_game("test game") == expected
+
+    # Populating bumps the graph version, invalidating the cache
+    neo4j_client.bump_graph_version()
+    result = await game_tools.about_the_game("test game")
+    assert result["about_the_game"] == "New description"
+    assert spy.call_count == 1
+
+
+@pytest.mark.neo4j
+async def test_about_the_game_output_budget(
+    mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
+    """Tests reducing `about_the_game` descriptions to the output budget"""
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+        max_output_chars=30,
+    )
+    description = "First part. Second part. Third part. Fourth part."
+    match = {"appid": 1000, "name": "Test", "about_the_game": description}
+    # Description chunk spans, most representative first
+    chunks = [[37, 12], [0, 11], [12, 12], [25, 11]]
+    mocker.patch.object(
+        neo4j_client,
+        "get_game_description_by_name",
+        return_value=pd.DataFrame([{**match, "chunks": chunks}]),
+    )
+    result = await game_tools.about_the_game("test")
+    assert result == {
+        "matched_game": "Test",
+        "about_the_game": "First part. ... Fourth part.",
+        "truncated": True,
+    }
+    # Without chunks, the description is truncated
+    mocker.patch.object(
+        neo4j_client,
+        "get_game_description_by_name",
+        return_value=pd.DataFrame([{**match, "chunks": []}]),
+    )
+    result = await game_tools.about_the_game("test")
+    assert result["about_the_game"] == "First part. Second part. Third"
+    assert result["truncated"]
+
+    # Batch results share the budget
+    mocker.patch.object(
+        neo4j_client,
+        "get_game_descriptions_by_names",
+        return_value=pd.DataFrame(
+            [
+                {**match, "query_index": 0, "chunks": chunks},
+                {**match, "query_index": 1, "about_the_game": "Short"},
+            ]
+        ),
+    )
+    result = await game_tools.about_the_games(["test", "other"])
+    assert result == [
+        {"matched_game": "Test", "about_the_game": "Fourth part.", "truncated": True},
+        {"matched_game": "Test", "about_the_game": "Short"},
+    ]
+
+
+@pytest.mark.neo4j
+async def test_about_the_games(
+    mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
+    """Tests the batch `about_the_games` tool for vapor agents"""
+    result_cache = VersionedLRUCache(
+        get_version=neo4j_client.get_graph_version, max_entries=10
+    )
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+        result_cache=result_cache,
+    )
+    assert await game_tools.about_the_games([]) == []
+
+    cypher = """
+        MERGE (g:Game {appId: $appid, name: $name})
+        SET g.aboutTheGame = $description
+    """
+    neo4j_client._write(cypher, appid=1000, name="Test Game", description="A game")
+    neo4j_client._write(cypher, appid=1001, name="Other", description=None)
+    spy = mocker.spy(neo4j_client, "get_game_descriptions_by_names")
+    names = ["test game", "xyz", "other"]
+    expected = [
+        {"matched_game": "Test Game", "about_the_game": "A game"},
+        {},
+        {"matched_game": "Other"},
+    ]
+    # Responses in order of the names, resolved in a single query
+    assert await game_tools.about_the_games(names) == expected
+    assert spy.call_count == 1
+    # Cached names are not looked up again
+    assert await game_tools.about_the_game("Test Game") == expected[0]
+    assert await game_tools.about_the_games(["foo", "Other"]) == [{}, expected[2]]
+    assert spy.call_count == 2
+    assert spy.call_args.args[0] == ["foo"]
+
+
 @pytest.mark.neo4j
 async def test_find_similar_games(
     mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
@@ -57,25 +199,423 @@ async def test_find_similar_games(
     # Test empty result
     mocker.patch.object(
         neo4j_client,
-        "game_descriptions_semantic_search",
+        "games_semantic_search",
         return_value=pd.DataFrame([{}]),
     )
     result = await game_tools.find_similar_games(query)
     assert result == []
 
     # Mock the neo4j client function for return similar games
-    mock_result = {"name": "Test", "appid": 1000, "desc": "A test game"}
+    mock_results = [
+        {"name": "Test", "appid": 1000, "desc": "A test game"},
+        {"name": "Another", "appid": 1001, "desc": "Another test game"},
+        {"name": "Test", "appid": 1000, "desc": "More of a test game"},
+    ]
     mocker.patch.object(
         neo4j_client,
-        "game_descriptions_semantic_search",
-        return_value=pd.DataFrame([mock_result]),
+        "games_semantic_search",
+        return_value=pd.DataFrame(mock_results),
     )
     result = await game_tools.find_similar_games(query)
+    # Games stay in order of similarity
     expected_result = [
         {
-            "name": mock_result["name"],
-            "appid": mock_result["appid"],
-            "description_chunks": [mock_result["desc"]],
-        }
+            "name": "Test",
+            "appid": 1000,
+            "description_chunks": ["A test game", "More of a test game"],
+        },
+        {
+            "name": "Another",
+            "appid": 1001,
+            "description_chunks": ["Another test game"],
+        },
     ]
     assert result == expected_result
+
+    # With keywords, runs the hybrid search instead
+    hybrid_search = mocker.patch.object(
+        neo4j_client,
+        "hybrid_games_search",
+        return_value=pd.DataFrame(mock_results[:1]),
+    )
+    result = await game_tools.find_similar_games(query, keywords="test")
+    assert result == [
+        {"name": "Test", "appid": 1000, "description_chunks": ["A test game"]}
+    ]
+    assert hybrid_search.call_args.kwargs["keywords"] == "test"
+
+    # With filters, runs the filtered search
+    mocker.patch.object(neo4j_client, "get_genre_ids", return_value=[1])
+    filtered_search = mocker.patch.object(
+        neo4j_client,
+        "games_semantic_search",
+        return_value=pd.DataFrame(mock_results[1:2]),
+    )
+    result = await game_tools.find_similar_games(
+        query, friend_hops=2, genres=["Action"], exclude_owned=True
+    )
+    assert result == [
+        {"name": "Another", "appid": 1001, "description_chunks": ["Another test game"]}
+    ]
+    filters = filtered_search.call_args.kwargs["filters"]
+    assert filters.friend_hops == 2
+    assert filters.genre_ids == [1]
+    assert filters.exclude_owned
+
+    # Less similar chunks are left out to fit the output budget
+    game_tools.max_output_chars = 40
+    mocker.patch.object(
+        neo4j_client,
+        "games_semantic_search",
+        return_value=pd.DataFrame(mock_results),
+    )
+    result = await game_tools.find_similar_games(query)
+    assert result == [
+        {
+            "name": "Test",
+            "appid": 1000,
+            "description_chunks": ["A test game"],
+            "truncated": True,
+        },
+        {
+            "name": "Another",
+            "appid": 1001,
+            "description_chunks": ["Another test game"],
+        },
+    ]
+    game_tools.max_output_chars = None
+    # Unknown genres match nothing
+    mocker.patch.object(neo4j_client, "get_genre_ids", return_value=[])
+    assert await game_tools.find_similar_games(query, genres=["Foo"]) == []
+
+
+@pytest.mark.neo4j
+async def test_find_similar_games_local_index(
+    mocker,
+    tmp_path,
+    mock_mcp: FastMCP,
+    neo4j_client: Neo4jClient,
+    mock_embedder: VaporEmbeddings,
+):
+    """Tests `find_similar_games` tool with the local vector indexes"""
+    vector_index = LocalVectorIndex(tmp_path.joinpath("game_descriptions"))
+    game_vector_index = LocalVectorIndex(tmp_path.joinpath("games"))
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+        vector_index=vector_index,
+        game_vector_index=game_vector_index,
+    )
+    query = "A test game"
+    appid = 1000
+    name = "Test"
+    about_the_game = "A test game description"
+    cypher = """
+        MERGE (g:Game {appId: $appid, name: $name, aboutTheGame: $about_the_game})
+    """
+    neo4j_client._write(cypher, appid=appid, name=name, about_the_game=about_the_game)
+
+    # No exported indexes yet -> falls back to the Neo4j vector indexes
+    mocker.patch.object(
+        neo4j_client,
+        "games_semantic_search",
+        return_value=pd.DataFrame([{}]),
+    )
+    assert await game_tools.find_similar_games(query) == []
+
+    # Export the indexes, which should be hot-swapped in and searched locally
+    embedding = mock_embedder.embed_query(query)
+    LocalVectorIndex.write(
+        vector_index.path,
+        [embedding] * 4,
+        {
+            "appid": [appid] * 4,
+            "start_index": [0, 2, 7, 12],
+            "total_length": [6, 4, 4, 11],
+        },
+    )
+    LocalVectorIndex.write(game_vector_index.path, [embedding], {"appid": [appid]})
+    vector_index.refresh(force=True)
+    game_vector_index.refresh(force=True)
+    result = await game_tools.find_similar_games(query)
+    assert len(result) == 1
+    assert result[0]["name"] == name
+    assert result[0]["appid"] == appid
+    # At most 3 chunks per game
+    assert len(result[0]["description_chunks"]) == 3
+
+
+@pytest.mark.neo4j
+async def test_find_games_similar_to(
+    mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
+    """Tests the `find_games_similar_to` tool for vapor agents"""
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+    )
+    # Test no matched game
+    mocker.patch.object(neo4j_client, "get_similar_games", return_value=pd.DataFrame())
+    assert await game_tools.find_games_similar_to("test") == {}
+
+    # Matched game without similar games
+    matched = {"matched_appid": 1000, "matched_name": "Test"}
+    mocker.patch.object(
+        neo4j_client,
+        "get_similar_games",
+        return_value=pd.DataFrame(
+            [{**matched, "appid": None, "name": None, "score": None}]
+        ),
+    )
+    result = await game_tools.find_games_similar_to("test")
+    assert result == {"matched_game": "Test", "similar_games": []}
+
+    # Matched game with similar games
+    mocker.patch.object(
+        neo4j_client,
+        "get_similar_games",
+        return_value=pd.DataFrame(
+            [
+                {**matched, "appid": 1001, "name": "Other", "score": 0.9},
+                {**matched, "appid": 1002, "name": "Another", "score": 0.8},
+            ]
+        ),
+    )
+    result = await game_tools.find_games_similar_to("test")
+    assert result == {
+        "matched_game": "Test",
+        "similar_games": [
+            {"name": "Other", "appid": 1001, "score": 0.9},
+            {"name": "Another", "appid": 1002, "score": 0.8},
+        ],
+    }
+
+
+@pytest.mark.neo4j
+async def test_find_similar_games_batch(
+    mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
+    """Tests the batch `find_similar_games_batch` tool for vapor agents"""
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+    )
+    assert await game_tools.find_similar_games_batch([]) == []
+
+    queries = ["A test game", "Another test game", "A game"]
+    mocker.patch.object(
+        neo4j_client, "games_semantic_search_batch", return_value=pd.DataFrame()
+    )
+    assert await game_tools.find_similar_games_batch(queries) == [[], [], []]
+
+    mock_results = [
+        {"query_index": 0, "name": "Test", "appid": 1000, "desc": "A test game"},
+        {"query_index": 0, "name": "Test", "appid": 1000, "desc": "More of a test"},
+        {"query_index": 2, "name": "Another", "appid": 1001, "desc": "Another game"},
+        {"query_index": 2, "name": "Test", "appid": 1000, "desc": "A test game"},
+    ]
+    search = mocker.patch.object(
+        neo4j_client,
+        "games_semantic_search_batch",
+        return_value=pd.DataFrame(mock_results),
+    )
+    result = await game_tools.find_similar_games_batch(queries)
+    assert result == [
+        [
+            {
+                "name": "Test",
+                "appid": 1000,
+                "description_chunks": ["A test game", "More of a test"],
+            }
+        ],
+        [],
+        [
+            {"name": "Another", "appid": 1001, "description_chunks": ["Another game"]},
+            {"name": "Test", "appid": 1000, "description_chunks": ["A test game"]},
+        ],
+    ]
+    # All descriptions embedded and searched at once
+    assert mock_embedder.aembed_documents.call_count == 2
+    assert mock_embedder.aembed_documents.call_args.args[0] == queries
+    assert len(search.call_args.kwargs["embeddings"]) == len(queries)
+
+
+@pytest.mark.neo4j
+async def test_tool_deadline(
+    mocker, mock_mcp: FastMCP, neo4j_client: Neo4jClient, mock_embedder: VaporEmbeddings
+):
+    """Tests tools returning quickly when their deadline is missed"""
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+        result_cache=VersionedLRUCache(get_version=lambda: 0, max_entries=10),
+        timeout=0.05,
+        max_rows=100,
+    )
+
+    # Limits are propagated to the Neo4j client
+    def get_game_description_by_name(name: str) -> pd.DataFrame:
+        assert 0 < current_limits().remaining() <= 0.05
+        assert current_limits().max_rows == 100
+        return pd.DataFrame([{"appid": 1000, "name": "Test", "about_the_game": "A"}])
+
+    mocker.patch.object(
+        neo4j_client,
+        "get_game_description_by_name",
+        side_effect=get_game_description_by_name,
+    )
+    expected = {"matched_game": "Test", "about_the_game": "A"}
+    assert await game_tools.about_the_game("test") == expected
+
+    # Timed out lookups are reported, cached responses are still returned
+    for method in ["get_game_descriptions_by_names", "get_similar_games"]:
+        mocker.patch.object(
+            neo4j_client, method, side_effect=DeadlineExceeded("Query timed out")
+        )
+    assert await game_tools.about_the_games(["test", "other"]) == [
+        expected,
+        {"timed_out": True},
+    ]
+    assert await game_tools.find_games_similar_to("test") == {"timed_out": True}
+
+    # A slow embedding request is cancelled at the deadline
+    async def slow_aembed_query(text: str) -> list[float]:
+        await asyncio.sleep(1.0)
+        return [0.5] * 10
+
+    mocker.patch.object(VaporEmbeddings, "aembed_query", side_effect=slow_aembed_query)
+    timeouts = REGISTRY.get_sample_value(
+        "vapor_tool_calls_total", {"tool": "find_similar_games", "outcome": "timeout"}
+    )
+    start = time.perf_counter()
+    assert await game_tools.find_similar_games("A test game") == []
+    assert time.perf_counter() - start < 0.5
+    # Tool calls are counted by outcome
+    assert (
+        REGISTRY.get_sample_value(
+            "vapor_tool_calls_total",
+            {"tool": "find_similar_games", "outcome": "timeout"},
+        )
+        == (timeouts or 0) + 1
+    )
+
+
+async def test_tool_coalescing(
+    mocker, mock_mcp: FastMCP, mock_embedder: VaporEmbeddings
+):
+    """Tests identical concurrent tool calls sharing a single execution"""
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+    )
+    release = threading.Event()
+
+    def get_similar_games(name: str, n_games: int) -> pd.DataFrame:
+        # Blocks its worker thread until all calls are in flight
+        assert release.wait(timeout=5.0)
+        return pd.DataFrame(
+            [{"matched_name": name, "appid": 1001, "name": "Other", "score": 0.9}]
+        )
+
+    neo4j_client.get_similar_games.side_effect = get_similar_games
+    names = ["Test", "Test", "Other", "Test"]
+    calls = asyncio.gather(*[game_tools.find_games_similar_to(name) for name in names])
+    # The blocked lookups do not block the event loop of the other callers
+    while neo4j_client.get_similar_games.call_count < 2:
+        await asyncio.sleep(0.001)
+    release.set()
+    results = await calls
+    assert [result["matched_game"] for result in results] == names
+    assert neo4j_client.get_similar_games.call_count == 2
+    # Every caller gets its own copy of the shared result
+    assert results[0] == results[1]
+    assert results[0] is not results[1]
+
+
+async def test_tool_admission(
+    mocker, mock_mcp: FastMCP, mock_embedder: VaporEmbeddings
+):
+    """Tests rejecting or degrading tool calls beyond capacity"""
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=mock_embedder,
+        max_concurrency=1,
+        embedding_max_concurrency=1,
+    )
+    release = threading.Event()
+
+    def blocked_get_similar_games(name: str, n_games: int) -> pd.DataFrame:
+        assert release.wait(timeout=5.0)
+        return pd.DataFrame()
+
+    # The same tool at capacity with a blocking Neo4j query -> rejected
+    neo4j_client.get_similar_games.side_effect = blocked_get_similar_games
+    blocked = asyncio.create_task(game_tools.find_games_similar_to("Test"))
+    while not neo4j_client.get_similar_games.called:
+        await asyncio.sleep(0.001)
+    assert await game_tools.find_games_similar_to("Other") == {"timed_out": True}
+    release.set()
+    assert await blocked == {}
+    assert neo4j_client.get_similar_games.call_count == 1
+
+    embedding_release = asyncio.Event()
+
+    async def blocked_aembed_query(text: str) -> list[float]:
+        await embedding_release.wait()
+        return [0.5] * 10
+
+    mocker.patch.object(
+        VaporEmbeddings, "aembed_query", side_effect=blocked_aembed_query
+    )
+    neo4j_client.games_semantic_search.return_value = pd.DataFrame()
+    neo4j_client.fulltext_games_search.return_value = pd.DataFrame(
+        [{"name": "Test", "appid": 1000, "desc": "A game"}]
+    )
+    blocked = asyncio.create_task(game_tools.find_similar_games("A test game"))
+    await asyncio.sleep(0.01)
+    assert await game_tools.find_similar_games("Another game") == []
+    # The embedding model at capacity -> batch calls are rejected, not degraded
+    assert await game_tools.find_similar_games_batch(["Another game"]) == [[]]
+    neo4j_client.fulltext_games_search.assert_not_called()
+    # ... and single calls are degraded to fulltext search
+    game_tools.max_concurrency = None
+    result = await game_tools.find_similar_games("Another game", keywords="test")
+    assert result == [{"name": "Test", "appid": 1000, "description_chunks": ["A game"]}]
+    neo4j_client.fulltext_games_search.assert_called_once()
+    assert neo4j_client.fulltext_games_search.call_args.args[0] == "test"
+    embedding_release.set()
+    assert await blocked == []
+
+
+async def test_cached_embedding_admission(
+    mocker, mock_mcp: FastMCP, mock_embedder: VaporEmbeddings
+):
+    """Tests serving cached query embeddings without embedding admission"""
+    neo4j_client = mocker.MagicMock(spec=Neo4jClient)
+    neo4j_client.games_semantic_search.return_value = pd.DataFrame()
+    neo4j_client.fulltext_games_search.return_value = pd.DataFrame()
+    embedder = VaporEmbeddings(model=mock_embedder.model, query_cache_max_bytes=10**6)
+    game_tools = mcp.GamesTools(
+        mcp_instance=mock_mcp,
+        neo4j_client=neo4j_client,
+        embedder=embedder,
+        embedding_max_concurrency=1,
+    )
+    await game_tools.find_similar_games("A test game")
+    neo4j_client.games_semantic_search.assert_called_once()
+
+    # The embedding model at capacity -> only uncached queries are degraded
+    async with game_tools.embedding_admission.admit():
+        await game_tools.find_similar_games("  A test  game")
+        assert neo4j_client.games_semantic_search.call_count == 2
+        neo4j_client.fulltext_games_search.assert_not_called()
+        await game_tools.find_similar_games("Another game")
+        neo4j_client.fulltext_games_search.assert_called_once()
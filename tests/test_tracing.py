@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+from vapor.core.utils import tracing
+
+
+def test_trace():
+    """Tests recording nested spans of a trace"""
+    # Nothing is recorded outside of a trace
+    with tracing.span("neo4j.get_game") as span:
+        assert span is None
+    assert tracing.current_span() is None
+    assert tracing.current_traceparent() is None
+
+    with tracing.trace("chat.turn", thread_id="test") as trace:
+        turn = tracing.current_span()
+        assert tracing.current_trace() is trace
+        with tracing.span("tool.about_the_game") as tool:
+            assert tool.parent_id == turn.span_id
+            with tracing.span("neo4j.get_game", rows=1) as query:
+                assert tracing.current_span() is query
+        with pytest.raises(ValueError):
+            with tracing.span("embedding"):
+                raise ValueError("Ollama is down")
+    assert tracing.current_span() is None
+
+    # Spans are recorded once they end
+    assert [span.name for span in trace.spans] == [
+        "neo4j.get_game",
+        "tool.about_the_game",
+        "embedding",
+        "chat.turn",
+    ]
+    assert {span.trace_id for span in trace.spans} == {trace.trace_id}
+    assert query.parent_id == tool.span_id
+    assert turn.parent_id is None
+    assert turn.attributes == {"thread_id": "test"}
+    assert query.attributes == {"rows": 1}
+    assert "Ollama is down" in trace.spans[2].attributes["error"]
+    assert turn.duration >= tool.duration >= query.duration >= 0
+
+
+def test_traceparent():
+    """Tests continuing a trace from a W3C traceparent"""
+    with tracing.trace("chat.turn") as client_trace:
+        traceparent = tracing.current_traceparent()
+        parent = tracing.current_span()
+    assert traceparent == f"00-{client_trace.trace_id}-{parent.span_id}-01"
+    assert tracing.parse_traceparent(traceparent) == (
+        client_trace.trace_id,
+        parent.span_id,
+    )
+
+    with tracing.trace("mcp.about_the_game", traceparent) as server_trace:
+        pass
+    assert server_trace.trace_id == client_trace.trace_id
+    assert server_trace.spans[0].parent_id == parent.span_id
+    # The spans of the server are merged into the trace of the client
+    client_trace.extend(server_trace.to_dicts())
+    assert client_trace.spans[-1] == server_trace.spans[0]
+
+    # An invalid traceparent starts a new trace
+    assert tracing.parse_traceparent("00-abc-def-01") is None
+    with tracing.trace("mcp.about_the_game", "00-abc-def-01") as new_trace:
+        pass
+    assert new_trace.trace_id != client_trace.trace_id
+    assert new_trace.spans[0].parent_id is None
+
+
+async def test_trace_propagation():
+    """Tests recording spans of concurrent tasks and threads of a trace"""
+
+    async def query(name: str) -> None:
+        with tracing.span(name):
+            await asyncio.sleep(0.01)
+
+    def embed() -> None:
+        with tracing.span("embedding"):
+            pass
+
+    with tracing.trace("mcp.find_similar_games") as trace:
+        await asyncio.gather(query("neo4j.a"), query("neo4j.b"))
+        await asyncio.to_thread(embed)
+    root = trace.spans[-1]
+    assert sorted(span.name for span in trace.spans[:-1]) == [
+        "embedding",
+        "neo4j.a",
+        "neo4j.b",
+    ]
+    assert all(span.parent_id == root.span_id for span in trace.spans[:-1])
+
+
+def test_write_trace(tmp_path):
+    """Tests appending the spans of traces to a JSONL file"""
+    path = tmp_path / "chat" / "traces.jsonl"
+    for _ in range(2):
+        with tracing.trace("chat.turn") as trace:
+            with tracing.span("llm", input_tokens=10):
+                pass
+        trace.write(path)
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["llm", "chat.turn"] * 2
+    assert spans[-1] == trace.spans[-1].to_dict()
+    assert spans[0]["trace_id"] != spans[-1]["trace_id"]
+    assert spans[0]["attributes"] == {"input_tokens": 10}
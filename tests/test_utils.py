@@ -35,6 +35,74 @@ def test_get_env_var(mocker):
     assert test_var == "foo"
 
 
+@pytest.mark.parametrize(
+    "value,expected",
+    [("true", True), ("1", True), (" Yes ", True), ("false", False), ("0", False)],
+)
+def test_str_to_bool(value: str, expected: bool):
+    """Tests converting strings to booleans"""
+    assert utils.str_to_bool(value) == expected
+    with pytest.raises(ValueError):
+        utils.str_to_bool("foo")
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("roguelike deckbuilder", "roguelike deckbuilder"),
+        ("co-op (online)", "co\\-op \\(online\\)"),
+        ('"Half-Life" AND  portal', '\\"Half\\-Life\\" and portal'),
+        ("what? a:b", "what\\? a\\:b"),
+        ("  ", ""),
+    ],
+)
+def test_escape_lucene_query(text: str, expected: str):
+    """Tests escaping free text for fulltext index queries"""
+    assert utils.escape_lucene_query(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text,max_chars,expected",
+    [
+        ("a short text", 20, "a short text"),
+        ("a short text", 9, "a short"),
+        ("a short text", 7, "a short"),
+        ("abcdefgh", 4, "abcd"),
+    ],
+)
+def test_truncate_text(text: str, max_chars: int, expected: str):
+    """Tests truncating text at a word boundary"""
+    assert utils.truncate_text(text, max_chars) == expected
+
+
+def test_select_excerpts():
+    """Tests selecting the most relevant excerpts of a text within a budget"""
+    text = "First part. Second part. Third part. Fourth part."
+    # (start_index, length) of each part, most relevant first
+    spans = [(37, 12), (0, 11), (12, 12), (25, 11)]
+    assert utils.select_excerpts(text, spans, 100) == text
+    assert utils.select_excerpts(text, spans, 30) == "First part. ... Fourth part."
+    assert utils.select_excerpts(text, spans, 12) == "Fourth part."
+    # Adjacent or overlapping spans are merged
+    assert (
+        utils.select_excerpts(text, [(0, 12), (10, 14)], 30)
+        == "First part. Second part."
+    )
+    # No span fits, or no spans at all
+    assert utils.select_excerpts(text, spans, 10) == "First"
+    assert utils.select_excerpts(text, [], 24) == "First part. Second part."
+
+
+def test_select_chunks():
+    """Tests selecting the most relevant chunks within a budget"""
+    chunks = ["most relevant", "a much less relevant chunk", "relevant"]
+    assert utils.select_chunks(chunks, 100) == chunks
+    assert utils.select_chunks(chunks, 25) == ["most relevant", "relevant"]
+    assert utils.select_chunks(chunks, 10) == ["relevant"]
+    assert utils.select_chunks(chunks, 5) == ["most"]
+    assert utils.select_chunks([], 5) == []
+
+
 def test_set_env():
     """Tests setting environment variables from mapping"""
     # Create dummy mapping and set
@@ -48,3 +116,21 @@ def test_set_env():
 def test_in_docker():
     """Tests in_docker method with `/.dockerenv` existence check"""
     assert utils.in_docker() == Path("/.dockerenv").exists()
+
+
+# Import time budgets in seconds, with headroom for slow machines, and heavy
+# dependencies which must not be imported by the light entry points
+IMPORT_TIME_BUDGETS = {
+    "vapor": 0.5,
+    "vapor.populate": 0.5,
+    "vapor.core.clients": 0.5,
+}
+HEAVY_IMPORTS = ["neo4j", "pandas", "langchain_ollama", "steam_web_api", "html2text"]
+
+
+@pytest.mark.parametrize("module,budget", IMPORT_TIME_BUDGETS.items())
+def test_import_times(module: str, budget: float):
+    """Tests the import time of light entry points, see `benchmarks/import_time.py`"""
+    times = utils.import_times(module)
+    assert times[module] < budget
+    assert not [name for name in HEAVY_IMPORTS if name in times]
@@ -0,0 +1,146 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from vapor.core.utils.vector_index import LocalVectorIndex
+
+
+def make_index_data(n: int = 20, dimension: int = 8) -> tuple[np.ndarray, dict]:
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((n, dimension))
+    columns = {
+        "appid": np.arange(1000, 1000 + n),
+        "start_index": np.zeros(n, dtype=np.int64),
+        "total_length": np.full(n, 10),
+    }
+    return vectors, columns
+
+
+def test_vector_index_from_env(mocker, tmp_path: Path):
+    """Tests enabling the `LocalVectorIndex` from env vars"""
+    mocker.patch.dict(os.environ, {"VAPOR_LOCAL_VECTOR_INDEX": "none"})
+    assert LocalVectorIndex.from_env() is None
+    mocker.patch.dict(
+        os.environ,
+        {"VAPOR_LOCAL_VECTOR_INDEX": "exact", "VAPOR_DATA_PATH": str(tmp_path)},
+    )
+    vector_index = LocalVectorIndex.from_env()
+    assert vector_index.backend == "exact"
+    assert vector_index.path == tmp_path.joinpath("vector_index", "game_descriptions")
+    # Indexes only searched with filters are always searched exactly
+    mocker.patch.dict(os.environ, {"VAPOR_LOCAL_VECTOR_INDEX": "hnsw"})
+    assert LocalVectorIndex.from_env("games").backend == "hnsw"
+    assert LocalVectorIndex.from_env(exact=True).backend == "exact"
+    # Nothing exported yet
+    assert not vector_index.available
+    assert vector_index.search([1.0] * 8, k=5).empty
+
+    with pytest.raises(ValueError):
+        LocalVectorIndex(tmp_path, backend="foo")
+
+
+@pytest.mark.parametrize("backend", ["exact", "hnsw"])
+def test_vector_index_search(tmp_path: Path, backend: str):
+    """Tests writing and searching the `LocalVectorIndex`"""
+    if backend == "hnsw":
+        pytest.importorskip("hnswlib")
+    vectors, columns = make_index_data()
+    LocalVectorIndex.write(tmp_path, vectors, columns, hnsw=backend == "hnsw")
+    vector_index = LocalVectorIndex(tmp_path, backend=backend)
+    assert vector_index.available
+
+    k = 5
+    result = vector_index.search(vectors[3].tolist(), k=k)
+    assert len(result) == k
+    assert set(result.columns) == {*columns, "score"}
+    # Query vector is its own best match
+    assert result.iloc[0]["appid"] == columns["appid"][3]
+    assert np.isclose(result.iloc[0]["score"], 1.0)
+    assert result["score"].is_monotonic_decreasing
+    # Requesting more neighbors than items returns all items
+    assert len(vector_index.search(vectors[0].tolist(), k=100)) == len(vectors)
+
+
+@pytest.mark.parametrize("backend", ["exact", "hnsw"])
+def test_vector_index_search_filters(tmp_path: Path, backend: str):
+    """Tests searching the `LocalVectorIndex` restricted to filtered items"""
+    if backend == "hnsw":
+        pytest.importorskip("hnswlib")
+    vectors, columns = make_index_data()
+    LocalVectorIndex.write(tmp_path, vectors, columns, hnsw=backend == "hnsw")
+    vector_index = LocalVectorIndex(tmp_path, backend=backend)
+
+    appids = [1001, 1005, 1010]
+    result = vector_index.search(vectors[5].tolist(), filters={"appid": appids})
+    assert set(result["appid"]) == set(appids)
+    assert result.iloc[0]["appid"] == 1005
+    assert result["score"].is_monotonic_decreasing
+    result = vector_index.search(vectors[5].tolist(), k=1, filters={"appid": appids})
+    assert result["appid"].tolist() == [1005]
+    # No matching items
+    assert vector_index.search(vectors[5].tolist(), filters={"appid": [0]}).empty
+
+    # Several items per filtered value, e.g. the description chunks of a game
+    columns["appid"] = np.repeat([1000, 1001, 1002, 1003], 5)
+    LocalVectorIndex.write(tmp_path, vectors, columns, hnsw=backend == "hnsw")
+    assert vector_index.refresh(force=True)
+    result = vector_index.search(
+        vectors[0].tolist(), filters={"appid": [1003, 1001, 1001, 9999]}
+    )
+    assert result["appid"].value_counts().to_dict() == {1001: 5, 1003: 5}
+    result = vector_index.search(
+        vectors[7].tolist(), filters={"appid": [1001], "start_index": [0]}
+    )
+    assert result.iloc[0]["appid"] == 1001
+    assert np.isclose(result.iloc[0]["score"], 1.0)
+
+
+def test_vector_index_hnsw_load(mocker, tmp_path: Path):
+    """Tests loading the HNSW graph written with the `LocalVectorIndex`,
+    rather than building it when loading a version
+    """
+    pytest.importorskip("hnswlib")
+    vectors, columns = make_index_data()
+    LocalVectorIndex.write(tmp_path, vectors, columns, hnsw=True)
+    build_hnsw = mocker.spy(LocalVectorIndex, "_build_hnsw")
+    vector_index = LocalVectorIndex(tmp_path, backend="hnsw")
+    assert vector_index.available
+    assert vector_index._hnsw is not None
+    build_hnsw.assert_not_called()
+
+    # Versions without a graph are searched exactly
+    new_version = LocalVectorIndex.write(tmp_path, vectors, columns)
+    assert vector_index.refresh(force=True)
+    assert vector_index.version == new_version
+    assert vector_index._hnsw is None
+    build_hnsw.assert_not_called()
+    result = vector_index.search(vectors[3].tolist(), k=1)
+    assert result["appid"].tolist() == [columns["appid"][3]]
+
+
+def test_vector_index_refresh(tmp_path: Path):
+    """Tests hot-swapping to newly written versions of the `LocalVectorIndex`"""
+    vectors, columns = make_index_data()
+    first_version = LocalVectorIndex.write(tmp_path, vectors, columns)
+    vector_index = LocalVectorIndex(tmp_path, refresh_interval=3600)
+    assert vector_index.available
+    assert vector_index.version == first_version
+
+    # Write a new version, which is only loaded after the refresh interval
+    new_vectors, new_columns = make_index_data(n=5)
+    new_version = LocalVectorIndex.write(tmp_path, new_vectors, new_columns)
+    assert not vector_index.refresh()
+    assert vector_index.version == first_version
+    assert vector_index.refresh(force=True)
+    assert vector_index.version == new_version
+    assert len(vector_index.search(new_vectors[0].tolist(), k=100)) == 5
+
+    # Only the latest versions are kept
+    LocalVectorIndex.write(tmp_path, vectors, columns, keep_versions=1)
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 1
+
+    # Mismatched column lengths are rejected
+    with pytest.raises(ValueError):
+        LocalVectorIndex.write(tmp_path, vectors, new_columns)
@@ -0,0 +1,20 @@
+"""Serve the Vapor app with `VAPOR_APP_WORKERS` worker processes,
+preparing the deployment once before the workers start.
+"""
+
+import os
+
+import uvicorn
+
+from vapor.app.factory import get_workers, prepare
+
+if __name__ == "__main__":  # pragma: nocover
+    prepare()
+    # NOTE: The workers inherit the environment, and skip preparing themselves
+    os.environ["VAPOR_APP_PREPARED"] = "true"
+    uvicorn.run(
+        "vapor.app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=get_workers(),
+    )
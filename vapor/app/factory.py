@@ -1,39 +1,217 @@
+from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from pathlib import Path
+import asyncio
+import os
+import time
+
 from loguru import logger
 from fastmcp import FastMCP
 from fastapi import FastAPI
+from prometheus_client import multiprocess
 
 from vapor.core.clients import Neo4jClient
 from vapor.core.models.embeddings import VaporEmbeddings
+from vapor.core.utils import utils, metrics
+from vapor.core.utils.vector_index import LocalVectorIndex
+from vapor.core.utils.cache import VersionedLRUCache
+from vapor.core.utils.limits import AdmissionController
 from vapor.app import mcp, routes
+from vapor.app.middleware import ConcurrencyLimitMiddleware, TracingMiddleware
 
 
-def create_app() -> FastAPI:
-    """Creates the Vapor `FastAPI` application with mounted `FastMCP` server"""
-    logger.info("Initializing Vapor services >>>")
+def get_workers() -> int:
+    """The number of app worker processes, by default one per available core"""
+    # NOTE: 0 indicates one worker per core available to the process
+    workers = int(utils.get_env_var("VAPOR_APP_WORKERS", "1"))
+    if workers > 0:
+        return workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def prepare() -> None:
+    """Run the one-off setup of a deployment before its app workers start,
+    rather than once per worker, e.g. pulling the embedding model.
+    """
+    logger.info("Preparing Vapor deployment >>>")
+    VaporEmbeddings.from_env().pull()
+    # Remove the metrics of the worker processes of a previous deployment
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        Path(multiproc_dir).mkdir(parents=True, exist_ok=True)
+        for path in Path(multiproc_dir).glob("*.db"):
+            path.unlink()
+
 
-    ### Setup dependencies ###
-    logger.info("Setting up Neo4jClient...")
-    neo4j_client = Neo4jClient.from_env()
+def _setup_embedder(prepared: bool) -> VaporEmbeddings:
     logger.info("Setting up Embedding Model...")
     embedder = VaporEmbeddings.from_env()
-    embedder.pull()
+    if not prepared:
+        embedder.pull()
+    return embedder
+
+
+def _load_vector_indexes() -> list[LocalVectorIndex | None]:
+    indexes = [
+        # NOTE: Description chunks are only searched with filters, i.e. exactly
+        LocalVectorIndex.from_env("game_descriptions", exact=True),
+        LocalVectorIndex.from_env("games"),
+    ]
+    for index in indexes:
+        if index is None:
+            continue
+        logger.info(f"Loading local vector index @ {index.path}...")
+        if not index.available:
+            logger.warning(
+                f"No exported vector index found @ {index.path},"
+                + " using the Neo4j vector indexes until one is exported"
+            )
+    return indexes
+
+
+async def warmup(
+    app: FastAPI,
+    neo4j_client: Neo4jClient,
+    embedder: VaporEmbeddings,
+    vector_indexes: list[LocalVectorIndex | None],
+) -> None:
+    """Load the embedding model and vector indexes ahead of the first tool
+    call with a dummy search, then mark the `app` as ready. Failures are
+    logged, leaving the first tool calls to pay for a cold start instead.
+    """
+    logger.info("Warming up Vapor services...")
+    start = time.perf_counter()
+    try:
+        embedding = (await embedder.aembed_documents(["warmup"]))[0]
+        await asyncio.to_thread(neo4j_client.warmup_vector_indexes, embedding)
+        for index in vector_indexes:
+            if index is not None and index.available:
+                await asyncio.to_thread(index.search, embedding, k=1)
+    except Exception as e:
+        logger.warning(f"Warmup failed, starting cold: {e}")
+    else:
+        logger.success(f"Warmed up in {time.perf_counter() - start:.2f}s")
+    app.state.ready = True
+
+
+def create_app(prepared: bool | None = None) -> FastAPI:
+    """Creates the Vapor `FastAPI` application with mounted `FastMCP` server.
+
+    The clients of the tools are created by each worker process once it
+    starts, in the lifespan of the app, such that the app can be imported
+    cheaply by any number of workers.
+
+    Args:
+        prepared (bool | None, optional): Whether `prepare()` already ran for
+            the deployment, otherwise each worker prepares itself on start.
+            If None, read from the `VAPOR_APP_PREPARED` environment variable.
+            Defaults to None.
+    """
+    logger.info("Initializing Vapor services >>>")
+    if prepared is None:
+        prepared = utils.str_to_bool(utils.get_env_var("VAPOR_APP_PREPARED", "false"))
+    workers = get_workers()
+
+    # NOTE: 0 max entries disables the cache
+    result_cache_max_entries = int(
+        utils.get_env_var("VAPOR_TOOL_CACHE_MAX_ENTRIES", "1024")
+    )
+    # NOTE: 0 disables the budget
+    max_output_chars = int(utils.get_env_var("VAPOR_TOOL_MAX_OUTPUT_CHARS", "4000"))
+    # NOTE: 0 disables the deadline or row cap of each tool call
+    timeout = float(utils.get_env_var("VAPOR_TOOL_TIMEOUT", "10"))
+    max_rows = int(utils.get_env_var("VAPOR_TOOL_MAX_ROWS", "1000"))
+    # NOTE: 0 disables the concurrency limit
+    max_concurrency = int(utils.get_env_var("VAPOR_TOOL_MAX_CONCURRENCY", "8"))
+    embedding_max_concurrency = int(
+        utils.get_env_var("VAPOR_EMBEDDING_MAX_CONCURRENCY", "4")
+    )
+    app_max_concurrency = int(utils.get_env_var("VAPOR_APP_MAX_CONCURRENCY", "64"))
 
     ### Setup MCP ###
     logger.info("Setting up MCP...")
     _mcp = FastMCP("Vapor MCP Server")
-    games = mcp.GamesTools(
-        mcp_instance=_mcp,
-        neo4j_client=neo4j_client,
-        embedder=embedder,
-    )
+    # Continue the traces of tool calls, e.g. of a chat turn
+    _mcp.add_middleware(TracingMiddleware())
     mcp_app = _mcp.http_app(path="/")
 
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+        ### Setup dependencies (per worker, concurrently) ###
+        app.state.ready = False
+        logger.info("Setting up Neo4jClient...")
+        neo4j_client, embedder, vector_indexes = await asyncio.gather(
+            asyncio.to_thread(Neo4jClient.from_env, n_processes=workers),
+            asyncio.to_thread(_setup_embedder, prepared),
+            asyncio.to_thread(_load_vector_indexes),
+        )
+        vector_index, game_vector_index = vector_indexes
+        metrics.register_cache("query_embeddings", lambda: embedder.query_cache_stats)
+        result_cache = None
+        if result_cache_max_entries > 0:
+            result_cache = VersionedLRUCache(
+                get_version=neo4j_client.get_graph_version,
+                version_check_interval=float(
+                    utils.get_env_var("VAPOR_GRAPH_VERSION_CHECK_INTERVAL", "5")
+                ),
+                max_entries=result_cache_max_entries,
+                ttl=float(utils.get_env_var("VAPOR_TOOL_CACHE_TTL", "3600")),
+            )
+            metrics.register_cache("tool_results", lambda: result_cache.stats)
+
+        ### Register tools ###
+        app.state.neo4j_client = neo4j_client
+        app.state.embedder = embedder
+        app.state.games = mcp.GamesTools(
+            mcp_instance=_mcp,
+            neo4j_client=neo4j_client,
+            embedder=embedder,
+            vector_index=vector_index,
+            game_vector_index=game_vector_index,
+            result_cache=result_cache,
+            max_output_chars=max_output_chars or None,
+            timeout=timeout or None,
+            max_rows=max_rows or None,
+            max_concurrency=max_concurrency or None,
+            max_queue=int(utils.get_env_var("VAPOR_TOOL_MAX_QUEUE", "32")),
+            embedding_max_concurrency=embedding_max_concurrency or None,
+            embedding_max_queue=int(
+                utils.get_env_var("VAPOR_EMBEDDING_MAX_QUEUE", "8")
+            ),
+        )
+        # Serve right away, ready once warmed up
+        warmup_task = asyncio.create_task(
+            warmup(app, neo4j_client, embedder, vector_indexes)
+        )
+        try:
+            async with mcp_app.lifespan(app):
+                yield
+        finally:
+            warmup_task.cancel()
+            neo4j_client.close()
+            if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+                multiprocess.mark_process_dead(os.getpid())
+
     ### Create API ###
     logger.info("Creating app...")
     # Create instance and mount mcp
-    app = FastAPI(title="Vapor API", lifespan=mcp_app.lifespan)
+    app = FastAPI(title="Vapor API", lifespan=lifespan)
     app.mount("/mcp", mcp_app)
+    # Reject requests beyond capacity, or queued past the tool deadline
+    if app_max_concurrency > 0:
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            controller=AdmissionController(
+                "app",
+                app_max_concurrency,
+                int(utils.get_env_var("VAPOR_APP_MAX_QUEUE", "128")),
+            ),
+            max_wait=timeout or None,
+        )
     # Add routers
     app.include_router(routes.status_router)
+    app.include_router(routes.metrics_router)
 
     return app
@@ -1,7 +1,81 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, TypeVar
+import asyncio
+import copy
+import functools
+import json
+
+import pandas as pd
+from loguru import logger
 from fastmcp import FastMCP
 
-from vapor.core.clients import Neo4jClient
+from vapor.core.clients import Neo4jClient, SearchFilters
 from vapor.core.models.embeddings import VaporEmbeddings
+from vapor.core.utils import utils, metrics, tracing
+from vapor.core.utils.vector_index import LocalVectorIndex
+from vapor.core.utils.cache import VersionedLRUCache
+from vapor.core.utils.singleflight import SingleFlight
+from vapor.core.utils.limits import (
+    AdmissionController,
+    DeadlineExceeded,
+    Overloaded,
+    request_limits,
+    wait_for_deadline,
+)
+
+T = TypeVar("T")
+
+
+def _limited(on_deadline: Callable[..., Any]) -> Callable:
+    """Run the decorated tool within the `request_limits()` and admission
+    control of its `GamesTools`, returning `on_deadline(self, *args, **kwargs)`
+    instead if the deadline is missed or the tool is at capacity. Concurrent
+    calls with identical arguments share a single execution, and admission.
+    Observes the tool call metrics, and the outcome in the current span.
+
+    NOTE: Blocking calls of the tool, e.g. Neo4j queries, must be run with
+    `asyncio.to_thread()`, which copies the `request_limits()` and current
+    span, such that concurrent calls can be coalesced and admitted.
+    """
+
+    def decorator(tool: Callable[..., Awaitable[Any]]) -> Callable:
+        name = tool.__name__
+
+        @functools.wraps(tool)
+        async def wrapper(self: GamesTools, *args, **kwargs) -> Any:
+            outcome = "ok"
+            span = tracing.current_span()
+            with (
+                metrics.observe_duration(metrics.TOOL_DURATION.labels(name)),
+                request_limits(timeout=self.timeout, max_rows=self.max_rows),
+            ):
+                if name not in self._flights:
+                    self._flights[name] = SingleFlight(name)
+                try:
+                    key = json.dumps([args, kwargs], sort_keys=True, default=str)
+                    result, shared = await self._flights[name].do(
+                        key,
+                        lambda: self._admit(name, lambda: tool(self, *args, **kwargs)),
+                    )
+                    if span is not None:
+                        span.attributes["shared"] = shared
+                    # Every caller gets their own copy of a shared result
+                    return copy.deepcopy(result) if shared else result
+                except DeadlineExceeded as e:
+                    logger.warning(f"{name} missed its deadline: {e}")
+                    outcome = "rejected" if isinstance(e, Overloaded) else "timeout"
+                    return on_deadline(self, *args, **kwargs)
+                except Exception:
+                    outcome = "error"
+                    raise
+                finally:
+                    metrics.TOOL_CALLS.labels(name, outcome).inc()
+                    if span is not None:
+                        span.attributes["outcome"] = outcome
+
+        return wrapper
+
+    return decorator
 
 
 class GamesTools(object):
@@ -10,13 +84,54 @@ class GamesTools(object):
         mcp_instance: FastMCP,
         neo4j_client: Neo4jClient,
         embedder: VaporEmbeddings,
+        vector_index: LocalVectorIndex | None = None,
+        game_vector_index: LocalVectorIndex | None = None,
+        result_cache: VersionedLRUCache | None = None,
+        max_output_chars: int | None = None,
+        timeout: float | None = None,
+        max_rows: int | None = None,
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        embedding_max_concurrency: int | None = None,
+        embedding_max_queue: int = 0,
     ):
         self.neo4j_client = neo4j_client
         self.embedder = embedder
+        # Optional in-process indexes of the description chunk and game-level
+        # embeddings, searched locally instead of the Neo4j vector indexes
+        # when both are available
+        self.vector_index = vector_index
+        self.game_vector_index = game_vector_index
+        # Optional cache of tool results, invalidated by the graph version
+        self.result_cache = result_cache
+        # Optional budget of description characters per tool result, such that
+        # a single result cannot fill most of the LLM's context
+        self.max_output_chars = max_output_chars
+        # Optional deadline in seconds of each tool call, propagated to its
+        # Neo4j transactions and embedding requests, and cap on the rows
+        # fetched per query
+        self.timeout = timeout
+        self.max_rows = max_rows
+        # Coalescing of identical concurrent calls per tool
+        self._flights: dict[str, SingleFlight] = {}
+        # Optional max concurrent and queued calls per tool, and embedding
+        # requests, beyond which calls are rejected or degraded
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._admission: dict[str, AdmissionController] = {}
+        self.embedding_admission = None
+        if embedding_max_concurrency is not None:
+            self.embedding_admission = AdmissionController(
+                "embeddings", embedding_max_concurrency, embedding_max_queue
+            )
         mcp_instance.tool(self.about_the_game)
         mcp_instance.tool(self.find_similar_games)
+        mcp_instance.tool(self.find_games_similar_to)
+        mcp_instance.tool(self.about_the_games)
+        mcp_instance.tool(self.find_similar_games_batch)
 
-    async def about_the_game(self, name: str) -> dict[str, str]:
+    @_limited(lambda *_, **__: {"timed_out": True})
+    async def about_the_game(self, name: str) -> dict[str, Any]:
         """Retrieves the "about the game" description for the game
         in the database that best matches the provided `name` using
         a fuzzy match technique. The game descriptions have been populated
@@ -29,43 +144,160 @@ class GamesTools(object):
                 match to the stored game titles.
 
         Returns:
-            dict[str, str]: Dictionary with fields describing the game
+            dict[str, Any]: Dictionary with fields describing the game
                 with the title that best matched the query name. The "matched_game"
                 field will provide the name/title of the game that best matched the
                 query name, or will not be present if no match was found.
                 The "about_the_game" field will provide the game description
                 for the best matched game, or will not be present
-                if no pre-populated description is available.
+                if no pre-populated description is available. The "truncated"
+                field will be True if the description was too long and only
+                its most representative excerpts are provided, or will
+                not be present otherwise. If the lookup did not finish in time,
+                only a "timed_out" field will be present, set to True.
         """
-        # Set up response
-        response: dict[str, str] = {}
-        # Get the matches from neo4j
-        matches = self.neo4j_client.search_game_by_name(name)
-        # Return empty response if nothing matched the query
-        if matches.empty:
-            return response
+        max_chars = self.max_output_chars
+        # Return a copy of the cached response if available
+        cache_key = self._about_the_game_cache_key(name, max_chars)
+        if self.result_cache is not None:
+            cached_response = self.result_cache.get(cache_key)
+            if cached_response is not None:
+                return dict(cached_response)
+        response = await asyncio.to_thread(self._about_the_game, name, max_chars)
+        if self.result_cache is not None:
+            self.result_cache.set(cache_key, dict(response))
+        return response
 
-        # Matches were found, take the best (first row)
-        best_match = matches.iloc[0]
-        response["matched_game"] = best_match["name"]
+    @_limited(lambda self, names: [{"timed_out": True} for name in names])
+    async def about_the_games(self, names: list[str]) -> list[dict[str, Any]]:
+        """Retrieves the "about the game" descriptions for several games at
+        once, each being the game in the database that best matches one of
+        the provided `names`, see `about_the_game`. Prefer this over
+        multiple calls of `about_the_game` when asking about several games.
+
+        Args:
+            names (list[str]): The names of the games to search for and
+                retrieve the game descriptions for. These are not
+                expected to be perfect character-for-character
+                matches to the stored game titles.
 
-        # Get the about the game description
-        cypher = """
-            MATCH (g:Game {appId: $appid})
-            RETURN g.aboutTheGame as about_the_game
+        Returns:
+            list[dict[str, Any]]: List with a dictionary for each of the
+                `names`, in the same order, with the "matched_game",
+                "about_the_game", "truncated" and "timed_out" fields as
+                returned by `about_the_game`. The descriptions share
+                the output budget.
+        """
+        max_chars = self._split_budget(len(names))
+        responses: list[dict[str, Any] | None] = [None] * len(names)
+        if self.result_cache is not None:
+            for i, name in enumerate(names):
+                cached_response = self.result_cache.get(
+                    self._about_the_game_cache_key(name, max_chars)
+                )
+                if cached_response is not None:
+                    responses[i] = dict(cached_response)
+        # Look up all remaining names in a single query
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            try:
+                matches = await asyncio.to_thread(
+                    self.neo4j_client.get_game_descriptions_by_names,
+                    [names[i] for i in missing],
+                )
+            except DeadlineExceeded as e:
+                # Return the cached responses only
+                logger.warning(f"about_the_games missed its deadline: {e}")
+                return [
+                    {"timed_out": True} if response is None else response
+                    for response in responses
+                ]
+            for i in missing:
+                responses[i] = {}
+            for match in matches.to_dict("records"):
+                i = missing[match["query_index"]]
+                responses[i] = self._parse_game_description(match, max_chars)
+            if self.result_cache is not None:
+                for i in missing:
+                    self.result_cache.set(
+                        self._about_the_game_cache_key(names[i], max_chars),
+                        dict(responses[i]),
+                    )
+        return responses
+
+    async def _admit(self, name: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Await `call` once admitted by the admission control of tool `name`"""
+        if self.max_concurrency is None:
+            return await call()
+        if name not in self._admission:
+            self._admission[name] = AdmissionController(
+                name, self.max_concurrency, self.max_queue
+            )
+        async with self._admission[name].admit():
+            return await call()
+
+    async def _embed(self, embed: Callable[[], Awaitable[T]]) -> T:
+        """Await the embedding request `embed` within the deadline, once
+        admitted by the embedding admission control. Traced as the span
+        "embedding", including the wait for admission.
         """
-        description = self.neo4j_client._read(cypher, appid=best_match["appid"]).iloc[
-            0
-        ]["about_the_game"]
+        with tracing.span("embedding"):
+            if self.embedding_admission is None:
+                return await wait_for_deadline(embed())
+            async with self.embedding_admission.admit():
+                return await wait_for_deadline(embed())
+
+    @staticmethod
+    def _about_the_game_cache_key(
+        name: str, max_chars: int | None
+    ) -> tuple[str, str, int | None]:
+        return ("about_the_game", " ".join(name.lower().split()), max_chars)
+
+    def _split_budget(self, n_items: int) -> int | None:
+        """The output budget per item of a result with `n_items` items"""
+        if self.max_output_chars is None:
+            return None
+        return max(1, self.max_output_chars // max(1, n_items))
+
+    def _about_the_game(self, name: str, max_chars: int | None) -> dict[str, Any]:
+        # Get the best match and its description from neo4j
+        match = self.neo4j_client.get_game_description_by_name(name)
+        # Return empty response if nothing matched the query
+        if match.empty:
+            return {}
+        return self._parse_game_description(match.iloc[0], max_chars)
+
+    @staticmethod
+    def _parse_game_description(
+        best_match: Any, max_chars: int | None
+    ) -> dict[str, Any]:
+        # Set up response
+        response: dict[str, Any] = {}
+        response["matched_game"] = best_match["name"]
         # Return response with no description if not available
-        if not description:
+        if pd.isna(best_match["about_the_game"]) or not best_match["about_the_game"]:
             return response
 
-        # Add retrieved description and return
-        response["about_the_game"] = description
+        # Add retrieved description, or its most representative excerpts
+        # if over budget, and return
+        about_the_game = best_match["about_the_game"]
+        if max_chars is not None and len(about_the_game) > max_chars:
+            chunks = best_match.get("chunks")
+            spans = [tuple(c) for c in chunks] if isinstance(chunks, list) else []
+            about_the_game = utils.select_excerpts(about_the_game, spans, max_chars)
+            response["truncated"] = True
+        response["about_the_game"] = about_the_game
         return response
 
-    async def find_similar_games(self, summarized_description: str) -> list[dict]:
+    @_limited(lambda *_, **__: [])
+    async def find_similar_games(
+        self,
+        summarized_description: str,
+        keywords: str | None = None,
+        friend_hops: int | None = None,
+        genres: list[str] | None = None,
+        exclude_owned: bool = False,
+    ) -> list[dict]:
         """Finds games and excerpts of their "about the game" descriptions
         in the database which are semantically similar to the
         provided `summarized_description`. Provides the discovered games
@@ -77,38 +309,282 @@ class GamesTools(object):
                 about the game to discover games which are similar
                 in specific ways. This will be embedded and used as such
                 for semantic similarity search in the vector database.
+            keywords (str, optional): Exact terms to also search for in the
+                game titles and descriptions, e.g. a specific genre such as
+                "roguelike deckbuilder" or a studio name. Games matching
+                the keywords are ranked together with the semantically
+                similar games. Not combined with the filters below.
+                Defaults to None.
+            friend_hops (int, optional): Only find games owned by the user's
+                friends, within this many hops, i.e. 1 for direct friends,
+                2 to include friends of friends. Defaults to None.
+            genres (list[str], optional): Only find games of any of these
+                Steam genres, e.g. ["Action", "Indie"]. Defaults to None.
+            exclude_owned (bool, optional): Exclude the games the user
+                already owns. Defaults to False.
 
         Returns:
             list[dict]: List of dictionaries for each discovered similar
-                game as well as the description chunks most similar
-                to the `summarized_description`. Each discovered similar game
+                game, most similar first, as well as up to 3 of its
+                description chunks most similar to the `summarized_description`.
+                Each discovered similar game
                 will include a "name" field with the title of the game,
                 a "appid" field with the unique Steam game ID of the game,
                 and a "description_chunks" field which will contain a list
-                of each similar description excerpt from the game.
-                If no similar games are found, the returned response
-                will be an empty list.
+                of each similar description excerpt from the game. A
+                "truncated" field will be True if less similar excerpts were
+                left out to fit the output budget, or will not be present
+                otherwise. If no similar games are found, or the search did not
+                finish in time, the returned response will be an empty list.
+                Under heavy load, games may be found by keyword relevance
+                to the `keywords`, or `summarized_description`, instead.
         """
-        # Create an embedding of the summarized description
-        embedding = self.embedder.embed_query(summarized_description)
-        # Run semantic search over game descriptions
-        result = self.neo4j_client.game_descriptions_semantic_search(
-            embedding=embedding,
-            n_neighbors=10,
+        genre_ids = None
+        if genres:
+            genre_ids = await asyncio.to_thread(self.neo4j_client.get_genre_ids, genres)
+        filters = SearchFilters(
+            friend_hops=friend_hops,
+            genre_ids=genre_ids,
+            exclude_owned=exclude_owned,
+        )
+        # No games can match genres which are not in the database
+        if genres and not filters.genre_ids:
+            return []
+        # Create an embedding of the summarized description, unless cached,
+        # which needs no admission to the embedding model
+        embedding = self.embedder.cached_query(summarized_description)
+        try:
+            if embedding is None:
+                embedding = await self._embed(
+                    lambda: self.embedder.aembed_query(summarized_description)
+                )
+        except Overloaded as e:
+            if filters.active:
+                raise
+            # Degrade to keyword search, which needs no embedding
+            logger.warning(f"find_similar_games degraded to fulltext search: {e}")
+            metrics.DEGRADED_CALLS.labels("find_similar_games").inc()
+            result = await asyncio.to_thread(
+                self.neo4j_client.fulltext_games_search,
+                keywords or summarized_description,
+                n_games=10,
+                n_chunks=3,
+            )
+            return self._parse_similar_games(result, self.max_output_chars)
+        # Run (filtered or hybrid keyword and) semantic search over game descriptions
+        if filters.active:
+            result = await asyncio.to_thread(
+                self.neo4j_client.games_semantic_search,
+                embedding=embedding,
+                n_games=10,
+                n_chunks=3,
+                min_score=0.5,
+                filters=filters,
+            )
+        elif keywords:
+            result = await asyncio.to_thread(
+                self.neo4j_client.hybrid_games_search,
+                embedding=embedding,
+                keywords=keywords,
+                n_games=10,
+                n_chunks=3,
+                min_score=0.5,
+            )
+        else:
+            result = await asyncio.to_thread(
+                self._semantic_search, embedding, n_games=10, n_chunks=3, min_score=0.5
+            )
+        return self._parse_similar_games(result, self.max_output_chars)
+
+    @_limited(
+        lambda self, summarized_descriptions: [[] for d in summarized_descriptions]
+    )
+    async def find_similar_games_batch(
+        self, summarized_descriptions: list[str]
+    ) -> list[list[dict]]:
+        """Finds the games which are semantically similar to each of several
+        `summarized_descriptions` at once, see `find_similar_games`. Prefer
+        this over multiple calls of `find_similar_games` when searching for
+        several kinds of games, if no keywords or filters are needed.
+
+        Args:
+            summarized_descriptions (list[str]): Summarized game descriptions,
+                each of which will be embedded and used for semantic
+                similarity search in the vector database.
+
+        Returns:
+            list[list[dict]]: List with the discovered similar games for each
+                of the `summarized_descriptions`, in the same order, as
+                returned by `find_similar_games`. The results share
+                the output budget.
+        """
+        if not summarized_descriptions:
+            return []
+        # Embed all descriptions in a single request
+        embeddings = await self._embed(
+            lambda: self.embedder.aembed_documents(summarized_descriptions)
+        )
+        result = await asyncio.to_thread(
+            self._semantic_search_batch,
+            embeddings,
+            n_games=10,
+            n_chunks=3,
             min_score=0.5,
         )
+        if result.empty:
+            return [[] for _ in summarized_descriptions]
+        max_chars = self._split_budget(len(summarized_descriptions))
+        query_results = dict(list(result.groupby("query_index", sort=False)))
+        return [
+            self._parse_similar_games(query_results.get(i, pd.DataFrame()), max_chars)
+            for i in range(len(summarized_descriptions))
+        ]
+
+    @staticmethod
+    def _parse_similar_games(result: pd.DataFrame, max_chars: int | None) -> list[dict]:
         # Return nothing if empty
         if result.empty:
             return []
-        # Parse responses
+        # Parse responses, keeping the games in order of similarity
+        games = list(result.groupby(by="appid", sort=False))
+        # Each game gets an equal share of the output budget
+        game_max_chars = None if max_chars is None else max(1, max_chars // len(games))
         parsed_results = []
-        for name, game_df in result.groupby(by="name"):
-            appid = game_df.iloc[0]["appid"]
+        for appid, game_df in games:
+            # Chunks are in order of similarity
+            chunks = game_df["desc"].values.tolist()
             parsed_result = {
-                "name": name,
+                "name": game_df.iloc[0]["name"],
                 "appid": int(appid),
-                "description_chunks": game_df["desc"].values.tolist(),
+                "description_chunks": chunks,
             }
+            if game_max_chars is not None:
+                selected_chunks = utils.select_chunks(chunks, game_max_chars)
+                if selected_chunks != chunks:
+                    parsed_result["description_chunks"] = selected_chunks
+                    parsed_result["truncated"] = True
             parsed_results.append(parsed_result)
 
         return parsed_results
+
+    @_limited(lambda *_, **__: {"timed_out": True})
+    async def find_games_similar_to(self, name: str) -> dict[str, Any]:
+        """Finds the games in the database which are most similar to the
+        game that best matches the provided `name` using a fuzzy match
+        technique. The similarities between games have been precomputed
+        from their "about the game" descriptions.
+
+        Args:
+            name (str): The name of the known game to find similar games for.
+                This is not expected to be a perfect character-for-character
+                match to the stored game titles.
+
+        Returns:
+            dict[str, Any]: Dictionary with the "matched_game" field providing
+                the name/title of the game that best matched the query name,
+                which will not be present if no match was found. The
+                "similar_games" field will provide a list of dictionaries for
+                each similar game, most similar first, with a "name" field with
+                the title of the game, a "appid" field with the unique Steam
+                game ID of the game, and a "score" field with the similarity
+                between 0 and 1. The list is empty if no similar
+                games are available for the matched game. If the lookup did
+                not finish in time, only a "timed_out" field will be present,
+                set to True.
+        """
+        response: dict[str, Any] = {}
+        result = await asyncio.to_thread(
+            self.neo4j_client.get_similar_games, name, n_games=10
+        )
+        if result.empty:
+            return response
+        response["matched_game"] = result.iloc[0]["matched_name"]
+        response["similar_games"] = [
+            {"name": row.name, "appid": int(row.appid), "score": float(row.score)}
+            for row in result.dropna(subset=["appid"]).itertuples()
+        ]
+        return response
+
+    def _semantic_search(
+        self, embedding: list[float], n_games: int, n_chunks: int, min_score: float
+    ) -> pd.DataFrame:
+        """Coarse-to-fine semantic search over the game-level embeddings,
+        then the description chunks of only the top games. Uses the local
+        vector indexes if available, resolving the excerpts from Neo4j in
+        one batched read, otherwise the Neo4j vector indexes.
+        """
+        if not self._local_indexes_available:
+            return self.neo4j_client.games_semantic_search(
+                embedding=embedding,
+                n_games=n_games,
+                n_chunks=n_chunks,
+                min_score=min_score,
+            )
+        chunks = self._local_semantic_search(embedding, n_games, n_chunks, min_score)
+        if not chunks:
+            return pd.DataFrame()
+        return self.neo4j_client.get_description_excerpts(chunks)
+
+    def _semantic_search_batch(
+        self,
+        embeddings: list[list[float]],
+        n_games: int,
+        n_chunks: int,
+        min_score: float,
+    ) -> pd.DataFrame:
+        """`_semantic_search` for each of the query `embeddings`, resolved
+        with a single Neo4j read. The result has an additional `query_index`
+        column, the index of the query embedding of each row.
+        """
+        if not self._local_indexes_available:
+            return self.neo4j_client.games_semantic_search_batch(
+                embeddings=embeddings,
+                n_games=n_games,
+                n_chunks=n_chunks,
+                min_score=min_score,
+            )
+        chunks = [
+            {**chunk, "query_index": query_index}
+            for query_index, embedding in enumerate(embeddings)
+            for chunk in self._local_semantic_search(
+                embedding, n_games, n_chunks, min_score
+            )
+        ]
+        if not chunks:
+            return pd.DataFrame()
+        return self.neo4j_client.get_description_excerpts(chunks)
+
+    @property
+    def _local_indexes_available(self) -> bool:
+        return (
+            self.vector_index is not None
+            and self.game_vector_index is not None
+            and self.vector_index.available
+            and self.game_vector_index.available
+        )
+
+    def _local_semantic_search(
+        self, embedding: list[float], n_games: int, n_chunks: int, min_score: float
+    ) -> list[dict[str, Any]]:
+        """Search the local vector indexes, returning the matched chunks
+        to resolve with `Neo4jClient.get_description_excerpts()`.
+        """
+        games = self.game_vector_index.search(embedding, k=n_games)
+        games = games.loc[games["score"] >= min_score]
+        if games.empty:
+            return []
+        game_scores = dict(zip(games["appid"].tolist(), games["score"].tolist()))
+        matches = self.vector_index.search(
+            embedding, filters={"appid": list(game_scores)}
+        )
+        matches = matches.groupby("appid", sort=False).head(n_chunks)
+        return [
+            {
+                "appid": int(match.appid),
+                "start_index": int(match.start_index),
+                "total_length": int(match.total_length),
+                "score": float(match.score),
+                "game_score": float(game_scores[match.appid]),
+            }
+            for match in matches.itertuples()
+        ]
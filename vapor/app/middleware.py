@@ -0,0 +1,87 @@
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from mcp.types import CallToolRequestParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from vapor.core.utils import tracing
+from vapor.core.utils.limits import AdmissionController, DeadlineExceeded
+
+
+class ConcurrencyLimitMiddleware(object):
+    """ASGI middleware admitting the HTTP requests of the given `methods`
+    through an `AdmissionController`, such as the MCP tool calls. Requests
+    beyond its capacity, or queued for longer than `max_wait` seconds, are
+    rejected with a 503 response, such that the server stays responsive.
+    Paths starting with any of the `exclude_paths` are always admitted,
+    e.g. health checks and metrics.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        max_wait: float | None = None,
+        methods: tuple[str, ...] = ("POST",),
+        exclude_paths: tuple[str, ...] = ("/status", "/metrics"),
+    ):
+        self.app = app
+        self.controller = controller
+        self.max_wait = max_wait
+        self.methods = methods
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or scope["path"].startswith(self.exclude_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+        admitted = False
+        try:
+            async with self.controller.admit(max_wait=self.max_wait):
+                admitted = True
+                await self.app(scope, receive, send)
+        except DeadlineExceeded as e:
+            if admitted:
+                raise
+            response = JSONResponse(
+                {"detail": f"Server is at capacity, retry later: {e}"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+
+
+class TracingMiddleware(Middleware):
+    """MCP middleware continuing the trace of a tool call whose request
+    `_meta` carries a W3C `traceparent`, e.g. from the chat. The tool call is
+    traced as the span "mcp.<tool>", and its spans, e.g. Neo4j queries, are
+    returned to the caller in the `_meta` of the result. Calls without a
+    `traceparent` are not traced.
+    """
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[CallToolRequestParams],
+        call_next: CallNext[CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        traceparent = self._traceparent(context)
+        if not traceparent:
+            return await call_next(context)
+        with tracing.trace(f"mcp.{context.message.name}", traceparent) as trace:
+            result = await call_next(context)
+        result.meta = {**(result.meta or {}), tracing.SPANS: trace.to_dicts()}
+        return result
+
+    @staticmethod
+    def _traceparent(context: MiddlewareContext[CallToolRequestParams]) -> str | None:
+        """The `traceparent` in the `_meta` of the tool call request, if any"""
+        meta = context.message.meta
+        # NOTE: FastMCP passes the `_meta` of the request in its request context
+        if meta is None and context.fastmcp_context is not None:
+            request_context = context.fastmcp_context.request_context
+            meta = request_context.meta if request_context is not None else None
+        return (meta.model_extra or {}).get(tracing.TRACEPARENT) if meta else None
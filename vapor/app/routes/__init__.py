@@ -1 +1,2 @@
 from .status import router as status_router
+from .metrics import router as metrics_router
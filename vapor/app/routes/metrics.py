@@ -0,0 +1,35 @@
+import os
+
+from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
+
+from vapor.core.utils import metrics as vapor_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+def _registry() -> CollectorRegistry:
+    """The registry of this process, or of all worker processes if
+    `PROMETHEUS_MULTIPROC_DIR` is set
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    # NOTE: Caches are per worker, only those of the serving worker are collected
+    registry.register(vapor_metrics.CACHES)
+    return registry
+
+
+@router.get("/metrics")
+def metrics(request: Request) -> Response:
+    """Prometheus metrics of the tools and their dependencies."""
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
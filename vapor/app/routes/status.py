@@ -9,3 +9,11 @@ router = APIRouter(prefix="/status", tags=["status"])
 def health_check(request: Request) -> JSONResponse:
     """Basic health check that the server is running."""
     return JSONResponse({"status": "alive"}, status_code=200)
+
+
+@router.get("/ready")
+def readiness_check(request: Request) -> JSONResponse:
+    """Readiness check that the dependencies are connected and warmed up."""
+    if getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "ready"}, status_code=200)
+    return JSONResponse({"status": "starting"}, status_code=503)
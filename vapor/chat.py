@@ -1,37 +1,231 @@
+from typing import Any
+from pathlib import Path
+from uuid import UUID
 import asyncio
+import time
 
 from loguru import logger
-from rich.console import Console
+from rich.console import Console, Group, RenderableType
+from rich.live import Live
 from rich.markdown import Markdown
+from rich.spinner import Spinner
+from rich.table import Table
 
-from langchain.messages import HumanMessage, AIMessage
+from langchain.messages import HumanMessage, AIMessageChunk, ToolMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
 from langchain.agents import create_agent
+from langchain.agents.middleware import SummarizationMiddleware
 from langgraph.graph.state import CompiledStateGraph
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
 from vapor.core.models.llm import VaporLLM
 from vapor.core.models.prompts import load_prompt
+from vapor.core.utils import utils, tracing
+from vapor.core.utils.conversations import ConversationStore
+from vapor.core.utils.mcp_session import PersistentMCPSession, trace_tool_call
 
 
-async def handle_chat(agent: CompiledStateGraph) -> None:
-    """Helper method to handle user chat questions"""
+class ChatView(object):
+    """Renders the answer of a chat turn as it streams in, i.e. the Markdown
+    of each answer message, followed by a spinner while tools are running
+    """
+
+    def __init__(self):
+        self.answers: dict[str, str] = {}
+        self.running_tools: dict[str, str] = {}
+
+    def add_chunk(self, chunk: AIMessageChunk) -> None:
+        """Add the tokens and tool calls of a streamed answer `chunk`"""
+        if chunk.text:
+            self.answers[chunk.id] = self.answers.get(chunk.id, "") + chunk.text
+        for tool_call in chunk.tool_call_chunks:
+            # NOTE: Only the first chunk of each tool call has its ID and name
+            if tool_call.get("id") and tool_call.get("name"):
+                self.running_tools[tool_call["id"]] = tool_call["name"]
+
+    def finish_tool(self, message: ToolMessage) -> None:
+        """Mark the tool call answered by `message` as done"""
+        self.running_tools.pop(message.tool_call_id, None)
+
+    def __rich__(self) -> RenderableType:
+        renderables: list[RenderableType] = [
+            Markdown(answer) for answer in self.answers.values()
+        ]
+        if self.running_tools:
+            tools = ", ".join(self.running_tools.values())
+            renderables.append(Spinner("dots", text=f"Running {tools}..."))
+        return Group(*renderables)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Traces each LLM call of a chat turn as the span "llm" of the `trace`,
+    under the span `parent`, with its token counts
+    """
+
+    # NOTE: Spans are started and ended in order, rather than in a thread pool
+    run_inline = True
+
+    def __init__(self, trace: tracing.Trace, parent: tracing.Span):
+        self.trace = trace
+        self.parent = parent
+        self._spans: dict[UUID, tracing.Span] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        self._spans[run_id] = self.trace.start_span(
+            "llm",
+            self.parent.span_id,
+            model=metadata.get("ls_model_name"),
+            node=metadata.get("langgraph_node"),
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        generations = response.generations[0] if response.generations else []
+        message = getattr(generations[0], "message", None) if generations else None
+        usage = getattr(message, "usage_metadata", None) or {}
+        span.attributes["input_tokens"] = usage.get("input_tokens")
+        span.attributes["output_tokens"] = usage.get("output_tokens")
+        self.trace.end_span(span)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is None:
+            return
+        span.attributes["error"] = repr(error)
+        self.trace.end_span(span)
+
+
+def waterfall(trace: tracing.Trace, width: int = 40) -> Table:
+    """A waterfall chart of the spans of the `trace`, each nested under its
+    parent, in the order they started
+    """
+    span_ids = {span.span_id for span in trace.spans}
+    children: dict[str | None, list[tracing.Span]] = {}
+    for span in sorted(trace.spans, key=lambda span: span.start):
+        parent_id = span.parent_id if span.parent_id in span_ids else None
+        children.setdefault(parent_id, []).append(span)
+    start = min((span.start for span in trace.spans), default=0.0)
+    end = max((span.start + span.duration for span in trace.spans), default=0.0)
+    scale = width / max(end - start, 1e-9)
+
+    table = Table(title=f"Trace {trace.trace_id}", box=None)
+    table.add_column("span")
+    table.add_column("ms", justify="right")
+    table.add_column("", no_wrap=True)
+    table.add_column("attributes", style="dim")
+
+    def add_rows(span: tracing.Span, depth: int) -> None:
+        offset = min(int((span.start - start) * scale), width - 1)
+        length = min(max(round(span.duration * scale), 1), width - offset)
+        attributes = ", ".join(
+            f"{key}={value}"
+            for key, value in span.attributes.items()
+            if value is not None
+        )
+        table.add_row(
+            "  " * depth + span.name,
+            f"{span.duration * 1000:.1f}",
+            " " * offset + "█" * length,
+            attributes,
+        )
+        for child in children.get(span.span_id, []):
+            add_rows(child, depth + 1)
+
+    for root in children.get(None, []):
+        add_rows(root, 0)
+    return table
+
+
+async def handle_chat(
+    agent: CompiledStateGraph,
+    store: ConversationStore | None = None,
+    thread_id: str = "default",
+    debug: bool = False,
+    trace_path: str | Path | None = None,
+) -> None:
+    """Helper method to handle user chat questions, continuing the
+    conversation `thread_id` of the `store` if given. The answer is
+    rendered token by token, and with `debug`, followed by the time to
+    its first token and a waterfall of its trace.
+
+    Each turn is traced as the span "chat.turn", with its LLM calls, tool
+    calls and their spans on the server, appended to the JSONL file
+    `trace_path` if given.
+    """
     console = Console()
     msg = console.input("\nAsk a question:\n>>> ")
-    human_msg = HumanMessage(msg)
+    history = store.load(thread_id) if store is not None else []
+    messages = [*history, HumanMessage(msg)]
+    view = ChatView()
+    start = time.perf_counter()
+    first_token = None
 
-    async for event in agent.astream(
-        {"messages": [human_msg]},
-        stream_mode="values",
+    with (
+        tracing.trace("chat.turn", thread_id=thread_id) as trace,
+        Live(view, console=console, vertical_overflow="visible"),
     ):
-        message = event["messages"][-1]
-        if isinstance(message, AIMessage):
-            md = Markdown(message.content)
-            console.print(md)
+        turn = tracing.current_span()
+        async for mode, event in agent.astream(
+            {"messages": messages},
+            config={"callbacks": [TracingCallbackHandler(trace, turn)]},
+            stream_mode=["messages", "values"],
+        ):
+            # The state after each step, i.e. the conversation so far
+            if mode == "values":
+                messages = event["messages"]
+                continue
+            message, metadata = event
+            if isinstance(message, ToolMessage):
+                view.finish_tool(message)
+            # NOTE: Skip tokens of other model calls, e.g. summarizing the history
+            elif (
+                isinstance(message, AIMessageChunk)
+                and metadata.get("langgraph_node") == "model"
+            ):
+                if first_token is None and message.text:
+                    first_token = time.perf_counter()
+                    turn.attributes["time_to_first_token"] = round(
+                        first_token - start, 3
+                    )
+                view.add_chunk(message)
+
+    if trace_path is not None:
+        trace.write(trace_path)
+    if debug:
+        ttft = "n/a" if first_token is None else f"{first_token - start:.2f}s"
+        console.print(
+            f"[dim]Time to first token: {ttft},"
+            + f" total: {time.perf_counter() - start:.2f}s[/dim]"
+        )
+        console.print(waterfall(trace))
+    # Checkpoint the (summarized) conversation, including its tool results
+    if store is not None:
+        store.save(thread_id, messages)
 
 
 @logger.catch(reraise=True)
-async def chat() -> None:
-    """Opens a chat loop with Vapor's AI model serviced by Ollama"""
+async def chat(
+    thread_id: str = "default", new: bool = False, debug: bool = False
+) -> None:
+    """Opens a chat loop with Vapor's AI model serviced by Ollama,
+    continuing the conversation `thread_id` unless starting a `new` one.
+    The trace of each answer is appended to the chat's `traces.jsonl`, and
+    with `debug`, printed along with the time to its first token.
+    """
     logger.info("Loading prompt...")
     prompt = load_prompt("chat")
 
@@ -39,32 +233,76 @@ async def chat() -> None:
     llm = VaporLLM.from_env(temperature=0.7, num_ctx=4096, validate_model_on_init=True)
 
     logger.info("Connecting to MCP Server...")
+    connection = {"transport": "http", "url": "http://localhost:8000/mcp"}
+    # NOTE: Tool calls share one session for the whole chat, rather than
+    # paying the HTTP/MCP handshake of a new session per call
+    session = PersistentMCPSession("vapor-mcp", connection)
     client = MultiServerMCPClient(
-        {
-            "vapor-mcp": {
-                "transport": "http",
-                "url": "http://localhost:8000/mcp",
-            }
-        }
+        {"vapor-mcp": connection}, tool_interceptors=[trace_tool_call, session]
     )
 
     tools = await client.get_tools()
 
+    # NOTE: Older turns are summarized once the history exceeds the budget,
+    # keeping the context (num_ctx) bounded across turns
+    max_history_tokens = int(utils.get_env_var("VAPOR_CHAT_MAX_HISTORY_TOKENS", "2048"))
     agent: CompiledStateGraph = create_agent(
         model=llm,
         tools=tools,
         system_prompt=prompt,
+        middleware=[
+            SummarizationMiddleware(
+                model=llm,
+                trigger=("tokens", max_history_tokens),
+                keep=("tokens", max_history_tokens // 2),
+            )
+        ],
     )
+    # NOTE: In case summarizing fails, the history is dropped beyond twice the budget
+    store = ConversationStore.from_env(max_tokens=2 * max_history_tokens)
+    trace_path = (
+        Path(utils.get_env_var("VAPOR_DATA_PATH", "./data")) / "chat" / "traces.jsonl"
+    )
+    if new:
+        store.clear(thread_id)
 
     logger.success(f"Successfully initialized {llm.model} >>>")
 
-    while True:
-        try:
-            await handle_chat(agent)
-        except (KeyboardInterrupt, EOFError):
-            print("\nGoodbye!")
-            break
+    async with session:
+        while True:
+            try:
+                await handle_chat(
+                    agent, store, thread_id, debug=debug, trace_path=trace_path
+                )
+            except (KeyboardInterrupt, EOFError):
+                print("\nGoodbye!")
+                break
+    store.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(chat())
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chat with Vapor's AI model")
+    parser.add_argument(
+        "-t",
+        "--thread-id",
+        type=str,
+        help="The conversation to continue. Defaults to 'default'.",
+        default="default",
+    )
+    parser.add_argument(
+        "-n",
+        "--new",
+        action="store_true",
+        help="Clear the conversation and start a new one. Disabled by default.",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Print the time to the first token and trace of each answer."
+        + " Disabled by default.",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(chat(**args.__dict__))
@@ -1,2 +1,24 @@
-from .neo4jclient import Neo4jClient
-from .steamclient import SteamClient
+from typing import TYPE_CHECKING
+import importlib
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .neo4jclient import Neo4jClient, SearchFilters
+    from .steamclient import SteamClient
+
+__all__ = ["Neo4jClient", "SearchFilters", "SteamClient"]
+
+# NOTE: The clients are imported on first access, such that using one client
+# does not pay for importing the (heavy) dependencies of the others
+_LAZY_IMPORTS = {
+    "Neo4jClient": ".neo4jclient",
+    "SearchFilters": ".neo4jclient",
+    "SteamClient": ".steamclient",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
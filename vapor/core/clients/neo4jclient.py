@@ -1,23 +1,148 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Generator
+from dataclasses import dataclass
+from contextlib import contextmanager
+import math
+import sys
 import warnings
-from time import sleep
+from time import monotonic, sleep
 
 from loguru import logger
-from neo4j import GraphDatabase, RoutingControl, ExperimentalWarning
-from neo4j.exceptions import ServiceUnavailable
+from neo4j import (
+    GraphDatabase,
+    RoutingControl,
+    ExperimentalWarning,
+    READ_ACCESS,
+    Query,
+    Result,
+)
+from neo4j.exceptions import Neo4jError, ServiceUnavailable
 import pandas as pd
 
-from vapor.core.utils import utils
+from vapor.core.utils import utils, metrics, tracing
+from vapor.core.utils.limits import DeadlineExceeded, current_limits
 
 # Ignore Neo4j warning about experimental params in verify_connectivity()
 warnings.filterwarnings("ignore", category=ExperimentalWarning)
 
 
+# Vector index tuning defaults for each `RESOURCE_PROFILE`
+VECTOR_INDEX_PROFILES: dict[str, dict[str, Any]] = {
+    "cpu": {
+        "hnsw_m": 16,
+        "hnsw_ef_construction": 100,
+        "quantization_enabled": True,
+        "oversampling": 1.0,
+    },
+    "nvidia-gpu": {
+        "hnsw_m": 32,
+        "hnsw_ef_construction": 200,
+        "quantization_enabled": True,
+        "oversampling": 2.0,
+    },
+}
+
+
 class NotFoundException(Exception):
     pass
 
 
+@dataclass
+class VectorIndexConfig:
+    """Tuning options for the HNSW vector indexes and their queries.
+
+    Larger `hnsw_m` and `hnsw_ef_construction` values improve recall at
+    the cost of index build time and memory. Quantization reduces the index
+    memory footprint, and `oversampling` retrieves that many times more
+    candidates from the index to be re-ranked by their exact similarity,
+    trading query latency for recall.
+    """
+
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    quantization_enabled: bool = True
+    oversampling: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> VectorIndexConfig:
+        """Initialize a `VectorIndexConfig` from environment variables, defaulting
+        to the values of the `RESOURCE_PROFILE` in `VECTOR_INDEX_PROFILES`
+        """
+        profile = utils.get_env_var("RESOURCE_PROFILE", "cpu")
+        if profile not in VECTOR_INDEX_PROFILES:
+            logger.warning(f"Unknown RESOURCE_PROFILE={profile}, using 'cpu' defaults")
+            profile = "cpu"
+        defaults = VECTOR_INDEX_PROFILES[profile]
+        return cls(
+            hnsw_m=int(
+                utils.get_env_var("NEO4J_VECTOR_HNSW_M", str(defaults["hnsw_m"]))
+            ),
+            hnsw_ef_construction=int(
+                utils.get_env_var(
+                    "NEO4J_VECTOR_HNSW_EF_CONSTRUCTION",
+                    str(defaults["hnsw_ef_construction"]),
+                )
+            ),
+            quantization_enabled=utils.str_to_bool(
+                utils.get_env_var(
+                    "NEO4J_VECTOR_QUANTIZATION", str(defaults["quantization_enabled"])
+                )
+            ),
+            oversampling=float(
+                utils.get_env_var(
+                    "NEO4J_VECTOR_OVERSAMPLING", str(defaults["oversampling"])
+                )
+            ),
+        )
+
+    @property
+    def index_options(self) -> dict[str, Any]:
+        """The options applied when creating a vector index"""
+        return {
+            "hnsw_m": self.hnsw_m,
+            "hnsw_ef_construction": self.hnsw_ef_construction,
+            "quantization_enabled": self.quantization_enabled,
+        }
+
+
+@dataclass
+class SearchFilters:
+    """Filters restricting a semantic search to a subset of the games.
+
+    Games owned by the primary user's friends within `friend_hops` hops, or
+    games with any of the `genre_ids`, are prefiltered in the graph and
+    their embeddings scored exactly, such that the top-k is never depleted
+    by filtering after an approximate index query. With only
+    `exclude_owned`, the index is queried for one extra candidate per game
+    owned by the primary user, up to `max_owned_candidates`, to make up for
+    the owned games removed afterwards. The result is then approximate, and
+    has fewer games than requested if more of the nearest games are owned.
+    """
+
+    friend_hops: int | None = None
+    genre_ids: list[int] | None = None
+    exclude_owned: bool = False
+    max_owned_candidates: int = 100
+
+    def __post_init__(self):
+        if self.friend_hops is not None and self.friend_hops < 1:
+            raise ValueError(f"friend_hops={self.friend_hops} must be at least 1")
+        if self.max_owned_candidates < 0:
+            raise ValueError(
+                f"max_owned_candidates={self.max_owned_candidates} must be at least 0"
+            )
+
+    @property
+    def prefilter(self) -> bool:
+        """Whether the candidate games are prefiltered in the graph"""
+        return bool(self.friend_hops or self.genre_ids)
+
+    @property
+    def active(self) -> bool:
+        """Whether any filter is set"""
+        return self.prefilter or self.exclude_owned
+
+
 class Neo4jClient(object):
     """Client to perform Cypher transactions to the Neo4j GraphDB"""
 
@@ -28,18 +153,30 @@ class Neo4jClient(object):
         database: str,
         timeout: int = 60,
         sleep_duration: int = 5,
+        vector_index_config: VectorIndexConfig | None = None,
+        max_connection_pool_size: int = 100,
     ):
         """Initialize the client to connect to the database
-        at `uri` with the `auth` combo of `(username, password)`
+        at `uri` with the `auth` combo of `(username, password)`.
+        The `vector_index_config` tunes the vector indexes and their
+        queries, using the `VectorIndexConfig` defaults if None.
+        The driver keeps at most `max_connection_pool_size` connections
+        open to the database.
         """
         self.uri = uri
-        self.driver = GraphDatabase.driver(uri=uri, auth=auth)
+        self.driver = GraphDatabase.driver(
+            uri=uri, auth=auth, max_connection_pool_size=max_connection_pool_size
+        )
         self._database = database
+        self.vector_index_config = vector_index_config or VectorIndexConfig()
         self._wait_for_connection(timeout, sleep_duration)
 
     @classmethod
-    def from_env(cls) -> Neo4jClient:
-        """Initialize a `Neo4jClient` from default environment variables"""
+    def from_env(cls, n_processes: int = 1) -> Neo4jClient:
+        """Initialize a `Neo4jClient` from default environment variables.
+        The connections to the database are shared evenly by the clients
+        of `n_processes` processes, e.g. the workers of the app.
+        """
         if utils.in_docker():
             neo4j_hostname = utils.get_env_var("NEO4J_DOCKER_HOST_NAME", "vapor-neo4j")
         else:
@@ -53,50 +190,144 @@ class Neo4jClient(object):
                 utils.get_env_var("NEO4J_PW"),
             ),
             database=utils.get_env_var("NEO4J_DATABASE"),
+            vector_index_config=VectorIndexConfig.from_env(),
+            max_connection_pool_size=max(
+                1,
+                int(utils.get_env_var("NEO4J_MAX_CONNECTION_POOL_SIZE", "100"))
+                // n_processes,
+            ),
         )
 
-    def _wait_for_connection(self, timeout: int = 60, sleep_duration: int = 5):
+    def close(self) -> None:
+        """Close the driver and its connections to the database"""
+        self.driver.close()
+
+    def _wait_for_connection(
+        self,
+        timeout: float = 60,
+        sleep_duration: float = 5,
+        initial_sleep_duration: float = 0.05,
+    ):
+        """Verify the connection to the database, retrying with exponential
+        backoff from `initial_sleep_duration` up to `sleep_duration` seconds
+        between attempts. Raises `ServiceUnavailable` after `timeout` seconds.
+        """
         logger.info("Verifying Neo4j Connection >>>")
-        time_remaining = timeout
-        connected = False
-        while not connected and time_remaining > 0:
+        deadline = monotonic() + timeout
+        backoff = initial_sleep_duration
+        while True:
             try:
                 # TODO: Figure out how to ignore the ERROR notification
                 # when this doesn't initially connect
                 self.driver.verify_connectivity(database=self._database)
-                connected = True
+                break
             except ServiceUnavailable:
+                time_remaining = deadline - monotonic()
+                if time_remaining <= 0:
+                    logger.error("Timeout reached, Neo4j connection failed!")
+                    raise
                 logger.warning(
-                    f"Connection attempt failed @ {self.uri}, time remaining={time_remaining}s"
+                    f"Connection attempt failed @ {self.uri}, retrying in"
+                    + f" {backoff:.2f}s, time remaining={time_remaining:.1f}s"
                 )
-                sleep(sleep_duration)
-                time_remaining -= sleep_duration
-
-        if not connected:
-            logger.error("Timeout reached, Neo4j connection failed!")
-            raise ServiceUnavailable
+                sleep(min(backoff, time_remaining))
+                backoff = min(backoff * 2, sleep_duration)
         logger.success("Successfully connected to Neo4j >>>")
 
     def _write(self, cypher: str, **kwargs) -> None:
         """Run the `cypher` query in 'write' mode"""
-        self.driver.execute_query(
-            cypher, database_=self._database, routing_=RoutingControl.WRITE, **kwargs
-        )
+        # NOTE: Metrics are labeled by the calling method, e.g. "add_user"
+        method = sys._getframe(1).f_code.co_name
+        with self._observe_query(method):
+            self.driver.execute_query(
+                cypher,
+                database_=self._database,
+                routing_=RoutingControl.WRITE,
+                **kwargs,
+            )
 
     def _read(self, cypher: str, limit: int | None = None, **kwargs) -> pd.DataFrame:
         """Run the `cypher` query in 'read' mode, always transforming
         and returning the results as a dataframe. If `limit` is supplied,
         only that amount of items will be returned.
+
+        Within `request_limits()`, the transaction times out at the request
+        deadline, raising `DeadlineExceeded`, and at most `max_rows`
+        rows are fetched.
         """
         if limit:
             cypher += f" LIMIT {limit}"
-        return self.driver.execute_query(
-            cypher,
-            database_=self._database,
-            routing_=RoutingControl.READ,
-            result_transformer_=lambda r: r.to_df(),
-            **kwargs,
-        )
+        limits = current_limits()
+        query = Query(cypher, timeout=limits.remaining())
+        # NOTE: Metrics are labeled by the calling method, e.g. "get_all_users"
+        method = sys._getframe(1).f_code.co_name
+        try:
+            with self._observe_query(method) as span:
+                df = self.driver.execute_query(
+                    query,
+                    database_=self._database,
+                    routing_=RoutingControl.READ,
+                    result_transformer_=lambda r: self._to_df(r, limits.max_rows),
+                    **kwargs,
+                )
+                if span is not None:
+                    span.attributes["rows"] = len(df)
+        except Neo4jError as e:
+            if "TransactionTimedOut" in (e.code or ""):
+                raise DeadlineExceeded(f"Query timed out: {e.message}") from e
+            raise
+        metrics.NEO4J_QUERY_ROWS.labels(method).observe(len(df))
+        return df
+
+    @staticmethod
+    @contextmanager
+    def _observe_query(method: str) -> Generator[tracing.Span | None, None, None]:
+        """Observe the duration and failures of the queries of `method`, and
+        trace them as the span "neo4j.<method>" of the current trace, if any
+        """
+        try:
+            with (
+                metrics.observe_duration(metrics.NEO4J_QUERY_DURATION.labels(method)),
+                tracing.span(f"neo4j.{method}") as span,
+            ):
+                yield span
+        except Exception:
+            metrics.NEO4J_QUERY_ERRORS.labels(method).inc()
+            raise
+
+    @staticmethod
+    def _to_df(result: Result, max_rows: int | None = None) -> pd.DataFrame:
+        """Transform the `result` to a dataframe of at most `max_rows` rows"""
+        if max_rows is None:
+            return result.to_df()
+        keys = result.keys()
+        records = result.fetch(max_rows)
+        if result.peek() is not None:
+            logger.warning(f"Query result capped at max_rows={max_rows}")
+        return pd.DataFrame([record.values() for record in records], columns=keys)
+
+    def _stream(
+        self, cypher: str, batch_size: int = 10000, **kwargs
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Run the `cypher` query in 'read' mode, streaming the results
+        as dataframes of up to `batch_size` rows each, such that large
+        results never have to be held in memory at once.
+        """
+        with self.driver.session(
+            database=self._database,
+            default_access_mode=READ_ACCESS,
+            fetch_size=batch_size,
+        ) as session:
+            result = session.run(cypher, **kwargs)
+            keys = result.keys()
+            batch: list[list[Any]] = []
+            for record in result:
+                batch.append(record.values())
+                if len(batch) == batch_size:
+                    yield pd.DataFrame(batch, columns=keys)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=keys)
 
     def _set_node_constraint(
         self, constraint_name: str, node_label: str, node_property: str
@@ -133,6 +364,9 @@ class Neo4jClient(object):
         embedding_dimension: int,
         similarity_function: str = "cosine",
         embedding_key: str = "embedding",
+        quantization_enabled: bool = True,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 100,
         timeout: int = 300,
     ) -> None:
         """Set up a vector index for the database.
@@ -145,9 +379,28 @@ class Neo4jClient(object):
                 index the embeddings by. Defaults to "cosine".
             embedding_key (str, optional): The node attribute storing the embeddings.
                 Defaults to "embedding".
+            quantization_enabled (bool, optional): Whether the index stores
+                quantized vectors, which reduces its memory footprint and
+                speeds up queries at a small cost of accuracy. Defaults to True.
+            hnsw_m (int, optional): The max number of connections of each node
+                in the HNSW graph, higher values improve recall at the cost
+                of memory and build time. Defaults to 16.
+            hnsw_ef_construction (int, optional): The number of neighbors
+                tracked while inserting into the HNSW graph, higher values
+                improve recall at the cost of build time. Defaults to 100.
             timeout (int, optional): Time to wait, in seconds, for the index
                 to come online after being set. Defaults to 300.
         """
+        # NOTE: An existing index is never changed by IF NOT EXISTS below
+        self._drop_changed_vector_index(
+            index_name,
+            **{
+                "vector.dimensions": embedding_dimension,
+                "vector.quantization.enabled": quantization_enabled,
+                "vector.hnsw.m": hnsw_m,
+                "vector.hnsw.ef_construction": hnsw_ef_construction,
+            },
+        )
         # Create the vector index on the nodes
         cypher = """
             CREATE VECTOR INDEX {0}
@@ -159,7 +412,10 @@ class Neo4jClient(object):
         cypher += """
             OPTIONS {indexConfig: {
                 `vector.dimensions`: toInteger($dimension),
-                `vector.similarity_function`: UPPER($similarity_function)
+                `vector.similarity_function`: UPPER($similarity_function),
+                `vector.quantization.enabled`: $quantization_enabled,
+                `vector.hnsw.m`: toInteger($hnsw_m),
+                `vector.hnsw.ef_construction`: toInteger($hnsw_ef_construction)
                 }
             }
         """
@@ -167,6 +423,9 @@ class Neo4jClient(object):
             cypher,
             dimension=embedding_dimension,
             similarity_function=similarity_function,
+            quantization_enabled=quantization_enabled,
+            hnsw_m=hnsw_m,
+            hnsw_ef_construction=hnsw_ef_construction,
         )
         # Wait for index to come online
         await_cypher = """
@@ -180,6 +439,108 @@ class Neo4jClient(object):
         cypher = """SHOW VECTOR INDEXES"""
         return self._read(cypher=cypher)
 
+    def _get_vector_index_config(self, index_name: str) -> dict[str, Any] | None:
+        """The `indexConfig` of the vector index `index_name`, None if the
+        index does not exist
+        """
+        cypher = """
+            SHOW VECTOR INDEXES YIELD name, options
+            WHERE name = $index_name
+            RETURN options
+        """
+        result = self._read(cypher, index_name=index_name)
+        if result.empty:
+            return None
+        return result.iloc[0]["options"]["indexConfig"]
+
+    def _drop_changed_vector_index(self, index_name: str, **index_config) -> bool:
+        """Drop the vector index `index_name` if any of its `index_config`,
+        e.g. `{"vector.dimensions": 256}`, differs from the existing index,
+        such that it can be recreated with the new config. Options the
+        existing index does not report, e.g. of an older index provider,
+        are not compared.
+
+        Returns:
+            bool: Whether the index was dropped.
+        """
+        existing = self._get_vector_index_config(index_name)
+        if existing is None:
+            return False
+        changed = {
+            key: (existing[key], value)
+            for key, value in index_config.items()
+            if key in existing and existing[key] != value
+        }
+        if not changed:
+            return False
+        logger.warning(
+            f"Dropping vector index {index_name} to recreate it, changed"
+            + f" config (existing, new): {changed}"
+        )
+        cypher = """
+            DROP INDEX $index IF EXISTS
+        """
+        self._write(cypher, index=index_name)
+        return True
+
+    def drop_changed_vector_indexes(self, embedding_dimension: int) -> None:
+        """Drop the game description and game vector indexes if they index
+        embeddings of another dimension than `embedding_dimension`, e.g. after
+        changing the embedding model or its output dimension, such that the
+        new embeddings can be written before the indexes are recreated.
+        """
+        for index_name in ["game_description_index", "game_index"]:
+            self._drop_changed_vector_index(
+                index_name, **{"vector.dimensions": embedding_dimension}
+            )
+
+    def warmup_vector_indexes(self, embedding: list[float]) -> None:
+        """Query each vector index once with the `embedding`, loading the
+        index into the page cache ahead of the first search.
+        """
+        cypher = """
+            CALL db.index.vector.queryNodes($index, 1, $embedding)
+            YIELD node
+            RETURN count(node) AS n_nodes
+        """
+        for index in self._get_vector_indexes()["name"]:
+            self._read(cypher, index=index, embedding=embedding)
+
+    def _set_fulltext_index(
+        self,
+        index_name: str,
+        node: str,
+        properties: list[str],
+        timeout: int = 300,
+    ) -> None:
+        """Set up a fulltext (BM25 scored) index for the database.
+
+        Args:
+            index_name (str): The name of the fulltext index.
+            node (str): The node label of the nodes to index.
+            properties (list[str]): The node attributes storing the texts.
+            timeout (int, optional): Time to wait, in seconds, for the index
+                to come online after being set. Defaults to 300.
+        """
+        cypher = """
+            CREATE FULLTEXT INDEX {0}
+                IF NOT EXISTS FOR (n:{1}) ON EACH [{2}]
+        """.format(
+            index_name, node, ", ".join(f"n.{p}" for p in properties)
+        )
+        self._write(cypher)
+        # Wait for index to come online
+        await_cypher = """
+            CALL db.awaitIndex("{0}", {1})
+        """.format(
+            index_name, timeout
+        )
+        self._read(await_cypher)
+
+    def _get_fulltext_indexes(self) -> pd.DataFrame:
+        cypher = """SHOW FULLTEXT INDEXES"""
+        return self._read(cypher=cypher)
+
     def _set_primary_user(self, primary_steamid: str) -> None:
         """Set the primary user, i.e. central node, of the database.
         Assumes that the `User` node has already been added and will
@@ -269,12 +630,13 @@ class Neo4jClient(object):
             self._write(cypher, constraint=constraint)
 
     def _remove_indexes(self) -> None:
-        """Remove all indexes (including vector indexes)"""
+        """Remove all indexes (including vector and fulltext indexes)"""
         cypher = """
-            DROP INDEX $vector_index IF EXISTS
+            DROP INDEX $index IF EXISTS
         """
-        for vector_index in self._get_vector_indexes()["name"]:
-            self._write(cypher, vector_index=vector_index)
+        for indexes in [self._get_vector_indexes(), self._get_fulltext_indexes()]:
+            for index in indexes["name"]:
+                self._write(cypher, index=index)
 
     def _detach_delete(self) -> None:
         """Remove all nodes and relationships from the graph"""
@@ -296,6 +658,25 @@ class Neo4jClient(object):
         self._remove_constraints()
         self._remove_indexes()
 
+    def get_graph_version(self) -> int:
+        """The current version of the graph data, which is bumped by the
+        populate stages, such that results derived from the graph can be
+        invalidated. 0 if the graph has never been bumped (or was cleared).
+        """
+        cypher = """
+            OPTIONAL MATCH (v:GraphVersion)
+            RETURN coalesce(max(v.version), 0) as version
+        """
+        return int(self._read(cypher).iloc[0]["version"])
+
+    def bump_graph_version(self) -> None:
+        """Increment the version of the graph data"""
+        cypher = """
+            MERGE (v:GraphVersion)
+            SET v.version = coalesce(v.version, 0) + 1
+        """
+        self._write(cypher)
+
     @staticmethod
     def _validate_node_fields(
         nodes: list[dict[str, Any]], defaults: dict[str, Any]
@@ -482,6 +863,18 @@ class Neo4jClient(object):
         """
         self._write(cypher, appid=appid, genres=validated_genres)
 
+    def get_genre_ids(self, descriptions: list[str]) -> list[int]:
+        """Get the ids of the `Genre` nodes matching any of
+        the genre `descriptions`, ignoring case.
+        """
+        cypher = """
+            MATCH (n:Genre)
+            WHERE toLower(n.description) IN [d IN $descriptions | toLower(d)]
+            RETURN n.genreId as genreid
+        """
+        result = self._read(cypher, descriptions=descriptions)
+        return [] if result.empty else result["genreid"].tolist()
+
     def update_recently_played_games(
         self, steamid: str, games: list[dict[str, Any]]
     ) -> None:
@@ -581,53 +974,276 @@ class Neo4jClient(object):
                 of each `chunk` item.
 
         """
-        # Remove any existing chunks for this game
-        remove_cypher = """
-            MATCH (g:Game {appId: $appid})-[:HAS_DESCRIPTION_CHUNK]->(n:DescriptionChunk)
-            DETACH DELETE n
+        chunks = [{"source": appid, **chunk} for chunk in chunks]
+        self.set_description_chunk_embeddings(chunks, appids=[appid])
+
+    def set_description_chunk_embeddings(
+        self, chunks: list[dict[str, Any]], appids: list[int] | None = None
+    ) -> None:
+        """Bulk write of embedded game description `chunks` for many games
+        in a single transaction. Each chunk creates a `DescriptionChunk` node
+        keyed only on its `"chunkid"`, related to the `Game` node matching its
+        `"source"` appid, and its `"embedding"` is set once in the compact
+        vector property format.
+        NOTE: Any existing `HAS_DESCRIPTION_CHUNK` relationships for the games
+        in `appids` are removed prior to adding the new chunks.
+
+        Args:
+            chunks (list[dict[str, Any]]): The list of chunks, each with
+                `"chunkid"`, `"source"`, `"start_index"`, `"total_length"`
+                and `"embedding"` attributes.
+            appids (list[int], optional): The games to replace the chunks of.
+                If None, the `"source"` of each of the `chunks` is used.
+                Defaults to None.
         """
-        self._write(remove_cypher, appid=appid)
         # Validate the incoming chunk nodes
         validated_nodes = self._validate_node_fields(
             nodes=chunks,
             defaults={
                 "chunkid": None,
-                "source": appid,
+                "source": None,
                 "start_index": None,
                 "total_length": None,
                 "embedding": None,
             },
         )
-        # Add the chunk relationships and nodes
-        embed_cypher = """
-            MATCH (g:Game {appId: $appid})
+        if appids is None:
+            appids = list({chunk["source"] for chunk in validated_nodes})
+        # Remove any existing chunks for these games, then add the new
+        # chunk relationships and nodes, setting the vectors only once
+        cypher = """
+            UNWIND $appids as appid
+            OPTIONAL MATCH (:Game {appId: appid})-[:HAS_DESCRIPTION_CHUNK]->(old:DescriptionChunk)
+            DETACH DELETE old
+            WITH count(*) as removed
             UNWIND $chunks as chunk
-            MERGE (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk {
-                chunkId: chunk.chunkid,
-                source: chunk.source,
-                startIndex: chunk.start_index,
-                totalLength: chunk.total_length,
-                embedding: chunk.embedding
-            })
-            WITH c
-            CALL db.create.setNodeVectorProperty(c, "embedding", c.embedding)
-        """
-        self._write(embed_cypher, appid=appid, chunks=validated_nodes)
+            MATCH (g:Game {appId: chunk.source})
+            MERGE (c:DescriptionChunk {chunkId: chunk.chunkid})
+            SET
+                c.source = chunk.source,
+                c.startIndex = chunk.start_index,
+                c.totalLength = chunk.total_length
+            MERGE (g)-[:HAS_DESCRIPTION_CHUNK]->(c)
+            WITH c, chunk
+            CALL db.create.setNodeVectorProperty(c, "embedding", chunk.embedding)
+        """
+        self._write(cypher, appids=appids, chunks=validated_nodes)
+
+    def get_description_chunk_embeddings(
+        self, limit: int | None = None
+    ) -> pd.DataFrame:
+        """Retrieve the embeddings of all `DescriptionChunk` nodes.
+
+        Args:
+            limit (int, optional): Limits the amount of chunks returned.
+                If None, all chunks in the graph are returned.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: The result table with columns `chunkid`, `appid`,
+                `start_index`, `total_length` and `embedding`.
+        """
+        cypher = """
+            MATCH (c:DescriptionChunk)
+            WHERE c.embedding IS NOT NULL
+            RETURN
+                c.chunkId as chunkid,
+                c.source as appid,
+                c.startIndex as start_index,
+                c.totalLength as total_length,
+                c.embedding as embedding
+        """
+        return self._read(cypher, limit)
+
+    def iter_description_chunk_embeddings(
+        self, batch_size: int = 10000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Stream the embeddings of all `DescriptionChunk` nodes in
+        batches of `batch_size`, with the same columns as
+        `Neo4jClient.get_description_chunk_embeddings()`.
+        """
+        cypher = """
+            MATCH (c:DescriptionChunk)
+            WHERE c.embedding IS NOT NULL
+            RETURN
+                c.chunkId as chunkid,
+                c.source as appid,
+                c.startIndex as start_index,
+                c.totalLength as total_length,
+                c.embedding as embedding
+        """
+        yield from self._stream(cypher, batch_size)
+
+    def get_description_excerpts(self, chunks: list[dict[str, Any]]) -> pd.DataFrame:
+        """Resolve the game names and description excerpts of the `chunks`
+        in a single batched read, i.e. the results of a local vector search.
+
+        Args:
+            chunks (list[dict[str, Any]]): The list of chunks each with
+                `"appid"`, `"start_index"`, `"total_length"` and `"score"`,
+                and optionally the `"game_score"` of the chunk's game and the
+                `"query_index"` of the query it matched, e.g. in a batch.
+
+        Returns:
+            pd.DataFrame: The result table with columns `query_index`, `name`,
+                `appid`, `desc`, `score` and `game_score`, in order of
+                `query_index` then descending order of `game_score`
+                then `score`.
+        """
+        cypher = """
+            UNWIND $chunks as chunk
+            MATCH (g:Game {appId: chunk.appid})
+            RETURN
+                chunk.query_index as query_index,
+                g.name as name,
+                g.appId as appid,
+                substring(g.aboutTheGame, chunk.start_index, chunk.total_length) as desc,
+                chunk.score as score,
+                chunk.game_score as game_score
+            ORDER BY query_index, game_score DESC, score DESC
+        """
+        return self._read(cypher, chunks=chunks)
 
     def set_game_description_vector_index(
         self, embedding_dimension: int, **kwargs
     ) -> None:
         """Sets up the vector index for all `DescriptionChunk`
         nodes. Keyword arguments are the optional arguments in
-        `Neo4jClient._set_vector_index()`.
+        `Neo4jClient._set_vector_index()`, which override the
+        options of the client's `vector_index_config`.
         """
+        options = {**self.vector_index_config.index_options, **kwargs}
         self._set_vector_index(
             index_name="game_description_index",
             node="DescriptionChunk",
             embedding_dimension=embedding_dimension,
-            **kwargs,
+            **options,
         )
 
+    def set_game_embeddings(self, games: list[dict[str, Any]]) -> None:
+        """Set the game-level `embedding` of each `Game` node in `games`,
+        i.e. the pooled embedding of its description chunks, in the
+        compact vector property format.
+
+        Args:
+            games (list[dict[str, Any]]): The list of games each with
+                `"appid"` and `"embedding"` attributes.
+        """
+        validated_games = self._validate_node_fields(
+            nodes=games, defaults={"appid": None, "embedding": None}
+        )
+        cypher = """
+            UNWIND $games as game
+            MATCH (g:Game {appId: game.appid})
+            CALL db.create.setNodeVectorProperty(g, "embedding", game.embedding)
+        """
+        self._write(cypher, games=validated_games)
+
+    def iter_game_embeddings(
+        self, batch_size: int = 10000
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Stream the game-level embeddings of all `Game` nodes in batches
+        of `batch_size`, with columns `appid` and `embedding`.
+        """
+        cypher = """
+            MATCH (g:Game)
+            WHERE g.embedding IS NOT NULL
+            RETURN g.appId as appid, g.embedding as embedding
+        """
+        yield from self._stream(cypher, batch_size)
+
+    def set_game_vector_index(self, embedding_dimension: int, **kwargs) -> None:
+        """Sets up the vector index for the game-level embeddings of all
+        `Game` nodes. Keyword arguments are the optional arguments in
+        `Neo4jClient._set_vector_index()`, which override the
+        options of the client's `vector_index_config`.
+        """
+        options = {**self.vector_index_config.index_options, **kwargs}
+        self._set_vector_index(
+            index_name="game_index",
+            node="Game",
+            embedding_dimension=embedding_dimension,
+            **options,
+        )
+
+    def set_game_description_fulltext_index(self) -> None:
+        """Sets up the fulltext index for keyword search over the
+        `name` and `aboutTheGame` description of all `Game` nodes.
+        """
+        self._set_fulltext_index(
+            index_name="game_description_fulltext_index",
+            node="Game",
+            properties=["name", "aboutTheGame"],
+        )
+
+    def set_similar_games(
+        self, similar_games: list[dict[str, Any]], appids: list[int]
+    ) -> None:
+        """Replace the outgoing `SIMILAR_TO` relationships of the games
+        with `appids` by the `similar_games`, in a single bulk write.
+
+        Args:
+            similar_games (list[dict[str, Any]]): The list of
+                similarities each with `"appid"` of the source game,
+                `"similar_appid"` of its neighbor and the similarity `"score"`.
+            appids (list[int]): The games whose existing `SIMILAR_TO`
+                relationships are replaced, i.e. all sources
+                in `similar_games`.
+        """
+        validated_similar_games = self._validate_node_fields(
+            nodes=similar_games,
+            defaults={"appid": None, "similar_appid": None, "score": None},
+        )
+        cypher = """
+            UNWIND $appids as appid
+            OPTIONAL MATCH (:Game {appId: appid})-[old:SIMILAR_TO]->(:Game)
+            DELETE old
+            WITH count(*) as removed
+            UNWIND $similar_games as similar
+            MATCH (g:Game {appId: similar.appid})
+            MATCH (s:Game {appId: similar.similar_appid})
+            MERGE (g)-[r:SIMILAR_TO]->(s)
+            SET r.score = similar.score
+        """
+        self._write(cypher, appids=appids, similar_games=validated_similar_games)
+
+    def get_similar_games(self, name: str, n_games: int = 10) -> pd.DataFrame:
+        """Find the game that best matches `name`, see `search_game_by_name()`,
+        and its precomputed most similar games via `SIMILAR_TO`
+        relationships, in a single query.
+
+        Args:
+            name (str): The name of the game to search for.
+            n_games (int, optional): The max number of similar games.
+                Defaults to 10.
+
+        Returns:
+            pd.DataFrame: The table of similar games, with "matched_appid"
+                and "matched_name" of the best matched game, and "appid",
+                "name" and "score" of each similar game, in descending
+                order of "score". Empty if no game matched, and a single row
+                with null similar game values if it has no similar games.
+        """
+        cypher = """
+            WITH apoc.text.clean($name) as clean_name
+            MATCH (g:Game)
+            WHERE apoc.text.fuzzyMatch(apoc.text.clean(g.name), clean_name) = TRUE
+            WITH g, apoc.text.distance(apoc.text.clean(g.name), clean_name) as distance
+            ORDER BY distance ASC
+            LIMIT 1
+            OPTIONAL MATCH (g)-[r:SIMILAR_TO]->(s:Game)
+            WITH g, r, s
+            ORDER BY r.score DESC
+            LIMIT $n_games
+            RETURN
+                g.appId as matched_appid,
+                g.name as matched_name,
+                s.appId as appid,
+                s.name as name,
+                r.score as score
+        """
+        return self._read(cypher, name=name, n_games=n_games)
+
     def search_game_by_name(self, name: str) -> pd.DataFrame:
         """Searches all `Game` nodes for those that closely match
         the provided `name` which may not be exact. The method requires
@@ -652,34 +1268,519 @@ class Neo4jClient(object):
                 g.appId as appid,
                 g.name as name,
                 apoc.text.distance(apoc.text.clean(g.name), clean_name) as distance
+            ORDER BY distance ASC
         """
-        result = self._read(cypher, name=name)
-        return result.sort_values(by="distance", ignore_index=True)
+        return self._read(cypher, name=name)
+
+    def get_game_description_by_name(self, name: str) -> pd.DataFrame:
+        """Find the `Game` that best matches the provided `name`, see
+        `search_game_by_name()`, and its description in a single query,
+        ranking the matches server-side.
+
+        Args:
+            name (str): The name of the game to search for.
+
+        Returns:
+            pd.DataFrame: A single row table with the "appid", "name",
+                "about_the_game" description (null if not populated) and
+                "chunks", the `[start_index, length]` spans of its description
+                chunks, most representative first, of the best matched game,
+                or an empty table if no game matched.
+        """
+        cypher = """
+            WITH apoc.text.clean($name) as clean_name
+            MATCH (g:Game)
+            WHERE apoc.text.fuzzyMatch(apoc.text.clean(g.name), clean_name) = TRUE
+            WITH g, apoc.text.distance(apoc.text.clean(g.name), clean_name) as distance
+            ORDER BY distance ASC
+            LIMIT 1
+            RETURN
+                g.appId as appid,
+                g.name as name,
+                g.aboutTheGame as about_the_game,
+                {0} as chunks
+        """.format(
+            self._ranked_chunks_cypher("g")
+        )
+        return self._read(cypher, name=name)
+
+    def get_game_descriptions_by_names(self, names: list[str]) -> pd.DataFrame:
+        """Find the `Game` that best matches each of the provided `names`,
+        see `get_game_description_by_name()`, in a single query.
+
+        Args:
+            names (list[str]): The names of the games to search for.
+
+        Returns:
+            pd.DataFrame: The result table with one row per matched name and
+                columns `query_index`, i.e. the index of the name in `names`,
+                "appid", "name", "about_the_game" (null if not populated) and
+                "chunks", see `get_game_description_by_name()`, in order
+                of `query_index`. Names which matched no game
+                have no row.
+        """
+        cypher = """
+            UNWIND range(0, size($names) - 1) as query_index
+            CALL {{
+                WITH query_index
+                WITH apoc.text.clean($names[query_index]) as clean_name
+                MATCH (g:Game)
+                WHERE apoc.text.fuzzyMatch(apoc.text.clean(g.name), clean_name) = TRUE
+                WITH g, apoc.text.distance(apoc.text.clean(g.name), clean_name) as distance
+                ORDER BY distance ASC
+                LIMIT 1
+                RETURN g
+            }}
+            RETURN
+                query_index,
+                g.appId as appid,
+                g.name as name,
+                g.aboutTheGame as about_the_game,
+                {0} as chunks
+            ORDER BY query_index
+        """.format(
+            self._ranked_chunks_cypher("g")
+        )
+        return self._read(cypher, names=names)
+
+    @staticmethod
+    def _ranked_chunks_cypher(game: str) -> str:
+        """The Cypher collecting the `[start_index, length]` spans of the
+        description chunks of the `game` variable, most representative first,
+        i.e. by the similarity of each chunk to the game-level embedding.
+        """
+        return """
+            COLLECT {{
+                MATCH ({0})-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+                WITH c, vector.similarity.cosine(c.embedding, {0}.embedding) as score
+                ORDER BY coalesce(score, 0.0) DESC, c.startIndex ASC
+                RETURN [c.startIndex, c.totalLength]
+            }}
+        """.format(
+            game
+        )
+
+    @staticmethod
+    def _prefilter_games_cypher(filters: SearchFilters) -> str:
+        """The Cypher matching the distinct candidate games `g` of
+        a prefiltered search, see `SearchFilters`.
+        """
+        if filters.friend_hops:
+            cypher = """
+                MATCH (:Primary)-[:HAS_FRIEND*1..{0}]-(u:User)
+                WHERE NOT u:Primary
+                WITH DISTINCT u
+                MATCH (u)-[:OWNS_GAME]->(g:Game)
+            """.format(
+                int(filters.friend_hops)
+            )
+        else:
+            cypher = """
+                MATCH (n:Genre)<-[:HAS_GENRE]-(g:Game)
+                WHERE n.genreId IN $genre_ids
+            """
+        cypher += """
+            WITH DISTINCT g
+        """
+        if filters.exclude_owned:
+            cypher += """
+            WHERE NOT EXISTS { (:Primary)-[:OWNS_GAME]->(g) }
+            """
+        return cypher
 
     def game_descriptions_semantic_search(
         self,
         embedding: list[float],
         n_neighbors: int,
         min_score: float,
+        oversampling: float | None = None,
     ) -> pd.DataFrame:
-        """Semantic similarity search with the game description embeddings"""
+        """Semantic similarity search with the game description embeddings.
+
+        Args:
+            embedding (list[float]): The query embedding vector.
+            n_neighbors (int): The number of description chunks to return.
+            min_score (float): The minimum similarity score of returned chunks.
+            oversampling (float, optional): Retrieve this many times more
+                candidates than `n_neighbors` from the index, which are then
+                re-ranked by their exact similarity. If None, uses the
+                `oversampling` of the client's `vector_index_config`.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: The result table with columns `name`, `appid`,
+                `desc` and `score`, in descending order of `score`.
+        """
+        if oversampling is None:
+            oversampling = self.vector_index_config.oversampling
+        n_candidates = max(n_neighbors, math.ceil(n_neighbors * oversampling))
         cypher = """
             CALL db.index.vector.queryNodes(
-                "game_description_index", 
-                $n_neighbors, 
+                "game_description_index",
+                $n_candidates,
                 $embedding
-            ) YIELD node, score
+            ) YIELD node
+            WITH node, vector.similarity.cosine(node.embedding, $embedding) as score
             WHERE score >= $min_score
+            WITH node, score
+            ORDER BY score DESC
+            LIMIT $n_neighbors
             MATCH (g:Game {appId: node.source})
             RETURN 
                 g.name as name, 
                 g.appId as appid,
                 substring(g.aboutTheGame, node.startIndex, node.totalLength) as desc, 
                 score
+            ORDER BY score DESC
         """
         return self._read(
             cypher,
             embedding=embedding,
+            n_candidates=n_candidates,
             n_neighbors=n_neighbors,
             min_score=min_score,
         )
+
+    def games_semantic_search(
+        self,
+        embedding: list[float],
+        n_games: int,
+        n_chunks: int,
+        min_score: float,
+        oversampling: float | None = None,
+        filters: SearchFilters | None = None,
+    ) -> pd.DataFrame:
+        """Coarse-to-fine semantic similarity search, first finding the top
+        `n_games` by their game-level embeddings, then the best matching
+        `n_chunks` description chunks within only those games. The result
+        size is therefore bounded regardless of the amount of chunks per game.
+
+        Args:
+            embedding (list[float]): The query embedding vector.
+            n_games (int): The number of games to return.
+            n_chunks (int): The max number of description chunks per game.
+            min_score (float): The minimum game-level similarity score
+                of returned games.
+            oversampling (float, optional): Retrieve this many times more
+                candidates than `n_games` from the index, which are then
+                re-ranked by their exact similarity. If None, uses the
+                `oversampling` of the client's `vector_index_config`.
+                Defaults to None.
+            filters (SearchFilters, optional): Restrict the search to
+                a subset of the games. Defaults to None.
+
+        Returns:
+            pd.DataFrame: The result table with one row per chunk and
+                columns `name`, `appid`, `desc`, `score` and `game_score`,
+                in descending order of `game_score` then `score`.
+        """
+        if oversampling is None:
+            oversampling = self.vector_index_config.oversampling
+        n_candidates = max(n_games, math.ceil(n_games * oversampling))
+        filters = filters or SearchFilters()
+        if filters.prefilter:
+            # Exact scoring of the prefiltered games
+            cypher = self._prefilter_games_cypher(filters)
+            if filters.friend_hops and filters.genre_ids:
+                cypher += """
+                WITH g
+                WHERE EXISTS {
+                    (g)-[:HAS_GENRE]->(n:Genre) WHERE n.genreId IN $genre_ids
+                }
+                """
+            cypher += """
+                WITH g AS node
+                WHERE node.embedding IS NOT NULL
+            """
+        elif filters.exclude_owned:
+            # Make up for the owned games removed after the index query,
+            # with a bounded number of extra candidates
+            cypher = """
+                OPTIONAL MATCH (:Primary)-[:OWNS_GAME]->(owned:Game)
+                WITH count(owned) as n_owned
+                CALL db.index.vector.queryNodes(
+                    "game_index",
+                    $n_candidates + CASE
+                        WHEN n_owned < $max_owned_candidates THEN n_owned
+                        ELSE $max_owned_candidates
+                    END,
+                    $embedding
+                ) YIELD node
+                WITH node
+                WHERE NOT EXISTS { (:Primary)-[:OWNS_GAME]->(node) }
+            """
+        else:
+            cypher = """
+                CALL db.index.vector.queryNodes(
+                    "game_index",
+                    $n_candidates,
+                    $embedding
+                ) YIELD node
+            """
+        cypher += """
+            WITH node as g, vector.similarity.cosine(node.embedding, $embedding) as game_score
+            WHERE game_score >= $min_score
+            WITH g, game_score
+            ORDER BY game_score DESC
+            LIMIT $n_games
+            CALL {
+                WITH g
+                MATCH (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+                WITH c, vector.similarity.cosine(c.embedding, $embedding) as score
+                ORDER BY score DESC
+                LIMIT $n_chunks
+                RETURN c, score
+            }
+            RETURN
+                g.name as name,
+                g.appId as appid,
+                substring(g.aboutTheGame, c.startIndex, c.totalLength) as desc,
+                score,
+                game_score
+            ORDER BY game_score DESC, score DESC
+        """
+        return self._read(
+            cypher,
+            embedding=embedding,
+            n_candidates=n_candidates,
+            n_games=n_games,
+            n_chunks=n_chunks,
+            min_score=min_score,
+            genre_ids=filters.genre_ids,
+            max_owned_candidates=filters.max_owned_candidates,
+        )
+
+    def games_semantic_search_batch(
+        self,
+        embeddings: list[list[float]],
+        n_games: int,
+        n_chunks: int,
+        min_score: float,
+        oversampling: float | None = None,
+    ) -> pd.DataFrame:
+        """Coarse-to-fine semantic similarity search, see
+        `games_semantic_search()`, for each of the query `embeddings`
+        in a single query.
+
+        Args:
+            embeddings (list[list[float]]): The query embedding vectors.
+            n_games (int): The number of games to return per query.
+            n_chunks (int): The max number of description chunks per game.
+            min_score (float): The minimum game-level similarity score
+                of returned games.
+            oversampling (float, optional): Retrieve this many times more
+                candidates than `n_games` from the index, which are then
+                re-ranked by their exact similarity. If None, uses the
+                `oversampling` of the client's `vector_index_config`.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame: The result table with one row per chunk and
+                columns `query_index`, i.e. the index of the query embedding
+                in `embeddings`, `name`, `appid`, `desc`, `score` and
+                `game_score`, in order of `query_index` then descending
+                order of `game_score` then `score`.
+        """
+        if oversampling is None:
+            oversampling = self.vector_index_config.oversampling
+        n_candidates = max(n_games, math.ceil(n_games * oversampling))
+        cypher = """
+            UNWIND range(0, size($embeddings) - 1) as query_index
+            CALL {
+                WITH query_index
+                WITH $embeddings[query_index] as embedding
+                CALL db.index.vector.queryNodes(
+                    "game_index",
+                    $n_candidates,
+                    embedding
+                ) YIELD node
+                WITH
+                    node as g,
+                    vector.similarity.cosine(node.embedding, embedding) as game_score,
+                    embedding
+                WHERE game_score >= $min_score
+                WITH g, game_score, embedding
+                ORDER BY game_score DESC
+                LIMIT $n_games
+                CALL {
+                    WITH g, embedding
+                    MATCH (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+                    WITH c, vector.similarity.cosine(c.embedding, embedding) as score
+                    ORDER BY score DESC
+                    LIMIT $n_chunks
+                    RETURN c, score
+                }
+                RETURN g, c, score, game_score
+            }
+            RETURN
+                query_index,
+                g.name as name,
+                g.appId as appid,
+                substring(g.aboutTheGame, c.startIndex, c.totalLength) as desc,
+                score,
+                game_score
+            ORDER BY query_index, game_score DESC, score DESC
+        """
+        return self._read(
+            cypher,
+            embeddings=embeddings,
+            n_candidates=n_candidates,
+            n_games=n_games,
+            n_chunks=n_chunks,
+            min_score=min_score,
+        )
+
+    def fulltext_games_search(
+        self, keywords: str, n_games: int, n_chunks: int
+    ) -> pd.DataFrame:
+        """Keyword search of games by the BM25 relevance of their name and
+        description, without any embedding, e.g. as a cheaper fallback of
+        the semantic search when the embedding model is overloaded.
+
+        Args:
+            keywords (str): The free text to search for, matching any term.
+            n_games (int): The number of games to return.
+            n_chunks (int): The max number of description chunks per game,
+                the first chunks of the description.
+
+        Returns:
+            pd.DataFrame: The result table with one row per chunk and
+                columns `name`, `appid`, `desc` and `game_score`, i.e. the
+                BM25 relevance, in descending order of `game_score`, then
+                in order of the chunks in the description.
+        """
+        query = utils.escape_lucene_query(keywords)
+        if not query:
+            return pd.DataFrame()
+        cypher = """
+            CALL db.index.fulltext.queryNodes(
+                "game_description_fulltext_index",
+                $query,
+                {limit: $n_games}
+            ) YIELD node, score
+            WITH node as g, score as game_score
+            CALL {
+                WITH g
+                MATCH (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+                WITH c
+                ORDER BY c.startIndex ASC
+                LIMIT $n_chunks
+                RETURN c
+            }
+            RETURN
+                g.name as name,
+                g.appId as appid,
+                substring(g.aboutTheGame, c.startIndex, c.totalLength) as desc,
+                game_score
+            ORDER BY game_score DESC, c.startIndex ASC
+        """
+        return self._read(cypher, query=query, n_games=n_games, n_chunks=n_chunks)
+
+    def hybrid_games_search(
+        self,
+        embedding: list[float],
+        keywords: str,
+        n_games: int,
+        n_chunks: int,
+        min_score: float,
+        rrf_k: int = 60,
+        oversampling: float | None = None,
+    ) -> pd.DataFrame:
+        """Hybrid keyword and semantic similarity search in a single query.
+        The top games by their game-level embeddings and by BM25 keyword
+        relevance of their name and description are combined with
+        reciprocal rank fusion, i.e. `sum(1 / (rrf_k + rank))` over both
+        rankings. The best matching `n_chunks` description chunks of the top
+        `n_games` with description chunks are then returned as in
+        `games_semantic_search()`.
+
+        Args:
+            embedding (list[float]): The query embedding vector.
+            keywords (str): The free text keyword query. Lucene syntax is
+                escaped, such that games matching any of the terms are ranked.
+            n_games (int): The number of games to return.
+            n_chunks (int): The max number of description chunks per game.
+            min_score (float): The minimum game-level similarity score
+                of the games ranked by the semantic search.
+            rrf_k (int, optional): The rank constant of the fusion, larger
+                values reduce the weight of the top ranks. Defaults to 60.
+            oversampling (float, optional): Retrieve this many times more
+                candidates than `n_games` from each index before fusion.
+                If None, uses the `oversampling` of the client's
+                `vector_index_config`. Defaults to None.
+
+        Returns:
+            pd.DataFrame: The result table with one row per chunk and
+                columns `name`, `appid`, `desc`, `score` and `game_score`,
+                i.e. the fused score, in descending order of `game_score`
+                then `score`.
+        """
+        query = utils.escape_lucene_query(keywords)
+        if not query:
+            return self.games_semantic_search(
+                embedding=embedding,
+                n_games=n_games,
+                n_chunks=n_chunks,
+                min_score=min_score,
+                oversampling=oversampling,
+            )
+        if oversampling is None:
+            oversampling = self.vector_index_config.oversampling
+        n_candidates = max(n_games, math.ceil(n_games * oversampling))
+        # NOTE: Keyword hits without embedded chunks have no excerpts to return,
+        # so are removed before the limit, rather than dropped after it
+        cypher = """
+            CALL {
+                CALL db.index.vector.queryNodes(
+                    "game_index",
+                    $n_candidates,
+                    $embedding
+                ) YIELD node
+                WITH node, vector.similarity.cosine(node.embedding, $embedding) as score
+                WHERE score >= $min_score
+                WITH node, score
+                ORDER BY score DESC
+                WITH collect(node) as ranked
+                UNWIND range(0, size(ranked) - 1) as rank
+                RETURN ranked[rank] as g, 1.0 / ($rrf_k + rank + 1) as rrf
+                UNION ALL
+                CALL db.index.fulltext.queryNodes(
+                    "game_description_fulltext_index",
+                    $query,
+                    {limit: $n_candidates}
+                ) YIELD node
+                WITH collect(node) as ranked
+                UNWIND range(0, size(ranked) - 1) as rank
+                RETURN ranked[rank] as g, 1.0 / ($rrf_k + rank + 1) as rrf
+            }
+            WITH g, sum(rrf) as game_score
+            WHERE EXISTS { (g)-[:HAS_DESCRIPTION_CHUNK]->(:DescriptionChunk) }
+            WITH g, game_score
+            ORDER BY game_score DESC
+            LIMIT $n_games
+            CALL {
+                WITH g
+                MATCH (g)-[:HAS_DESCRIPTION_CHUNK]->(c:DescriptionChunk)
+                WITH c, vector.similarity.cosine(c.embedding, $embedding) as score
+                ORDER BY score DESC
+                LIMIT $n_chunks
+                RETURN c, score
+            }
+            RETURN
+                g.name as name,
+                g.appId as appid,
+                substring(g.aboutTheGame, c.startIndex, c.totalLength) as desc,
+                score,
+                game_score
+            ORDER BY game_score DESC, score DESC
+        """
+        return self._read(
+            cypher,
+            embedding=embedding,
+            query=query,
+            n_candidates=n_candidates,
+            n_games=n_games,
+            n_chunks=n_chunks,
+            min_score=min_score,
+            rrf_k=rrf_k,
+        )
@@ -1,20 +1,49 @@
 from __future__ import annotations
 from typing import Any
+import asyncio
 
+import numpy as np
 from loguru import logger
+from pydantic import PrivateAttr, model_validator
 from langchain_ollama import OllamaEmbeddings
 
-from vapor.core.utils import utils
+from vapor.core.utils import utils, metrics, tracing
+from vapor.core.utils.cache import LRUCache
+from vapor.core.utils.batching import MicroBatcher
+from vapor.core.utils.singleflight import SingleFlight
 
 DEFAULT_OLLAMA_EMBEDDING_MODEL = "embeddinggemma"
 
 EMBEDDING_PARAMS = {
     "embeddinggemma": {
         "embedding_size": 768,
+        # Matryoshka (MRL) output sizes the model was trained to support
+        "truncation_sizes": [768, 512, 256, 128],
     }
 }
 
 
+def truncate_embeddings(
+    embeddings: list[list[float]] | np.ndarray, dimension: int
+) -> np.ndarray:
+    """Truncate each of the `embeddings` to the first `dimension`
+    values and renormalize them to unit length, as required by
+    Matryoshka representation learning (MRL) models.
+
+    Args:
+        embeddings (list[list[float]] | np.ndarray): The full length
+            embedding vectors, one per row.
+        dimension (int): The output dimension to truncate to.
+
+    Returns:
+        np.ndarray: The truncated and normalized `float32` vectors.
+    """
+    vectors = np.array(embeddings, dtype=np.float32, ndmin=2)[:, :dimension]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms > 0, norms, 1.0)
+    return vectors
+
+
 class VaporEmbeddings(OllamaEmbeddings):
     """Vapor model integration with `OllamaEmbeddings`
 
@@ -22,6 +51,34 @@ class VaporEmbeddings(OllamaEmbeddings):
     and ability to initialize from environment.
     """
 
+    output_dimension: int | None = None
+    """Reduced output dimension for Matryoshka capable models. If None,
+    the full `embedding_size` of the model is used."""
+
+    query_cache_max_bytes: int = 0
+    """Max total size in bytes of the LRU cache of query embeddings,
+    keyed by model and whitespace normalized text. 0 disables the cache."""
+
+    query_cache_ttl: float | None = None
+    """Time to live in seconds of cached query embeddings. If None,
+    they are only evicted when the cache is full."""
+
+    query_batch_size: int = 1
+    """Max number of concurrent `aembed_query` texts sent to the model together
+    in a single `aembed_documents` request. 1 disables micro-batching."""
+
+    query_batch_wait: float = 0.005
+    """Max time in seconds to wait for more concurrent `aembed_query` texts
+    after the first text of a batch."""
+
+    _query_cache: LRUCache | None = PrivateAttr(default=None)
+    _query_batcher: MicroBatcher[str, list[float]] | None = PrivateAttr(default=None)
+    _query_batcher_loop: asyncio.AbstractEventLoop | None = PrivateAttr(default=None)
+    # Concurrent `aembed_query` calls of the same text share one request
+    _query_flight: SingleFlight[tuple[str, str], list[float]] = PrivateAttr(
+        default_factory=lambda: SingleFlight("embed_query")
+    )
+
     @classmethod
     def from_env(cls, **kwargs) -> VaporEmbeddings:
         model = utils.get_env_var(
@@ -35,6 +92,24 @@ class VaporEmbeddings(OllamaEmbeddings):
             ollama_hostname = "localhost"
         ollama_port = utils.get_env_var("OLLAMA_PORT", "11434")
         base_url = f"http://{ollama_hostname}:{ollama_port}"
+        # NOTE: 0 (or unset) indicates the model's full embedding size
+        output_dimension = int(utils.get_env_var("OLLAMA_EMBEDDING_DIMENSION", "0"))
+        kwargs.setdefault("output_dimension", output_dimension or None)
+        kwargs.setdefault(
+            "query_cache_max_bytes",
+            int(utils.get_env_var("OLLAMA_EMBEDDING_CACHE_MAX_BYTES", "16000000")),
+        )
+        # NOTE: 0 indicates no expiry
+        query_cache_ttl = float(utils.get_env_var("OLLAMA_EMBEDDING_CACHE_TTL", "3600"))
+        kwargs.setdefault("query_cache_ttl", query_cache_ttl or None)
+        kwargs.setdefault(
+            "query_batch_size",
+            int(utils.get_env_var("OLLAMA_EMBEDDING_BATCH_SIZE", "16")),
+        )
+        kwargs.setdefault(
+            "query_batch_wait",
+            float(utils.get_env_var("OLLAMA_EMBEDDING_BATCH_WAIT_MS", "5")) / 1000,
+        )
         logger.info(f"Initializing embedding model={model} @ {base_url}")
         return cls(model=model, base_url=base_url, **kwargs)
 
@@ -42,9 +117,137 @@ class VaporEmbeddings(OllamaEmbeddings):
         return EMBEDDING_PARAMS[self.model][param]
 
     @property
-    def embedding_size(self) -> int:
+    def native_embedding_size(self) -> int:
+        """The full length of the embedding vectors produced by the model"""
         return self._get_param("embedding_size")
 
+    @property
+    def embedding_size(self) -> int:
+        """The length of the embedding vectors returned by this embedder,
+        i.e. the `output_dimension` if set, otherwise the full size.
+        """
+        if self.output_dimension is None:
+            return self.native_embedding_size
+        return self.output_dimension
+
+    @model_validator(mode="after")
+    def _validate_output_dimension(self) -> VaporEmbeddings:
+        if self.output_dimension is None:
+            return self
+        if self.model not in EMBEDDING_PARAMS:
+            raise ValueError(
+                f"output_dimension={self.output_dimension} is not supported"
+                + f" by model={self.model} of unknown embedding size,"
+                + f" must be one of: {list(EMBEDDING_PARAMS)}"
+            )
+        supported_sizes = EMBEDDING_PARAMS[self.model].get(
+            "truncation_sizes", [self.native_embedding_size]
+        )
+        if self.output_dimension not in supported_sizes:
+            raise ValueError(
+                f"output_dimension={self.output_dimension} is not supported"
+                + f" by model={self.model}, must be one of: {supported_sizes}"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def _set_query_cache(self) -> VaporEmbeddings:
+        if self.query_cache_max_bytes > 0:
+            self._query_cache = LRUCache(
+                max_bytes=self.query_cache_max_bytes, ttl=self.query_cache_ttl
+            )
+        return self
+
+    @property
+    def query_cache_stats(self) -> dict[str, int] | None:
+        """The hit/miss counters and size of the query embeddings cache,
+        None if the cache is disabled.
+        """
+        return None if self._query_cache is None else self._query_cache.stats
+
+    def _query_cache_key(self, text: str) -> tuple[str, str]:
+        return (self.model, " ".join(text.split()))
+
+    def cached_query(self, text: str) -> list[float] | None:
+        """The cached embedding of the query `text`, None if it is not cached,
+        such that callers can skip limits meant for requests to the model.
+        """
+        if self._query_cache is None:
+            return None
+        key = self._query_cache_key(text)
+        # NOTE: Checked first, such that a miss is only counted by `aembed_query`
+        if key not in self._query_cache:
+            return None
+        embedding = self._query_cache.get(key)
+        return None if embedding is None else list(embedding)
+
+    def _truncate(self, embeddings: list[list[float]]) -> list[list[float]]:
+        """Truncate and renormalize `embeddings` to the `output_dimension`"""
+        if self.embedding_size == self.native_embedding_size:
+            return embeddings
+        return truncate_embeddings(embeddings, self.embedding_size).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        metrics.EMBEDDING_BATCH_SIZE.labels(self.model).observe(len(texts))
+        with (
+            metrics.observe_duration(metrics.EMBEDDING_DURATION.labels(self.model)),
+            tracing.span("embedding.documents", model=self.model, texts=len(texts)),
+        ):
+            embeddings = super().embed_documents(texts)
+        return self._truncate(embeddings)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        metrics.EMBEDDING_BATCH_SIZE.labels(self.model).observe(len(texts))
+        with (
+            metrics.observe_duration(metrics.EMBEDDING_DURATION.labels(self.model)),
+            tracing.span("embedding.documents", model=self.model, texts=len(texts)),
+        ):
+            embeddings = await super().aembed_documents(texts)
+        return self._truncate(embeddings)
+
+    def embed_query(self, text: str) -> list[float]:
+        if self._query_cache is None:
+            return super().embed_query(text)
+        key = self._query_cache_key(text)
+        embedding = self._query_cache.get(key)
+        if embedding is None:
+            embedding = super().embed_query(text)
+            self._query_cache.set(key, embedding)
+        # Copy, such that callers can never modify the cached embedding
+        return list(embedding)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._query_cache_key(text)
+        if self._query_cache is None:
+            embedding, _ = await self._query_flight.do(
+                key, lambda: self._aembed_query(text)
+            )
+            return list(embedding)
+        embedding = self._query_cache.get(key)
+        if embedding is None:
+            embedding, _ = await self._query_flight.do(
+                key, lambda: self._aembed_query(text)
+            )
+            self._query_cache.set(key, embedding)
+        return list(embedding)
+
+    async def _aembed_query(self, text: str) -> list[float]:
+        """Embed the query `text`, micro-batched with other concurrent
+        queries if `query_batch_size` is larger than 1.
+        """
+        if self.query_batch_size <= 1:
+            return await super().aembed_query(text)
+        # NOTE: A batcher can only be used from the event loop it was created in
+        loop = asyncio.get_running_loop()
+        if self._query_batcher is None or self._query_batcher_loop is not loop:
+            self._query_batcher = MicroBatcher(
+                self.aembed_documents,
+                max_batch_size=self.query_batch_size,
+                max_wait=self.query_batch_wait,
+            )
+            self._query_batcher_loop = loop
+        return await self._query_batcher.submit(text)
+
     def pull(self) -> None:
         # Get all available models with ollama client
         list_response = self._client.list()
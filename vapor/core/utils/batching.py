@@ -0,0 +1,100 @@
+"""Micro-batching of concurrent asynchronous requests"""
+
+from __future__ import annotations
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+import asyncio
+
+from loguru import logger
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class MicroBatcher(Generic[K, V]):
+    """Collects the items submitted concurrently within `max_wait` seconds,
+    up to `max_batch_size` distinct items, and processes them with a single
+    call of `process_batch`, fanning the results back out to each waiting
+    caller. Identical items submitted to the same batch are processed once.
+
+    Must be used from a single event loop, the loop of the first `submit`.
+
+    Args:
+        process_batch (Callable[[list[K]], Awaitable[list[V]]]): Processes
+            a batch of items, returning one result per item in order.
+        max_batch_size (int, optional): The max number of distinct items
+            per batch, a full batch is processed immediately. Defaults to 16.
+        max_wait (float, optional): The max time in seconds to wait for more
+            items after the first item of a batch. Defaults to 0.005.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[K]], Awaitable[list[V]]],
+        max_batch_size: int = 16,
+        max_wait: float = 0.005,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size={max_batch_size} must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.n_batches = 0
+        self.n_items = 0
+        self._pending: dict[K, list[asyncio.Future[V]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: K) -> V:
+        """Submit `item` to the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[V] = loop.create_future()
+        self._pending.setdefault(item, []).append(future)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Start processing all pending items as a batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._process(batch))
+        # NOTE: Keep a reference, such that the task is not garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: dict[K, list[asyncio.Future[V]]]) -> None:
+        items = list(batch)
+        self.n_batches += 1
+        self.n_items += len(items)
+        try:
+            results = await self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch of {len(items)} items returned {len(results)} results"
+                )
+            for item, result in zip(items, results):
+                for future in batch[item]:
+                    # Callers may have been cancelled in the meantime
+                    if not future.done():
+                        future.set_result(result)
+        except Exception as e:
+            logger.warning(f"Failed to process batch of {len(items)} items: {e}")
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+        finally:
+            # Cancelled, e.g. at shutdown, fail the waiting callers rather
+            # than leaving them waiting forever
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(
+                            RuntimeError(f"Batch of {len(items)} items was cancelled")
+                        )
@@ -0,0 +1,179 @@
+"""Bounded in-memory caches"""
+
+from __future__ import annotations
+from typing import Any, Callable, Hashable
+from collections import OrderedDict
+import sys
+import threading
+import time
+
+
+def sizeof(value: Any) -> int:
+    """Approximate size in bytes of `value`, including the items of
+    (nested) lists, tuples and dicts, e.g. an embedding vector.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return size
+
+
+class LRUCache(object):
+    """Thread-safe least recently used cache, bounded by the total size in
+    bytes of its values as well as the number of entries. Entries expire
+    `ttl` seconds after being set.
+
+    Args:
+        max_bytes (int | None, optional): The max total size of the cached
+            values, as measured by `sizeof`. If None, unbounded.
+            Defaults to None.
+        max_entries (int | None, optional): The max number of entries.
+            If None, unbounded. Defaults to None.
+        ttl (float | None, optional): Time to live of each entry in seconds.
+            If None, entries never expire. Defaults to None.
+        sizeof (Callable[[Any], int], optional): Computes the size in bytes
+            of a value. Defaults to `sizeof`.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+        sizeof: Callable[[Any], int] = sizeof,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        # key -> (value, size, expiry)
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float | None]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._get_entry(key) is not None
+
+    def _get_entry(self, key: Hashable) -> tuple[Any, int, float | None] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expiry = entry[2]
+        if expiry is not None and time.monotonic() >= expiry:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.nbytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value cached for `key`, marking it as most recently used,
+        or `default` if it is not cached or has expired.
+        """
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache `value` for `key`, evicting the least recently used entries
+        as needed. Values larger than `max_bytes` are not cached.
+        """
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expiry)
+            self.nbytes += size
+            while (self.max_bytes is not None and self.nbytes > self.max_bytes) or (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """The hit/miss/eviction counters and current size of the cache"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+        }
+
+
+class VersionedLRUCache(LRUCache):
+    """`LRUCache` of results derived from versioned data, which is cleared
+    entirely when the version returned by `get_version` changes. The version
+    is checked at most once every `version_check_interval` seconds, on `get`.
+
+    Args:
+        get_version (Callable[[], Hashable]): Returns the current version
+            of the data, e.g. `Neo4jClient.get_graph_version`.
+        version_check_interval (float, optional): The min time in seconds
+            between version checks. Defaults to 5.0.
+        **kwargs: The arguments of `LRUCache`.
+    """
+
+    def __init__(
+        self,
+        get_version: Callable[[], Hashable],
+        version_check_interval: float = 5.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.get_version = get_version
+        self.version_check_interval = version_check_interval
+        self.version: Hashable | None = None
+        self._last_version_check: float | None = None
+
+    def validate(self, force: bool = False) -> bool:
+        """Check the current version, unless checked within the
+        `version_check_interval` or `force`d, and clear the cache if it
+        changed. Returns True if the cache was cleared.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_version_check is not None
+            and now - self._last_version_check < self.version_check_interval
+        ):
+            return False
+        self._last_version_check = now
+        version = self.get_version()
+        if version == self.version:
+            return False
+        self.clear()
+        self.version = version
+        return True
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self.validate()
+        return super().get(key, default)
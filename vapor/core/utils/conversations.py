@@ -0,0 +1,105 @@
+"""Persistent conversation history of the chat, stored in SQLite"""
+
+from __future__ import annotations
+from pathlib import Path
+import json
+import sqlite3
+
+from loguru import logger
+from langchain_core.messages import (
+    BaseMessage,
+    messages_from_dict,
+    messages_to_dict,
+    trim_messages,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+
+from vapor.core.utils import utils
+
+
+class ConversationStore(object):
+    """Stores the messages of each conversation thread in a SQLite database,
+    checkpointed after each turn, such that a conversation (including the
+    results of its tool calls) can be continued after restarting the chat.
+
+    Args:
+        path (str | Path): The SQLite database file, or ":memory:".
+        max_tokens (int | None, optional): The max number of (approximate)
+            tokens of the history loaded for a thread. Older messages are
+            dropped, starting from a human message. If None, unbounded.
+            Defaults to None.
+    """
+
+    def __init__(self, path: str | Path, max_tokens: int | None = None):
+        self.path = path
+        self.max_tokens = max_tokens
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    thread_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    PRIMARY KEY (thread_id, position)
+                )
+                """)
+
+    @classmethod
+    def from_env(cls, max_tokens: int | None = None) -> ConversationStore:
+        """Initialize a `ConversationStore` from default environment variables"""
+        data_path = utils.get_env_var("VAPOR_DATA_PATH", "./data")
+        path = Path(data_path) / "chat" / "conversations.db"
+        logger.info(f"Loading conversations @ {path}")
+        return cls(path=path, max_tokens=max_tokens)
+
+    def load(self, thread_id: str) -> list[BaseMessage]:
+        """Load the messages of the thread `thread_id`, trimmed to the most
+        recent `max_tokens`. Returns an empty list for a new thread.
+        """
+        rows = self._connection.execute(
+            "SELECT message FROM messages WHERE thread_id = ? ORDER BY position",
+            (thread_id,),
+        ).fetchall()
+        messages = messages_from_dict([json.loads(message) for message, in rows])
+        if self.max_tokens is None or not messages:
+            return messages
+        return trim_messages(
+            messages,
+            max_tokens=self.max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+            include_system=True,
+        )
+
+    def save(self, thread_id: str, messages: list[BaseMessage]) -> None:
+        """Replace the messages of the thread `thread_id` with `messages`"""
+        rows = [
+            (thread_id, position, json.dumps(message))
+            for position, message in enumerate(messages_to_dict(messages))
+        ]
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM messages WHERE thread_id = ?", (thread_id,)
+            )
+            self._connection.executemany(
+                "INSERT INTO messages (thread_id, position, message) VALUES (?, ?, ?)",
+                rows,
+            )
+
+    def clear(self, thread_id: str) -> None:
+        """Remove all messages of the thread `thread_id`"""
+        self.save(thread_id, [])
+
+    def threads(self) -> list[str]:
+        """The IDs of all threads with messages"""
+        rows = self._connection.execute(
+            "SELECT DISTINCT thread_id FROM messages ORDER BY thread_id"
+        ).fetchall()
+        return [thread_id for thread_id, in rows]
+
+    def close(self) -> None:
+        """Close the connection to the database"""
+        self._connection.close()
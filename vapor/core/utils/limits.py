@@ -0,0 +1,163 @@
+"""Per-request deadlines and result size limits, propagated through
+a context variable to every call made on behalf of the request, e.g.
+the Cypher queries and embedding requests of an MCP tool call, as well
+as admission control of concurrent requests.
+"""
+
+from __future__ import annotations
+from typing import AsyncGenerator, Awaitable, Generator, TypeVar
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import asyncio
+import time
+
+from vapor.core.utils import metrics
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call is made or waited on past the request deadline"""
+
+
+class Overloaded(DeadlineExceeded):
+    """Raised when a request is rejected at capacity, as it could not be
+    served in time
+    """
+
+
+@dataclass(frozen=True)
+class RequestLimits:
+    """The limits of the current request
+
+    Args:
+        deadline (float | None, optional): The `time.monotonic()` time by
+            which the request must be done. If None, unbounded.
+            Defaults to None.
+        max_rows (int | None, optional): The max number of rows fetched
+            per query result. If None, unbounded. Defaults to None.
+    """
+
+    deadline: float | None = None
+    max_rows: int | None = None
+
+    def remaining(self) -> float | None:
+        """The remaining time in seconds until the deadline, None if unbounded.
+        Raises `DeadlineExceeded` if it has passed.
+        """
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded by {-remaining:.3f}s")
+        return remaining
+
+
+_request_limits: ContextVar[RequestLimits] = ContextVar(
+    "request_limits", default=RequestLimits()
+)
+
+
+def current_limits() -> RequestLimits:
+    """The limits of the current request, unbounded outside of any request"""
+    return _request_limits.get()
+
+
+@contextmanager
+def request_limits(
+    timeout: float | None = None, max_rows: int | None = None
+) -> Generator[RequestLimits, None, None]:
+    """Limit the calls within the context to finish within `timeout` seconds
+    and fetch at most `max_rows` rows per query. Nested limits can only
+    tighten the limits of an enclosing request.
+    """
+    outer = _request_limits.get()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if outer.deadline is not None:
+        deadline = outer.deadline if deadline is None else min(deadline, outer.deadline)
+    if outer.max_rows is not None:
+        max_rows = outer.max_rows if max_rows is None else min(max_rows, outer.max_rows)
+    limits = RequestLimits(deadline=deadline, max_rows=max_rows)
+    token = _request_limits.set(limits)
+    try:
+        yield limits
+    finally:
+        _request_limits.reset(token)
+
+
+async def wait_for_deadline(awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it and raising `DeadlineExceeded`
+    if the deadline of the current request passes first.
+    """
+    try:
+        remaining = current_limits().remaining()
+    except DeadlineExceeded:
+        # Never started, avoid the warning of an unawaited coroutine
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded(f"Deadline of {remaining:.3f}s exceeded") from e
+
+
+class AdmissionController(object):
+    """Limits the number of concurrently served requests to `max_concurrency`,
+    queueing up to `max_queue` more requests until one is done or their
+    deadline passes. Requests beyond that are rejected immediately, such
+    that an overloaded dependency cannot build up an unbounded backlog.
+
+    Args:
+        name (str): The name of the controller, labeling its metrics.
+        max_concurrency (int): The max number of concurrent requests.
+        max_queue (int, optional): The max number of waiting requests.
+            Defaults to 0.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int = 0):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency={max_concurrency} must be at least 1")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.n_active = 0
+        self.n_waiting = 0
+        self.n_rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active_gauge = metrics.ADMISSION_ACTIVE.labels(name)
+        self._waiting_gauge = metrics.ADMISSION_WAITING.labels(name)
+
+    @asynccontextmanager
+    async def admit(self, max_wait: float | None = None) -> AsyncGenerator[None, None]:
+        """Serve the request within the context once admitted. Raises
+        `Overloaded` if the queue is full, or `DeadlineExceeded` if the
+        deadline of the request passes, or `max_wait` seconds pass,
+        while queued.
+        """
+        if self._semaphore.locked() and self.n_waiting >= self.max_queue:
+            self.n_rejected += 1
+            metrics.ADMISSION_REJECTED.labels(self.name).inc()
+            raise Overloaded(
+                f"{self.name} is at capacity with {self.n_active} active"
+                + f" and {self.n_waiting} waiting requests"
+            )
+        self.n_waiting += 1
+        self._waiting_gauge.inc()
+        try:
+            with request_limits(timeout=max_wait):
+                await wait_for_deadline(self._semaphore.acquire())
+        finally:
+            self.n_waiting -= 1
+            self._waiting_gauge.dec()
+        self.n_active += 1
+        self._active_gauge.inc()
+        try:
+            yield
+        finally:
+            self.n_active -= 1
+            self._active_gauge.dec()
+            self._semaphore.release()
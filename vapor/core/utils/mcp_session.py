@@ -0,0 +1,151 @@
+"""A long-lived MCP client session, reused by every tool call"""
+
+from __future__ import annotations
+from typing import Awaitable, Callable
+import asyncio
+
+from loguru import logger
+from mcp import ClientSession
+from mcp.types import CallToolResult
+from langchain_mcp_adapters.sessions import Connection, create_session
+from langchain_mcp_adapters.interceptors import MCPToolCallRequest, MCPToolCallResult
+
+from vapor.core.utils import tracing
+
+
+class PersistentMCPSession(object):
+    """Holds one MCP session to the server `server_name` for as long as it
+    is open, instead of a new session (and HTTP/MCP handshake) per tool call.
+    Used as a tool call interceptor of a `MultiServerMCPClient`, e.g.
+
+        session = PersistentMCPSession("vapor-mcp", connection)
+        client = MultiServerMCPClient(
+            {"vapor-mcp": connection}, tool_interceptors=[session]
+        )
+
+    If a call fails, e.g. as the server restarted, the session is reopened
+    and the call retried up to `max_retries` times.
+
+    Args:
+        server_name (str): The name of the server in the client's connections.
+        connection (Connection): The connection config of the server.
+        max_retries (int, optional): Max retries of a failed call, each with
+            a new session. Defaults to 1.
+    """
+
+    def __init__(self, server_name: str, connection: Connection, max_retries: int = 1):
+        self.server_name = server_name
+        self.connection = connection
+        self.max_retries = max_retries
+        self.n_sessions = 0
+        self._session: ClientSession | None = None
+        self._closed: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def _run(
+        self, ready: asyncio.Future[ClientSession], closed: asyncio.Event
+    ) -> None:
+        """Hold the session open until `closed`. The session is entered and
+        exited by this task, as its transport must be closed by the same task.
+        """
+        session = None
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                ready.set_result(session)
+                await closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session to {self.server_name} failed: {e!r}")
+        finally:
+            # Reconnect on the next call if the session failed
+            if session is not None and self._session is session:
+                self._session = None
+
+    async def connect(self) -> ClientSession:
+        """The open session, opening a new one if there is none"""
+        async with self._lock:
+            if self._session is not None:
+                return self._session
+            loop = asyncio.get_running_loop()
+            ready: asyncio.Future[ClientSession] = loop.create_future()
+            self._closed = asyncio.Event()
+            self._task = loop.create_task(self._run(ready, self._closed))
+            self._session = await ready
+            self.n_sessions += 1
+            logger.debug(f"Opened MCP session #{self.n_sessions} to {self.server_name}")
+            return self._session
+
+    async def close(self) -> None:
+        """Close the open session, if any"""
+        async with self._lock:
+            self._session = None
+            if self._task is None:
+                return
+            self._closed.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __aenter__(self) -> PersistentMCPSession:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def __call__(
+        self,
+        request: MCPToolCallRequest,
+        handler: Callable[[MCPToolCallRequest], Awaitable[MCPToolCallResult]],
+    ) -> MCPToolCallResult:
+        # NOTE: Calls with custom headers need a session of their own
+        if request.server_name != self.server_name or request.headers:
+            return await handler(request)
+        for attempt in range(self.max_retries + 1):
+            try:
+                session = await self.connect()
+                return await self._call_tool(session, self._task, request)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(
+                    f"MCP tool call {request.name} failed, reconnecting: {e!r}"
+                )
+                await self.close()
+
+    @staticmethod
+    async def _call_tool(
+        session: ClientSession, task: asyncio.Task, request: MCPToolCallRequest
+    ) -> MCPToolCallResult:
+        """Call the tool with the `session`, failing if it closes first. The
+        trace context of the call, if any, is passed to the server in `_meta`.
+        """
+        traceparent = tracing.current_traceparent()
+        meta = {tracing.TRACEPARENT: traceparent} if traceparent else None
+        call = asyncio.ensure_future(
+            session.call_tool(request.name, request.args, meta=meta)
+        )
+        await asyncio.wait({call, task}, return_when=asyncio.FIRST_COMPLETED)
+        if not call.done():
+            call.cancel()
+            raise ConnectionError("MCP session closed during the tool call")
+        return call.result()
+
+
+async def trace_tool_call(
+    request: MCPToolCallRequest,
+    handler: Callable[[MCPToolCallRequest], Awaitable[MCPToolCallResult]],
+) -> MCPToolCallResult:
+    """Tool call interceptor tracing each call as the span "tool.<name>" of
+    the current trace, if any, along with the spans of the call returned by
+    the server. Must precede the `PersistentMCPSession` in the interceptors,
+    such that the server continues the trace of the span.
+    """
+    with tracing.span(f"tool.{request.name}", server=request.server_name) as span:
+        result = await handler(request)
+    if span is not None and isinstance(result, CallToolResult) and result.meta:
+        tracing.current_trace().extend(result.meta.get(tracing.SPANS, []))
+    return result
@@ -0,0 +1,161 @@
+"""Prometheus metrics of the latency and load of Vapor's tools and their
+dependencies, exposed by the `/metrics` route of the app. Observing
+a metric takes on the order of a microsecond, cheap enough to always
+leave on.
+
+With multiple app workers, set `PROMETHEUS_MULTIPROC_DIR` to a writable
+directory such that the metrics of all workers are aggregated.
+"""
+
+from __future__ import annotations
+from typing import Callable, Generator
+from contextlib import contextmanager
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Latency buckets in seconds, from sub-millisecond cache hits up to timeouts
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+SIZE_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384)
+
+TOOL_DURATION = Histogram(
+    "vapor_tool_duration_seconds",
+    "Duration of MCP tool calls",
+    ["tool"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_CALLS = Counter(
+    "vapor_tool_calls_total",
+    "MCP tool calls by outcome, one of: ok | timeout | rejected | error",
+    ["tool", "outcome"],
+)
+NEO4J_QUERY_DURATION = Histogram(
+    "vapor_neo4j_query_duration_seconds",
+    "Duration of Neo4j queries by Neo4jClient method",
+    ["method"],
+    buckets=LATENCY_BUCKETS,
+)
+NEO4J_QUERY_ROWS = Histogram(
+    "vapor_neo4j_query_rows",
+    "Rows returned by Neo4j read queries by Neo4jClient method",
+    ["method"],
+    buckets=SIZE_BUCKETS,
+)
+NEO4J_QUERY_ERRORS = Counter(
+    "vapor_neo4j_query_errors_total",
+    "Failed Neo4j queries by Neo4jClient method",
+    ["method"],
+)
+COALESCED_CALLS = Counter(
+    "vapor_coalesced_calls_total",
+    "Calls which shared the result of an identical call in flight",
+    ["name"],
+)
+ADMISSION_ACTIVE = Gauge(
+    "vapor_admission_active",
+    "Requests being served by admission controller",
+    ["name"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAITING = Gauge(
+    "vapor_admission_waiting",
+    "Requests queued for admission by admission controller",
+    ["name"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "vapor_admission_rejected_total",
+    "Requests rejected at capacity by admission controller",
+    ["name"],
+)
+DEGRADED_CALLS = Counter(
+    "vapor_degraded_calls_total",
+    "MCP tool calls served by a cheaper fallback under load",
+    ["tool"],
+)
+EMBEDDING_DURATION = Histogram(
+    "vapor_embedding_duration_seconds",
+    "Duration of embedding requests to the model",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "vapor_embedding_batch_size",
+    "Texts per embedding request to the model",
+    ["model"],
+    buckets=SIZE_BUCKETS,
+)
+
+
+@contextmanager
+def observe_duration(histogram: Histogram) -> Generator[None, None, None]:
+    """Observe the duration of the context in `histogram`, also on errors"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+class CacheCollector(Collector):
+    """Collects the hit/miss/eviction counters and size of the registered
+    caches, e.g. `LRUCache.stats`, when the metrics are scraped.
+    """
+
+    def __init__(self):
+        self._caches: dict[str, Callable[[], dict[str, int] | None]] = {}
+
+    def register(self, name: str, stats: Callable[[], dict[str, int] | None]) -> None:
+        """Register the cache `name`, replacing any cache of the same name.
+        `stats` returns its current stats, or None if it is disabled.
+        """
+        self._caches[name] = stats
+
+    def collect(self):
+        counters = {
+            key: CounterMetricFamily(
+                f"vapor_cache_{key}", f"Cache {key} by cache", labels=["cache"]
+            )
+            for key in ["hits", "misses", "evictions"]
+        }
+        gauges = {
+            key: GaugeMetricFamily(
+                f"vapor_cache_{key}", f"Cache {key} by cache", labels=["cache"]
+            )
+            for key in ["entries", "bytes"]
+        }
+        for name, get_stats in list(self._caches.items()):
+            stats = get_stats()
+            if stats is None:
+                continue
+            for key, metric in {**counters, **gauges}.items():
+                metric.add_metric([name], stats[key])
+        yield from counters.values()
+        yield from gauges.values()
+
+
+CACHES = CacheCollector()
+REGISTRY.register(CACHES)
+
+
+def register_cache(name: str, stats: Callable[[], dict[str, int] | None]) -> None:
+    """Expose the stats of the cache `name` as metrics, see `CacheCollector`"""
+    CACHES.register(name, stats)
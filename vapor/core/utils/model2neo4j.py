@@ -1,11 +1,18 @@
-from typing import Generator, Any
+from __future__ import annotations
+from typing import TYPE_CHECKING, Generator, Iterable, Any
+from pathlib import Path
+import math
 
+import numpy as np
+import pandas as pd
 from rich.progress import track
 from loguru import logger
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from vapor.core.models.embeddings import VaporEmbeddings
-from vapor.core.clients import Neo4jClient
+from vapor.core.utils.vector_index import LocalVectorIndex
+
+if TYPE_CHECKING:  # pragma: nocover
+    from vapor.core.models.embeddings import VaporEmbeddings
+    from vapor.core.clients import Neo4jClient
 
 
 def generate_game_description_chunks(
@@ -32,6 +39,9 @@ def generate_game_description_chunks(
     Yields:
         dict[str, Any]: Each chunk with keys `"text"` and `"metadata"`.
     """
+    # NOTE: Imported here, as it is only needed when (re-)embedding
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     # Setup text splitter
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
@@ -54,16 +64,48 @@ def generate_game_description_chunks(
         yield data
 
 
+def pool_game_embeddings(chunks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Pool the embeddings of the description `chunks` of each game
+    into a single game-level embedding, i.e. the normalized mean
+    of the game's chunk embeddings.
+
+    Args:
+        chunks (list[dict[str, Any]]): The list of embedded chunks
+            each with `"source"` and `"embedding"` attributes.
+
+    Returns:
+        list[dict[str, Any]]: The pooled embedding of each game, with
+            `"appid"` and `"embedding"` attributes.
+    """
+    chunk_embeddings: dict[int, list[list[float]]] = {}
+    for chunk in chunks:
+        chunk_embeddings.setdefault(chunk["source"], []).append(chunk["embedding"])
+    games = []
+    for appid, embeddings in chunk_embeddings.items():
+        pooled = np.mean(np.asarray(embeddings, dtype=np.float32), axis=0)
+        norm = np.linalg.norm(pooled)
+        if norm > 0:
+            pooled /= norm
+        games.append({"appid": appid, "embedding": pooled.tolist()})
+    return games
+
+
 def embed_game_descriptions(
-    embedder: VaporEmbeddings, neo4j_client: Neo4jClient, **kwargs
+    embedder: VaporEmbeddings,
+    neo4j_client: Neo4jClient,
+    batch_size: int = 100,
+    **kwargs,
 ) -> None:
-    """Generate embeddings for chunks of text.
+    """Generate embeddings for chunks of text, as well as the
+    game-level embeddings pooled from the chunks of each game.
 
     Args:
         embedder (VaporEmbeddings): The `VaporEmbeddings` embedding model
             to use to generate document embeddings.
         neo4j_client (Neo4jClient): The `Neo4jClient` for
             interaction with the Neo4j database.
+        batch_size (int, optional): The number of games to embed and
+            write to the database per transaction. Defaults to 100.
         **kwargs: Keyword arguments to apply to the `text_splitter`.
     """
     # Retrieve all games and their descriptions
@@ -71,31 +113,212 @@ def embed_game_descriptions(
     game_descriptions_df = neo4j_client.get_game_descriptions(all_games)
     total_games = len(game_descriptions_df)
     logger.info(f"Found {total_games} total game descriptions to embed.")
+    # Indexes of embeddings of another dimension would reject the new vectors
+    neo4j_client.drop_changed_vector_indexes(embedder.embedding_size)
 
-    # Iterate over the descriptions, chunk, embed, and write
-    for game in track(
-        game_descriptions_df.itertuples(),
+    # Iterate over the descriptions in batches, chunk, embed, and write
+    for start in track(
+        range(0, total_games, batch_size),
         description="Embedding:",
-        total=total_games,
+        total=math.ceil(total_games / batch_size),
     ):
+        batch_df = game_descriptions_df.iloc[start : start + batch_size]
         # Extract chunks
         chunks: list[dict[str, Any]] = []
         texts: list[str] = []
-        for chunk in generate_game_description_chunks(game.appid, game.about_the_game):
-            texts.append(chunk.pop("text"))
-            chunks.append(chunk)
+        for game in batch_df.itertuples():
+            for chunk in generate_game_description_chunks(
+                game.appid, game.about_the_game, **kwargs
+            ):
+                texts.append(chunk.pop("text"))
+                chunks.append(chunk)
 
         # Embed chunks
-        embeddings = embedder.embed_documents(texts)
+        embeddings = embedder.embed_documents(texts) if texts else []
         for i, chunk in enumerate(chunks):
             chunk["embedding"] = embeddings[i]
 
         # Add to neo4j
-        neo4j_client.set_game_description_embeddings(game.appid, chunks)
+        neo4j_client.set_description_chunk_embeddings(
+            chunks, appids=batch_df["appid"].tolist()
+        )
+        neo4j_client.set_game_embeddings(pool_game_embeddings(chunks))
 
-    # Set up vector index
-    logger.info("Setting up game description chunks vector index...")
+    # Set up the keyword search over names and descriptions, also used
+    # by the hybrid search, in case the descriptions predate the index
+    logger.info("Setting up game descriptions fulltext index...")
+    neo4j_client.set_game_description_fulltext_index()
+    # Set up vector indexes
+    logger.info("Setting up game description chunks and games vector indexes...")
     neo4j_client.set_game_description_vector_index(
         embedding_dimension=embedder.embedding_size
     )
+    neo4j_client.set_game_vector_index(embedding_dimension=embedder.embedding_size)
+    # Invalidate the cached results of the app, e.g. of similar games
+    neo4j_client.bump_graph_version()
     logger.success("Set up game description embeddings successfully.")
+
+
+def top_k_neighbors(
+    vectors: np.ndarray, k: int, block_size: int = 1024
+) -> Generator[tuple[np.ndarray, np.ndarray, np.ndarray], None, None]:
+    """Compute the exact `k` nearest neighbors of each of the normalized
+    `vectors` by cosine similarity, excluding itself, in blocks of
+    `block_size` rows to bound the memory of the similarity matrix.
+
+    Args:
+        vectors (np.ndarray): The normalized embedding matrix.
+        k (int): The number of neighbors per vector.
+        block_size (int, optional): The number of rows per block.
+            Defaults to 1024.
+
+    Yields:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The row indices of the
+            block, and the `(len(rows), k)` neighbor indices and cosine
+            similarities, in descending order of similarity.
+    """
+    k = min(k, len(vectors) - 1)
+    if k <= 0:
+        return
+    for start in range(0, len(vectors), block_size):
+        rows = np.arange(start, min(start + block_size, len(vectors)))
+        scores = vectors[rows] @ vectors.T
+        scores[np.arange(len(rows)), rows] = -np.inf
+        neighbors = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        neighbor_scores = np.take_along_axis(scores, neighbors, axis=1)
+        order = np.argsort(-neighbor_scores, axis=1)
+        yield (
+            rows,
+            np.take_along_axis(neighbors, order, axis=1),
+            np.take_along_axis(neighbor_scores, order, axis=1),
+        )
+
+
+def set_similar_games(
+    neo4j_client: Neo4jClient,
+    k: int = 10,
+    block_size: int = 1024,
+    batch_size: int = 10000,
+) -> None:
+    """Precompute the `k` most similar games of each game by their game-level
+    embeddings and write them as `SIMILAR_TO {score}` relationships, such
+    that similar games can be retrieved with a single graph traversal.
+
+    Args:
+        neo4j_client (Neo4jClient): The `Neo4jClient` for
+            interaction with the Neo4j database.
+        k (int, optional): The number of similar games per game.
+            Defaults to 10.
+        block_size (int, optional): The number of games per block of the
+            similarity computation and relationship write. Defaults to 1024.
+        batch_size (int, optional): The number of game embeddings to read
+            from the database at once. Defaults to 10000.
+    """
+    appids: list[np.ndarray] = []
+    vectors: list[np.ndarray] = []
+    for batch_df in neo4j_client.iter_game_embeddings(batch_size):
+        appids.append(batch_df["appid"].to_numpy(dtype=np.int64))
+        vectors.append(np.array(batch_df["embedding"].tolist(), dtype=np.float32))
+    if not vectors:
+        logger.warning("No game embeddings found, embed game descriptions first.")
+        return
+    all_appids = np.concatenate(appids)
+    all_vectors = np.concatenate(vectors)
+    norms = np.linalg.norm(all_vectors, axis=1, keepdims=True)
+    all_vectors /= np.where(norms > 0, norms, 1.0)
+
+    n_blocks = math.ceil(len(all_vectors) / block_size)
+    for rows, neighbors, scores in track(
+        top_k_neighbors(all_vectors, k, block_size),
+        description="Setting similar games...",
+        total=n_blocks,
+    ):
+        similar_games = [
+            {
+                "appid": int(all_appids[row]),
+                "similar_appid": int(all_appids[neighbor]),
+                # NOTE: Same scale as the Neo4j cosine similarity score, i.e. [0, 1]
+                "score": float((1.0 + score) / 2.0),
+            }
+            for row, row_neighbors, row_scores in zip(rows, neighbors, scores)
+            for neighbor, score in zip(row_neighbors, row_scores)
+        ]
+        neo4j_client.set_similar_games(similar_games, appids=all_appids[rows].tolist())
+    # Invalidate the cached results of the app, e.g. of find_games_similar_to
+    neo4j_client.bump_graph_version()
+    logger.success(f"Set up to {k} similar games for {len(all_appids)} games.")
+
+
+def _export_vector_index(
+    batches: Iterable[pd.DataFrame],
+    path: Path | str,
+    columns: list[str],
+    hnsw: bool = False,
+) -> None:
+    """Export the `"embedding"` and metadata `columns` of the `batches`
+    to a new version of the `LocalVectorIndex` at `path`, with its HNSW
+    graph if `hnsw`.
+    """
+    vectors: list[np.ndarray] = []
+    values: dict[str, list[np.ndarray]] = {name: [] for name in columns}
+    for batch_df in batches:
+        vectors.append(np.array(batch_df["embedding"].tolist(), dtype=np.float32))
+        for name in columns:
+            values[name].append(batch_df[name].to_numpy(dtype=np.int64))
+
+    if not vectors:
+        logger.warning(f"No embeddings found to export to {path}.")
+        return
+    LocalVectorIndex.write(
+        path,
+        np.concatenate(vectors),
+        {name: np.concatenate(arrays) for name, arrays in values.items()},
+        hnsw=hnsw,
+    )
+    logger.success(f"Exported embeddings to {path}")
+
+
+def export_game_description_index(
+    neo4j_client: Neo4jClient, path: Path | str, batch_size: int = 10000
+) -> None:
+    """Export the embeddings of all `DescriptionChunk` nodes to a new
+    version of the `LocalVectorIndex` at `path`.
+
+    Args:
+        neo4j_client (Neo4jClient): The `Neo4jClient` for
+            interaction with the Neo4j database.
+        path (Path | str): The root directory of the local vector index.
+        batch_size (int, optional): The number of chunks to read from the
+            database at once. Defaults to 10000.
+    """
+    _export_vector_index(
+        neo4j_client.iter_description_chunk_embeddings(batch_size),
+        path,
+        columns=["appid", "start_index", "total_length"],
+    )
+
+
+def export_game_index(
+    neo4j_client: Neo4jClient,
+    path: Path | str,
+    batch_size: int = 10000,
+    hnsw: bool = False,
+) -> None:
+    """Export the game-level embeddings of all `Game` nodes to a new
+    version of the `LocalVectorIndex` at `path`.
+
+    Args:
+        neo4j_client (Neo4jClient): The `Neo4jClient` for
+            interaction with the Neo4j database.
+        path (Path | str): The root directory of the local vector index.
+        batch_size (int, optional): The number of games to read from the
+            database at once. Defaults to 10000.
+        hnsw (bool, optional): Whether to build the HNSW graph of the
+            embeddings for the `hnsw` backend. Defaults to False.
+    """
+    _export_vector_index(
+        neo4j_client.iter_game_embeddings(batch_size),
+        path,
+        columns=["appid"],
+        hnsw=hnsw,
+    )
@@ -0,0 +1,56 @@
+"""Coalescing of identical concurrent asynchronous calls"""
+
+from __future__ import annotations
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+import asyncio
+
+from vapor.core.utils import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Runs at most one call per key at a time. Calls made with the key of
+    a call which is still in flight wait for and share its result (or error)
+    instead of running again, e.g. concurrent identical tool calls.
+
+    The shared call runs as a task in the context of the first caller, such
+    as its `request_limits()`, and is not cancelled if any caller is.
+
+    Args:
+        name (str): The name of the calls, labeling the coalesced calls metric.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.n_coalesced = 0
+        self._calls: dict[K, asyncio.Task[V]] = {}
+
+    async def do(self, key: K, call: Callable[[], Awaitable[V]]) -> tuple[V, bool]:
+        """Run `call` unless a call with the same `key` is in flight, in which
+        case wait for its result instead. Returns the result and whether it is
+        shared with another caller, who may hold the same (mutable) object.
+        """
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        # NOTE: Tasks can only be awaited from the event loop they run in
+        shared = task is not None and task.get_loop() is loop
+        if shared:
+            self.n_coalesced += 1
+            metrics.COALESCED_CALLS.labels(self.name).inc()
+        else:
+            task = loop.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: K, task: asyncio.Task[V]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the error as retrieved, in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
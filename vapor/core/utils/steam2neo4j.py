@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from rich.progress import track
 from loguru import logger
 
@@ -121,6 +123,9 @@ def populate_games(
             steamid=steamid, games=recently_played_games
         )
 
+    # Invalidate the cached results of the app
+    neo4j_client.bump_graph_version()
+
 
 def populate_genres(
     steam_client: clients.SteamClient,
@@ -176,3 +181,10 @@ def populate_game_descriptions(
     # Add descriptions in batch
     logger.info(f"Adding {len(descriptions)} total game desriptions...")
     neo4j_client.add_game_descriptions(descriptions)
+
+    # Set up the keyword search over names and descriptions
+    logger.info("Setting up game descriptions fulltext index...")
+    neo4j_client.set_game_description_fulltext_index()
+
+    # Invalidate the cached results of the app
+    neo4j_client.bump_graph_version()
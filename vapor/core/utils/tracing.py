@@ -0,0 +1,180 @@
+"""Tracing of the latency of a request as nested spans, e.g. a chat turn
+with its LLM and tool calls, and the Neo4j queries and embedding requests of
+each tool call on the server. The current span is propagated through a
+context variable, and across processes as a W3C `traceparent`, such that
+a span can be recorded from anywhere with `span()`. Outside of a trace,
+`span()` records nothing and costs on the order of a microsecond.
+"""
+
+from __future__ import annotations
+from typing import Any, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+import json
+import re
+import secrets
+import time
+
+# Keys of the `_meta` of MCP requests and results, carrying the trace context
+# of a tool call to the server, and the spans of the server back to the client
+TRACEPARENT = "traceparent"
+SPANS = "vapor/spans"
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    """A timed operation of a trace
+
+    Args:
+        name (str): The name of the operation, e.g. "neo4j.get_game_by_name".
+        trace_id (str): The ID of the trace, 32 hex characters.
+        span_id (str): The ID of the span, 16 hex characters.
+        parent_id (str | None): The ID of the enclosing span, None for the
+            root span of a trace.
+        start (float): The wall clock start time, in seconds since the epoch.
+        duration (float | None, optional): The duration in seconds, None
+            until the span ends. Defaults to None.
+        attributes (dict[str, Any], optional): Attributes of the operation,
+            e.g. token counts. Defaults to {}.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start: float
+    duration: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    _perf_start: float = field(
+        default_factory=time.perf_counter, repr=False, compare=False
+    )
+
+    def to_dict(self) -> dict[str, Any]:
+        span = asdict(self)
+        del span["_perf_start"]
+        return span
+
+    @classmethod
+    def from_dict(cls, span: dict[str, Any]) -> Span:
+        return cls(**span)
+
+
+class Trace(object):
+    """The spans of a trace, recorded once they end
+
+    Args:
+        trace_id (str | None, optional): The ID of the trace, e.g. of a remote
+            parent. If None, a new ID. Defaults to None.
+    """
+
+    def __init__(self, trace_id: str | None = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans: list[Span] = []
+
+    def start_span(self, name: str, parent_id: str | None = None, **attributes) -> Span:
+        """Start a span `name`, recorded once passed to `end_span()`. Prefer
+        `span()`, unless the span cannot be a context, e.g. in callbacks.
+        """
+        return Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent_id,
+            start=time.time(),
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span) -> None:
+        span.duration = time.perf_counter() - span._perf_start
+        self.spans.append(span)
+
+    def extend(self, spans: list[dict[str, Any]]) -> None:
+        """Record the spans of a remote part of the trace, e.g. a server"""
+        self.spans.extend(Span.from_dict(span) for span in spans)
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return [span.to_dict() for span in self.spans]
+
+    def write(self, path: str | Path) -> None:
+        """Append the spans to the JSONL file `path`, one span per line"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            for span in self.spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+_current_span: ContextVar[tuple[Trace, Span] | None] = ContextVar(
+    "current_span", default=None
+)
+
+
+def current_trace() -> Trace | None:
+    """The current trace, None outside of a trace"""
+    current = _current_span.get()
+    return None if current is None else current[0]
+
+
+def current_span() -> Span | None:
+    """The current span, None outside of a trace"""
+    current = _current_span.get()
+    return None if current is None else current[1]
+
+
+def current_traceparent() -> str | None:
+    """The W3C `traceparent` of the current span, to continue the trace in
+    another process, None outside of a trace
+    """
+    current = current_span()
+    if current is None:
+        return None
+    return f"00-{current.trace_id}-{current.span_id}-01"
+
+
+def parse_traceparent(traceparent: str) -> tuple[str, str] | None:
+    """The trace and parent span IDs of a W3C `traceparent`, None if invalid"""
+    match = _TRACEPARENT_PATTERN.match(traceparent.strip().lower())
+    return None if match is None else (match.group(1), match.group(2))
+
+
+@contextmanager
+def _span(trace: Trace, span: Span) -> Generator[Span, None, None]:
+    token = _current_span.set((trace, span))
+    try:
+        yield span
+    except Exception as e:
+        span.attributes["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.end_span(span)
+
+
+@contextmanager
+def trace(
+    name: str, traceparent: str | None = None, **attributes
+) -> Generator[Trace, None, None]:
+    """Start a trace with the root span `name`, or continue the remote trace
+    of `traceparent`, e.g. of the client of a request. The spans are recorded
+    in the trace once they end.
+    """
+    trace_id, parent_id = parse_traceparent(traceparent or "") or (None, None)
+    new_trace = Trace(trace_id)
+    root = new_trace.start_span(name, parent_id, **attributes)
+    with _span(new_trace, root):
+        yield new_trace
+
+
+@contextmanager
+def span(name: str, **attributes) -> Generator[Span | None, None, None]:
+    """Record the span `name` of the context in the current trace, if any"""
+    current = _current_span.get()
+    if current is None:
+        yield None
+        return
+    current_trace, parent = current
+    child = current_trace.start_span(name, parent.span_id, **attributes)
+    with _span(current_trace, child):
+        yield child
@@ -2,6 +2,9 @@
 
 from typing import Any
 import os
+import re
+import subprocess
+import sys
 from pathlib import Path
 
 
@@ -26,6 +29,95 @@ def get_env_var(env_key: str, default: str | None = None) -> str:
     return default
 
 
+def str_to_bool(value: str) -> bool:
+    """Converts a string `value`, such as an environment variable,
+    to a boolean. Raises a `ValueError` if it cannot be interpreted.
+    """
+    normalized = value.strip().lower()
+    if normalized in {"1", "true", "yes", "on"}:
+        return True
+    if normalized in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(f"Unable to interpret '{value}' as a boolean.")
+
+
+LUCENE_SPECIAL_CHARS = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+LUCENE_OPERATORS = {"AND", "OR", "NOT", "TO"}
+
+
+def escape_lucene_query(text: str) -> str:
+    """Escapes the special characters and operators of the Lucene query
+    syntax in `text`, such that free text, e.g. from a user or an agent,
+    can be passed as a fulltext index query matching any of its terms.
+    """
+    escaped = LUCENE_SPECIAL_CHARS.sub(r"\\\1", text)
+    return " ".join(
+        term.lower() if term in LUCENE_OPERATORS else term for term in escaped.split()
+    )
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Truncates `text` to at most `max_chars` characters,
+    without cutting off the last word where possible.
+    """
+    if len(text) <= max_chars:
+        return text
+    truncated = text[:max_chars]
+    if not text[max_chars].isspace():
+        truncated = truncated.rsplit(None, 1)[0]
+    return truncated.rstrip()
+
+
+def select_excerpts(
+    text: str,
+    spans: list[tuple[int, int]],
+    max_chars: int,
+    separator: str = " ... ",
+) -> str:
+    """Selects excerpts of `text` within a budget of `max_chars` characters.
+    The `spans`, i.e. `(start_index, length)` pairs such as the description
+    chunks of a game, are added most relevant first while they fit, and
+    joined in their order in `text` with `separator`, merging overlaps.
+    Falls back to `truncate_text()` if no span fits.
+    """
+    if len(text) <= max_chars:
+        return text
+    selected: list[tuple[int, int]] = []
+    excerpts = ""
+    for start, length in spans:
+        candidate = _join_spans(text, [*selected, (start, start + length)], separator)
+        if len(candidate) <= max_chars:
+            selected.append((start, start + length))
+            excerpts = candidate
+    return excerpts or truncate_text(text, max_chars)
+
+
+def _join_spans(text: str, spans: list[tuple[int, int]], separator: str) -> str:
+    merged: list[list[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return separator.join(text[start:end].strip() for start, end in merged)
+
+
+def select_chunks(chunks: list[str], max_chars: int) -> list[str]:
+    """Selects the `chunks`, most relevant first, while their total length
+    fits within a budget of `max_chars` characters. If none fit,
+    the most relevant chunk is truncated with `truncate_text()`.
+    """
+    selected = []
+    total_chars = 0
+    for chunk in chunks:
+        if total_chars + len(chunk) <= max_chars:
+            selected.append(chunk)
+            total_chars += len(chunk)
+    if not selected and chunks:
+        selected.append(truncate_text(chunks[0], max_chars))
+    return selected
+
+
 def set_env(env_mapping: dict[str, Any]) -> None:
     """Overrides specific environment variables to use values
     as supplied by `env_mapping`.
@@ -39,3 +131,25 @@ def in_docker() -> bool:
     This is mildly hacky but useful in case, for example, env vars need adjustment.
     """
     return Path("/.dockerenv").exists()
+
+
+def import_times(module: str) -> dict[str, float]:
+    """Measures the cumulative time in seconds to import `module`, and each
+    module imported along with it, in a fresh interpreter with
+    `python -X importtime`. Modules which were not imported are absent.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <module>"
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
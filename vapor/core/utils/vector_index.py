@@ -0,0 +1,329 @@
+"""In-process nearest neighbor index over embeddings exported from Neo4j"""
+
+from __future__ import annotations
+from typing import Any
+from pathlib import Path
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from vapor.core.utils import utils
+
+VECTOR_INDEX_BACKENDS = ["exact", "hnsw"]
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+HNSW_FILE = "hnsw.bin"
+
+
+class LocalVectorIndex(object):
+    """Nearest neighbor index over a compact `float32` embedding matrix
+    stored on disk, searched with either exact NumPy top-k or an HNSW
+    index (requires the optional `hnswlib` package). The HNSW graph is built
+    once when a version is written with `hnsw=True`, and only loaded by
+    the `hnsw` backend, which searches versions without one exactly.
+
+    Each export is written to its own version directory under `path`, and
+    the `CURRENT` file, which is swapped atomically, points to the latest
+    complete version. A loaded index checks `CURRENT` at most once every
+    `refresh_interval` seconds and hot-swaps to a newer version if one has
+    been exported, e.g. by the populate job after re-embedding.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        backend: str = "exact",
+        mmap: bool = True,
+        refresh_interval: float = 10.0,
+    ):
+        if backend not in VECTOR_INDEX_BACKENDS:
+            raise ValueError(
+                f"Unknown vector index backend={backend},"
+                + f" must be one of: {VECTOR_INDEX_BACKENDS}"
+            )
+        self.path = Path(path)
+        self.backend = backend
+        self.mmap = mmap
+        self.refresh_interval = refresh_interval
+        self.version: str | None = None
+        self._vectors: np.ndarray | None = None
+        self._columns: dict[str, np.ndarray] = {}
+        # The row order sorting each column, and its sorted values, to look
+        # up the rows of filtered values without scanning the column
+        self._sorted_columns: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._hnsw = None
+        self._last_refresh: float | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(
+        cls, name: str = "game_descriptions", exact: bool = False
+    ) -> LocalVectorIndex | None:
+        """Initialize the `LocalVectorIndex` named `name` under `VAPOR_DATA_PATH`,
+        if enabled with the `VAPOR_LOCAL_VECTOR_INDEX` backend, otherwise None.
+        If `exact`, the index is always searched exactly, e.g. an index only
+        searched with `filters`, for which an HNSW graph is never used.
+        """
+        backend = utils.get_env_var("VAPOR_LOCAL_VECTOR_INDEX", "none")
+        if backend == "none":
+            return None
+        data_path = utils.get_env_var("VAPOR_DATA_PATH", "./data")
+        return cls(
+            Path(data_path, "vector_index", name),
+            backend="exact" if exact else backend,
+        )
+
+    @staticmethod
+    def write(
+        path: Path | str,
+        vectors: np.ndarray,
+        columns: dict[str, np.ndarray],
+        keep_versions: int = 2,
+        hnsw: bool = False,
+    ) -> str:
+        """Write a new version of the index at `path` and atomically
+        make it the current version.
+
+        Args:
+            path (Path | str): The root directory of the index.
+            vectors (np.ndarray): The embedding matrix, one row per item.
+                Rows are normalized to unit length and stored as `float32`.
+            columns (dict[str, np.ndarray]): Metadata arrays, each with
+                one value per row of `vectors`, returned with search results.
+            keep_versions (int, optional): The number of versions to keep,
+                older versions are removed. Defaults to 2.
+            hnsw (bool, optional): Whether to build and store the HNSW graph
+                of the vectors for the `hnsw` backend. Defaults to False.
+
+        Returns:
+            str: The new version identifier.
+        """
+        path = Path(path)
+        vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        for name, values in columns.items():
+            if len(values) != len(vectors):
+                raise ValueError(f"Column '{name}' length does not match the vectors")
+
+        version = str(time.time_ns())
+        version_path = path.joinpath(version)
+        version_path.mkdir(parents=True)
+        np.save(version_path.joinpath(VECTORS_FILE), vectors)
+        for name, values in columns.items():
+            np.save(version_path.joinpath(f"{name}.npy"), np.asarray(values))
+        if hnsw:
+            LocalVectorIndex._build_hnsw(vectors).save_index(
+                str(version_path.joinpath(HNSW_FILE))
+            )
+        manifest = {
+            "version": version,
+            "count": int(vectors.shape[0]),
+            "dimension": int(vectors.shape[1]),
+            "columns": list(columns),
+            "hnsw": hnsw,
+        }
+        with open(version_path.joinpath(MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+
+        # Swap the current version atomically
+        tmp_current = path.joinpath(f"{CURRENT_FILE}.tmp")
+        tmp_current.write_text(version)
+        os.replace(tmp_current, path.joinpath(CURRENT_FILE))
+
+        # Clean up older versions
+        versions = sorted(p for p in path.iterdir() if p.is_dir())
+        for old_version in versions[:-keep_versions]:
+            shutil.rmtree(old_version, ignore_errors=True)
+
+        logger.info(f"Wrote vector index version={version} @ {path}")
+        return version
+
+    def _current_version(self) -> str | None:
+        current_file = self.path.joinpath(CURRENT_FILE)
+        if not current_file.exists():
+            return None
+        return current_file.read_text().strip()
+
+    def _load(self, version: str) -> None:
+        version_path = self.path.joinpath(version)
+        with open(version_path.joinpath(MANIFEST_FILE), "r") as f:
+            manifest = json.load(f)
+        mmap_mode = "r" if self.mmap else None
+        vectors = np.load(version_path.joinpath(VECTORS_FILE), mmap_mode=mmap_mode)
+        columns = {
+            name: np.load(version_path.joinpath(f"{name}.npy"))
+            for name in manifest["columns"]
+        }
+        sorted_columns = {}
+        for name, values in columns.items():
+            order = np.argsort(values, kind="stable")
+            sorted_columns[name] = (order, values[order])
+        hnsw = None
+        if self.backend == "hnsw":
+            if manifest.get("hnsw"):
+                hnsw = self._load_hnsw(
+                    version_path.joinpath(HNSW_FILE),
+                    manifest["dimension"],
+                    manifest["count"],
+                )
+            else:
+                logger.warning(
+                    f"Vector index version={version} @ {self.path} was exported"
+                    + " without an HNSW graph, searching it exactly"
+                )
+        # Swap everything at once so searches never see a partial version
+        self._vectors, self._columns, self._sorted_columns, self._hnsw = (
+            vectors,
+            columns,
+            sorted_columns,
+            hnsw,
+        )
+        self.version = version
+        logger.info(
+            f"Loaded vector index version={version} ({manifest['count']} items)"
+            + f" @ {self.path} with backend={self.backend}"
+        )
+
+    @staticmethod
+    def _import_hnswlib():
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError(
+                "The 'hnsw' vector index backend requires hnswlib,"
+                + " install it with: pip install vapor[ann]"
+            ) from e
+        return hnswlib
+
+    @staticmethod
+    def _build_hnsw(vectors: np.ndarray):
+        hnswlib = LocalVectorIndex._import_hnswlib()
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=max(len(vectors), 1))
+        if len(vectors):
+            index.add_items(vectors)
+        return index
+
+    @staticmethod
+    def _load_hnsw(path: Path, dimension: int, count: int):
+        hnswlib = LocalVectorIndex._import_hnswlib()
+        index = hnswlib.Index(space="ip", dim=dimension)
+        index.load_index(str(path), max_elements=max(count, 1))
+        return index
+
+    @staticmethod
+    def _filter_rows(
+        sorted_columns: dict[str, tuple[np.ndarray, np.ndarray]],
+        filters: dict[str, list[Any]],
+    ) -> np.ndarray:
+        """The sorted rows whose column values are in all of the `filters`,
+        gathered by binary search of the `sorted_columns`
+        """
+        rows = None
+        for name, values in filters.items():
+            order, sorted_values = sorted_columns[name]
+            values = np.unique(np.asarray(values))
+            starts = np.searchsorted(sorted_values, values, side="left")
+            lengths = np.searchsorted(sorted_values, values, side="right") - starts
+            # The positions of the matching runs of the sorted values
+            offsets = np.cumsum(lengths) - lengths
+            positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+            matched = np.sort(order[positions])
+            rows = matched if rows is None else np.intersect1d(rows, matched)
+        return rows
+
+    def refresh(self, force: bool = False) -> bool:
+        """Load the current version if it differs from the loaded version.
+        Unless `force`d, this is checked at most every `refresh_interval`
+        seconds. Returns True if a new version was loaded.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_refresh is not None
+            and now - self._last_refresh < self.refresh_interval
+        ):
+            return False
+        with self._lock:
+            self._last_refresh = now
+            version = self._current_version()
+            if version is None or version == self.version:
+                return False
+            self._load(version)
+            return True
+
+    @property
+    def available(self) -> bool:
+        """Whether an exported version of the index has been loaded"""
+        self.refresh()
+        return self._vectors is not None
+
+    def search(
+        self,
+        embedding: list[float],
+        k: int | None = None,
+        filters: dict[str, list[Any]] | None = None,
+    ) -> pd.DataFrame:
+        """Find the `k` nearest neighbors of the query `embedding`
+        by cosine similarity.
+
+        Args:
+            embedding (list[float]): The query embedding vector.
+            k (int, optional): The number of neighbors to return.
+                If None, all (filtered) items are returned. Defaults to None.
+            filters (dict[str, list[Any]], optional): Only search the items
+                whose metadata column values are in the given lists, e.g.
+                `{"appid": [1000, 1001]}`. The filtered items are always
+                searched exactly. Defaults to None.
+
+        Returns:
+            pd.DataFrame: The metadata columns of the neighbors and
+                their `score`, in descending order of `score`. Empty
+                if no version of the index is available.
+        """
+        if not self.available:
+            return pd.DataFrame()
+        vectors, columns, sorted_columns, hnsw = (
+            self._vectors,
+            self._columns,
+            self._sorted_columns,
+            self._hnsw,
+        )
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        rows = self._filter_rows(sorted_columns, filters) if filters else None
+        n_items = len(vectors) if rows is None else len(rows)
+        k = n_items if k is None else min(k, n_items)
+        if k <= 0:
+            return pd.DataFrame()
+
+        if rows is not None:
+            subset_scores = vectors[rows] @ query
+            order = np.argsort(-subset_scores)[:k]
+            indices, scores = rows[order], subset_scores[order]
+        elif hnsw is not None:
+            labels, distances = hnsw.knn_query(query, k=k)
+            indices, scores = labels[0], 1.0 - distances[0]
+        else:
+            all_scores = vectors @ query
+            indices = np.argpartition(-all_scores, k - 1)[:k]
+            indices = indices[np.argsort(-all_scores[indices])]
+            scores = all_scores[indices]
+
+        result = pd.DataFrame(
+            {name: values[indices] for name, values in columns.items()}
+        )
+        # NOTE: Same scale as the Neo4j cosine similarity score, i.e. [0, 1]
+        result["score"] = (1.0 + scores) / 2.0
+        return result
@@ -1,9 +1,5 @@
 from loguru import logger
 
-from vapor.core import clients
-from vapor.core.models.embeddings import VaporEmbeddings
-from vapor.core.utils import steam2neo4j, model2neo4j
-
 
 @logger.catch(reraise=True)
 def populate_neo4j(
@@ -15,9 +11,16 @@ def populate_neo4j(
     genres: bool = False,
     game_descriptions: bool = False,
     embed: list[str] | None = None,
+    similar_games: int | None = None,
     limit: int | None = None,
 ) -> None:
     """Entry point to populate data. Initializes steam/neo4j from env vars."""
+    # NOTE: Imported here, such that e.g. `--help` does not import the clients
+    from vapor.core import clients
+    from vapor.core.models.embeddings import VaporEmbeddings
+    from vapor.core.utils import steam2neo4j, model2neo4j
+    from vapor.core.utils.vector_index import LocalVectorIndex
+
     logger.info("Initializing SteamClient...")
     steam_client = clients.SteamClient.from_env()
     logger.info("Initializing Neo4jClient...")
@@ -72,6 +75,25 @@ def populate_neo4j(
         if "game-descriptions" in texts_to_embed:
             logger.info("Embedding game descriptions and setting up vector index...")
             model2neo4j.embed_game_descriptions(embedder, neo4j_client)
+            # Export for the app's in-process vector search, if enabled
+            # NOTE: Description chunks are only searched with filters, i.e. exactly
+            vector_index = LocalVectorIndex.from_env("game_descriptions", exact=True)
+            game_vector_index = LocalVectorIndex.from_env("games")
+            if vector_index is not None and game_vector_index is not None:
+                logger.info("Exporting game and game description embeddings...")
+                model2neo4j.export_game_description_index(
+                    neo4j_client, vector_index.path
+                )
+                model2neo4j.export_game_index(
+                    neo4j_client,
+                    game_vector_index.path,
+                    hnsw=game_vector_index.backend == "hnsw",
+                )
+
+    # Precompute the most similar games of each game via its game-level embedding
+    if similar_games:
+        logger.info(f"Setting up {similar_games} similar games for each game...")
+        model2neo4j.set_similar_games(neo4j_client, k=similar_games)
 
     logger.success("Completed Neo4j population sequence >>>")
 
@@ -152,6 +174,15 @@ if __name__ == "__main__":
         + " configured OLLAMA_EMBEDDING_MODEL="
         + f"{utils.get_env_var('OLLAMA_EMBEDDING_MODEL', '!!!NONE FOUND!!!')}",
     )
+    parser.add_argument(
+        "-s",
+        "--similar-games",
+        type=int,
+        help="Precompute this many most similar games for each game"
+        + " as SIMILAR_TO relationships. Requires prior embedded"
+        + " game descriptions. Disabled by default.",
+        default=None,
+    )
 
     args = parser.parse_args()
 